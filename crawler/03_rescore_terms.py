@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Step 3b: Rescore stored term hits under new weights, thresholds or tier rules.
+
+03_verify_and_enrich.py saves every scanned page's term counts to
+data/term_hits.npz. This script re-applies BACKFLOW_TERMS weights (optionally
+overridden), --threshold, --testing-threshold, --maps-confidence and the tier
+rules to that matrix in one vectorized pass, and prints how verified.csv /
+rejected_by_verifier.csv would change. Nothing is crawled or written unless
+--diff-csv is given.
+
+Limits:
+- Only terms the verifier already matched are stored, so a brand-new term
+  needs a re-crawl (give it a weight here anyway and it is reported as unseen).
+- The verifier stops early once a site verifies (homepage, Maps data, or
+  strong evidence on internal pages). Places that would now be rejected but
+  were decided early are reported as "needs re-crawl" rather than rejected.
+  The verifier's stopped_early column says which; outputs written before it
+  existed treat every verified place as possibly stopped early.
+
+Usage:
+    python crawler/03_rescore_terms.py --threshold 3
+    python crawler/03_rescore_terms.py --testing-threshold 5 --maps-confidence 6
+    python crawler/03_rescore_terms.py --weights weights.json --show 20 --diff-csv data/rescore_diff.csv
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from backflow_terms import (
+    BACKFLOW_TERMS, MAPS_CONFIDENCE_DEFAULT, MAX_SCORE, TESTING_TIER_TERMS, TIER_SERVICE_DEFAULT,
+    TIER_TESTING_DEFAULT,
+)
+from term_hits import TermHits, rescore
+
+# Paths
+DATA_DIR = Path(__file__).parent / "data"
+VERIFIED_CSV = DATA_DIR / "verified.csv"
+REJECTED_CSV = DATA_DIR / "rejected_by_verifier.csv"
+TERM_HITS_NPZ = DATA_DIR / "term_hits.npz"
+
+PREVIOUS_COLUMNS = {
+    'place_id', 'name', 'website', 'backflow_score', 'tier', 'matched_on', 'stopped_early', 'crawl_status',
+}
+
+
+def load_previous() -> pd.DataFrame:
+    """Current verifier decisions: one row per place_id with a 'was_verified' flag."""
+    frames = []
+    for path, verified in ((VERIFIED_CSV, True), (REJECTED_CSV, False)):
+        if path.exists() and path.stat().st_size > 0:
+            frame = pd.read_csv(path, usecols=lambda c: c in PREVIOUS_COLUMNS, dtype={'place_id': str},
+                                low_memory=False)
+            frame['was_verified'] = verified
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=sorted(PREVIOUS_COLUMNS) + ['was_verified'])
+    previous = pd.concat(frames, ignore_index=True)
+    previous = previous.reindex(columns=sorted(PREVIOUS_COLUMNS) + ['was_verified'])
+    return previous.drop_duplicates('place_id', keep='first')
+
+
+def load_weights(path: str) -> dict:
+    """BACKFLOW_TERMS with the overrides from a {term: weight} JSON file."""
+    with open(path) as f:
+        overrides = json.load(f)
+    return {**BACKFLOW_TERMS, **{t.strip().lower(): w for t, w in overrides.items()}}
+
+
+def diff_decisions(previous: pd.DataFrame, scores: pd.DataFrame) -> pd.DataFrame:
+    """Join old and new decisions; places without stored hits keep their old decision."""
+    diff = previous.merge(scores, how='left', on='place_id', suffixes=('_old', ''))
+    stored = diff['verified'].notna()
+    diff['has_hits'] = stored
+
+    diff['verified'] = diff['verified'].where(stored, diff['was_verified']).astype(bool)
+    diff['tier'] = diff['tier'].where(stored, diff['tier_old'])
+    diff['backflow_score'] = diff['backflow_score'].where(stored, diff['backflow_score_old'])
+    diff['tier'] = diff['tier'].where(diff['verified'], 'none').fillna('none')
+    diff['tier_old'] = diff['tier_old'].where(diff['was_verified'], 'none').fillna('none')
+
+    # Early-stopped decisions can't be overturned without the pages that were skipped;
+    # rows from before the stopped_early column may have stopped on any evidence
+    stopped = diff['stopped_early'].map({True: True, False: False, 'True': True, 'False': False})
+    any_evidence = diff['matched_on_old'].isin(['HOMEPAGE', 'MAPS_DATA', 'INTERNAL', 'BOTH'])
+    stopped = stopped.where(stopped.notna(), any_evidence)
+    decided_early = diff['was_verified'] & stopped.astype(bool)
+    diff['needs_recrawl'] = stored & decided_early & ~diff['verified']
+
+    change = pd.Series('', index=diff.index)
+    change[~diff['was_verified'] & diff['verified']] = 'newly verified'
+    change[diff['was_verified'] & ~diff['verified']] = 'newly rejected'
+    change[diff['needs_recrawl']] = 'needs re-crawl'
+    change[(change == '') & diff['verified'] & (diff['tier'] != diff['tier_old'])] = 'tier change'
+    diff['change'] = change
+    return diff
+
+
+def print_report(diff: pd.DataFrame, show: int):
+    before = diff['was_verified']
+    after = diff['verified'] & ~diff['needs_recrawl']
+
+    print()
+    print(f"{'':24}{'before':>10}{'after':>10}")
+    print(f"{'verified':24}{int(before.sum()):>10,}{int(after.sum()):>10,}")
+    for tier in ('testing', 'service', 'none'):
+        old = int((before & (diff['tier_old'] == tier)).sum())
+        new = int((after & (diff['tier'] == tier)).sum())
+        print(f"{'  tier=' + tier:24}{old:>10,}{new:>10,}")
+    print(f"{'rejected':24}{int((~before).sum()):>10,}{int((~diff['verified'] & ~diff['needs_recrawl']).sum()):>10,}")
+    print(f"{'needs re-crawl':24}{'':>10}{int(diff['needs_recrawl'].sum()):>10,}")
+    print()
+
+    for change in ('newly verified', 'newly rejected', 'tier change', 'needs re-crawl'):
+        rows = diff[diff['change'] == change]
+        print(f"{change}: {len(rows):,}")
+        for _, r in rows.head(show).iterrows():
+            print(f"    {str(r.get('name', ''))[:40]:40}  score {r['backflow_score_old']:g} -> "
+                  f"{r['backflow_score']:g}  tier {r['tier_old']} -> {r['tier']}  {r.get('website', '')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Step 3b: Rescore stored term hits and diff against the verifier outputs'
+    )
+    parser.add_argument('--hits', default=str(TERM_HITS_NPZ), help='Term hits matrix (default: data/term_hits.npz)')
+    parser.add_argument('--weights', help='JSON file of {term: weight} overrides for BACKFLOW_TERMS')
+    parser.add_argument('--threshold', type=float, default=2, help='Min backflow score (default: 2)')
+    parser.add_argument(
+        '--testing-threshold', type=float, default=TIER_TESTING_DEFAULT,
+        help=f'Min score for tier=testing (default: {TIER_TESTING_DEFAULT})'
+    )
+    parser.add_argument(
+        '--testing-terms',
+        help='Comma-separated terms that qualify for tier=testing (default: TESTING_TIER_TERMS)'
+    )
+    parser.add_argument(
+        '--service-threshold', type=float, default=TIER_SERVICE_DEFAULT,
+        help=f'Min score for tier=service (default: {TIER_SERVICE_DEFAULT})'
+    )
+    parser.add_argument(
+        '--maps-confidence', type=float, default=MAPS_CONFIDENCE_DEFAULT,
+        help=f'Maps-data score that verifies without a crawl (0 = off; default: {MAPS_CONFIDENCE_DEFAULT})'
+    )
+    parser.add_argument('--show', type=int, default=10, help='Example rows printed per change (default: 10)')
+    parser.add_argument('--diff-csv', help='Write every changed place to this CSV')
+    args = parser.parse_args()
+
+    hits_path = Path(args.hits)
+    if not hits_path.exists():
+        print(f"ERROR: {hits_path} not found; run 03_verify_and_enrich.py first")
+        sys.exit(1)
+
+    weights = load_weights(args.weights) if args.weights else BACKFLOW_TERMS
+    testing_terms = (
+        {t.strip().lower() for t in args.testing_terms.split(',') if t.strip()}
+        if args.testing_terms else TESTING_TIER_TERMS
+    )
+
+    started = time.perf_counter()
+    hits = TermHits(hits_path)
+    scores = rescore(
+        hits,
+        weights=weights,
+        threshold=args.threshold,
+        testing_threshold=args.testing_threshold,
+        testing_terms=testing_terms,
+        service_threshold=args.service_threshold,
+        maps_confidence=args.maps_confidence,
+        max_score=MAX_SCORE,
+    )
+    diff = diff_decisions(load_previous(), scores)
+    elapsed = time.perf_counter() - started
+
+    print(hits.summary())
+    unseen = sorted(t for t, w in weights.items() if w and t not in set(hits.terms))
+    if unseen:
+        print(f"Not in stored hits (need a re-crawl to count): {', '.join(unseen)}")
+    missing = int((~diff['has_hits']).sum())
+    if missing:
+        print(f"{missing:,} places have no stored hits and keep their current decision")
+    print(f"Rescored {len(scores):,} places in {elapsed:.2f}s")
+
+    print_report(diff, args.show)
+
+    if args.diff_csv:
+        changed = diff[diff['change'] != '']
+        changed.to_csv(args.diff_csv, index=False)
+        print(f"\nWrote {len(changed):,} changed places to {args.diff_csv}")
+
+
+if __name__ == "__main__":
+    main()
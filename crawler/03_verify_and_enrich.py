@@ -16,20 +16,26 @@ Usage:
     python crawler/03_verify_and_enrich.py
     python crawler/03_verify_and_enrich.py --resume
     python crawler/03_verify_and_enrich.py --batch-size 10 --max-pages 3
+    python crawler/03_verify_and_enrich.py --reverify --budget-pages 800 --budget-minutes 45
+    python crawler/03_verify_and_enrich.py --workers 4
 """
 
 import argparse
 import asyncio
 import json
 import logging
+import os
 import re
+import signal
+import subprocess
 import sys
 import time
 from collections import Counter, defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 
 import pandas as pd
 import numpy as np
@@ -43,64 +49,47 @@ except ImportError:
     print("  playwright install")
     sys.exit(1)
 
-
-# Paths
-DATA_DIR = Path(__file__).parent / "data"
+from backflow_terms import (
+    BACKFLOW_TERMS, MAPS_CONFIDENCE_DEFAULT, MAX_SCORE, TESTING_TIER_TERMS, TIER_SERVICE_DEFAULT,
+    TIER_TESTING_DEFAULT,
+)
+from crawl_profiles import install_resource_blocking
+from crawl_share import SharedCrawls, crawl_key
+from domain_health import DomainHealth
+from page_cache import DEFAULT_MAX_MB, DEFAULT_TTL_HOURS, CrawledPage, PageCache, page_variant
+from page_extract import BOOKING_DOMAINS, PageRecord, extract_page
+from reverify_scheduler import (
+    NEVER_VERIFIED_AGE_DAYS, content_hash, load_history, rank_for_reverify, record_checks, save_history,
+    select_within_budget,
+)
+from site_discovery import SiteDiscovery
+from term_hits import RESULT_KEY as TERM_HITS_KEY, TermHits
+from term_matcher import TermMatcher, TermScan
+from work_queue import HEARTBEAT_SECONDS, MAX_ATTEMPTS, WorkQueue
+
+
+# Paths (VERIFIER_DATA_DIR points a run elsewhere, e.g. the offline benchmark)
+DATA_DIR = Path(os.environ.get("VERIFIER_DATA_DIR") or Path(__file__).parent / "data")
 INPUT_CSV = DATA_DIR / "clean_places.csv"
 VERIFIED_CSV = DATA_DIR / "verified.csv"
 REJECTED_CSV = DATA_DIR / "rejected_by_verifier.csv"
 REPORT_MD = DATA_DIR / "verifier_report.md"
 STATE_JSON = DATA_DIR / "verifier_state.json"
+PAGE_CACHE_DB = DATA_DIR / "page_cache.sqlite"
+DISCOVERY_JSON = DATA_DIR / "site_discovery.json"
+DOMAIN_HEALTH_JSON = DATA_DIR / "domain_health.json"
+HISTORY_JSON = DATA_DIR / "verify_history.json"
+TERM_HITS_NPZ = DATA_DIR / "term_hits.npz"
+REVERIFY_VERIFIED_CSV = DATA_DIR / "reverify_verified.csv"
+REVERIFY_REJECTED_CSV = DATA_DIR / "reverify_rejected.csv"
+REVERIFY_STATE_JSON = DATA_DIR / "reverify_state.json"
+QUEUE_DB = DATA_DIR / "verify_queue.sqlite"
+SHARD_DIR = DATA_DIR / "shards"
 LOG_FILE = DATA_DIR / "verifier.log"
 
-# ── Backflow verification terms with weights ─────────────────────────────────
-
-BACKFLOW_TERMS = {
-    # High value terms (exact service names)
-    'backflow testing': 3,
-    'backflow tester': 3,
-    'backflow test': 3,
-    'backflow inspection': 2,
-    'backflow preventer': 2,
-    'backflow prevention': 2,
-    'backflow installation': 2,
-    'backflow repair': 2,
-    'backflow service': 2,
-    'backflow certification': 2,
-    'backflow certified': 2,
-
-    # Medium value terms
-    'cross connection': 1,
-    'cross-connection': 1,
-    'cross connection control': 2,
-    'rpz': 1,
-    'rpz testing': 2,
-    'reduced pressure zone': 1,
-    'reduced pressure': 1,
-    'dcva': 1,
-    'double check valve': 1,
-    'double-check valve': 1,
-    'pvb': 1,
-    'pressure vacuum breaker': 1,
-
-    # Context terms (lower value)
-    'backflow': 1,
-    'back flow': 1,
-    'irrigation backflow': 2,
-    'sprinkler backflow': 2,
-    'test report': 1,
-    'annual test': 1,
-}
-
-TESTING_TIER_TERMS = {
-    'backflow testing', 'backflow tester', 'backflow test',
-    'rpz testing', 'backflow inspection', 'backflow certification',
-    'backflow certified', 'annual backflow test', 'test report',
-    'cross connection control',
-}
-
-TIER_TESTING_DEFAULT = 4
-TIER_SERVICE_DEFAULT = 2
+# Google Maps fields scored before any crawl, with the same term weights. The business
+# name is left out: "X Backflow Testing" would clear the bar on its name alone
+MAPS_FIELDS = ['category', 'subtypes', 'description', 'about', 'reviews_tags']
 
 # ── Service tag extraction ────────────────────────────────────────────────────
 
@@ -163,11 +152,15 @@ SERVICE_TAG_TRIGGERS = {
     ],
 }
 
-# Booking link indicators
-BOOKING_INDICATORS = [
-    'book', 'quote', 'schedule', 'appointment',
-    'contact', 'request', 'estimate', 'get-started',
-]
+# Single-pass matcher over BACKFLOW_TERMS + SERVICE_TAG_TRIGGERS
+TERM_MATCHER = TermMatcher(BACKFLOW_TERMS, SERVICE_TAG_TRIGGERS, max_score=MAX_SCORE)
+
+# Markdown scanned per page; anything past this (inline scripts, giant footers) is dropped
+MAX_PAGE_TEXT_CHARS = 100_000
+
+# Extraction settings; part of the page cache key so other crawlers' text is never reused
+CRAWL_WORD_THRESHOLD = 10
+CACHE_VARIANT = page_variant("text", CRAWL_WORD_THRESHOLD)
 
 # Service page indicators for internal link discovery
 SERVICE_PAGE_INDICATORS = {
@@ -177,11 +170,29 @@ SERVICE_PAGE_INDICATORS = {
 }
 
 
+# Worker processes restarted this many times each before the launcher gives up on them
+MAX_WORKER_RESTARTS = 3
+# Launcher arguments that are not passed on to workers through the queue
+LAUNCHER_ONLY_ARGS = {'workers', 'worker_id', 'resume', 'reverify'}
+
+# Columns added by verify_and_enrich() (output CSVs = input columns + these)
+RESULT_COLUMNS = [
+    'place_id', 'name', 'website',
+    'backflow_score', 'backflow_hits', 'verified_at',
+    'crawl_status', 'crawl_error', 'pages_crawled',
+    'matched_on', 'stopped_early', 'best_evidence_url', 'tier',
+    'service_tags', 'service_area_text', 'description_snippet', 'booking_url',
+    'content_hash',
+]
+
+REPORT_COLUMNS = {'place_id', 'crawl_status', 'tier', 'service_tags', 'city'}
+
+
 # ── Helper functions ──────────────────────────────────────────────────────────
 
-def setup_logging():
+def setup_logging(log_file: Path = LOG_FILE, console: bool = True):
     """Configure logging."""
-    DATA_DIR.mkdir(exist_ok=True)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
 
     logger = logging.getLogger("03_verify")
     logger.setLevel(logging.INFO)
@@ -189,7 +200,7 @@ def setup_logging():
     if logger.handlers:
         return logger
 
-    fh = logging.FileHandler(LOG_FILE)
+    fh = logging.FileHandler(log_file)
     fh.setLevel(logging.INFO)
     formatter = logging.Formatter(
         '%(asctime)s - %(levelname)s - %(message)s',
@@ -202,7 +213,8 @@ def setup_logging():
     ch.setFormatter(formatter)
 
     logger.addHandler(fh)
-    logger.addHandler(ch)
+    if console:
+        logger.addHandler(ch)
 
     return logger
 
@@ -252,37 +264,25 @@ def is_same_domain(url1: str, url2: str) -> bool:
     return d1 and d2 and d1 == d2
 
 
+def scan_page(text: str) -> TermScan:
+    """Scan one page for backflow term hits and service tags in a single pass."""
+    return TERM_MATCHER.scan(text)
+
+
 def score_text(text: str, logger: logging.Logger) -> Tuple[int, List[str]]:
     """Score text for backflow relevance. Returns (score, matched_terms)."""
-    if not text:
-        return 0, []
+    scan = scan_page(text)
+    return scan.score, scan.matched_terms
 
-    text_lower = text.lower()
-    matched_terms = []
-    score = 0
 
-    for term, weight in BACKFLOW_TERMS.items():
-        if term in text_lower:
-            matched_terms.append(term)
-            score += weight
-
-    score = min(10, score)
-    return score, list(set(matched_terms))
+def ordered_service_tags(tags: Set[str]) -> List[str]:
+    """Canonical service tags in SERVICE_TAG_TRIGGERS order."""
+    return [tag for tag in SERVICE_TAG_TRIGGERS if tag in tags]
 
 
 def extract_service_tags(text: str) -> List[str]:
     """Extract canonical service tags from crawled text."""
-    if not text:
-        return []
-
-    text_lower = text.lower()
-    tags = []
-
-    for tag, triggers in SERVICE_TAG_TRIGGERS.items():
-        if any(trigger in text_lower for trigger in triggers):
-            tags.append(tag)
-
-    return tags
+    return ordered_service_tags(scan_page(text).tags)
 
 
 def extract_service_area(text: str) -> Optional[str]:
@@ -309,8 +309,8 @@ def extract_service_area(text: str) -> Optional[str]:
     return None
 
 
-def extract_description(text: str) -> Optional[str]:
-    """Extract a description snippet from crawled text."""
+def match_description(text: str) -> Optional[str]:
+    """Description snippet from an about/welcome section, if the text has one."""
     if not text:
         return None
 
@@ -333,77 +333,51 @@ def extract_description(text: str) -> Optional[str]:
                     desc = desc[:200].rsplit(' ', 1)[0] + '...'
             return desc
 
-    # Fallback: use first meaningful paragraph
-    lines = [l.strip() for l in text.split('\n') if len(l.strip()) > 50]
-    if lines:
-        desc = lines[0][:200]
-        if len(desc) == 200:
-            desc = desc.rsplit(' ', 1)[0] + '...'
-        return desc
-
     return None
 
 
-def extract_booking_url(html: str, base_url: str) -> Optional[str]:
-    """Extract booking/quote URL from HTML."""
-    if not html:
+def fallback_description(text: str) -> Optional[str]:
+    """First meaningful paragraph, used when no page has an about section."""
+    if not text:
         return None
-
-    try:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
-    except:
+    line = next((l.strip() for l in text.split('\n') if len(l.strip()) > 50), None)
+    if line is None:
         return None
+    desc = line[:200]
+    if len(desc) == 200:
+        desc = desc.rsplit(' ', 1)[0] + '...'
+    return desc
 
-    for a in soup.find_all('a', href=True):
-        href = a['href'].lower()
-        anchor = a.get_text(strip=True).lower()
 
-        # Check if link or anchor text contains booking indicators
-        combined = href + ' ' + anchor
-        if any(ind in combined for ind in BOOKING_INDICATORS):
-            try:
-                abs_url = urljoin(base_url, a['href'])
-                # Only return same-domain or well-known booking URLs
-                if is_same_domain(abs_url, base_url) or any(
-                    d in abs_url for d in ['calendly.com', 'acuityscheduling.com', 'square.site']
-                ):
-                    return abs_url
-            except:
-                continue
+def extract_description(text: str) -> Optional[str]:
+    """Extract a description snippet from crawled text."""
+    return match_description(text) or fallback_description(text)
 
+
+def extract_booking_url(pages: List[PageRecord], base_url: str) -> Optional[str]:
+    """Return the first booking/quote URL found across crawled pages."""
+    base_domain = extract_domain(base_url)
+    for page in pages:
+        for url in page.booking_urls:
+            # Only same-domain as the listed website, or well-known booking hosts
+            if extract_domain(url) == base_domain or any(d in url for d in BOOKING_DOMAINS):
+                return url
     return None
 
 
 def extract_internal_links(
-    html: str,
+    page: PageRecord,
     base_url: str,
     max_links: int = 10
 ) -> List[Tuple[str, str]]:
     """Extract internal links that might be service pages."""
-    try:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
-    except:
-        return []
-
     links = []
-    base_domain = extract_domain(base_url)
-
-    for a in soup.find_all('a', href=True):
-        href = a['href']
-        anchor = a.get_text(strip=True).lower()
-
-        try:
-            abs_url = urljoin(base_url, href)
-        except:
-            continue
 
-        if not is_same_domain(base_url, abs_url):
-            continue
+    for abs_url, anchor in page.same_site_links(base_url):
         if abs_url.rstrip('/') == base_url.rstrip('/'):
             continue
 
+        anchor = anchor.lower()
         url_lower = abs_url.lower()
         relevance_score = 0
 
@@ -420,47 +394,32 @@ def extract_internal_links(
     return [(url, anchor) for url, anchor, _ in links[:max_links]]
 
 
-# ── Crawling ──────────────────────────────────────────────────────────────────
-
-async def crawl_url(
-    crawler: AsyncWebCrawler,
-    url: str,
-    timeout: int,
-    logger: logging.Logger
-) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
-    """Crawl a single URL. Returns (success, text, html, error_msg)."""
-    try:
-        result = await crawler.arun(
-            url=url,
-            bypass_cache=True,
-            word_count_threshold=10,
-            page_timeout=timeout * 1000,
-        )
+async def discover_internal_links(
+    discovery: SiteDiscovery,
+    base_url: str,
+    anchor_links: List[Tuple[str, str]],
+    max_links: int,
+) -> List[Tuple[str, str]]:
+    """Sitemap candidates first, then homepage anchors; robots-disallowed URLs dropped."""
+    found = await discovery.discover(base_url)
+    candidates = [(url, '(sitemap)') for url in found.ranked(limit=max_links)] + anchor_links
 
-        if result.success:
-            text = result.markdown or result.cleaned_html or ""
-            html = result.html or ""
-            return True, text, html, None
-        else:
-            return False, None, None, result.error_message or "Unknown error"
+    links = []
+    seen = {base_url.rstrip('/')}
+    for url, anchor in candidates:
+        key = url.rstrip('/')
+        if key in seen or not is_same_domain(url, base_url) or not discovery.allowed(url):
+            continue
+        seen.add(key)
+        links.append((url, anchor))
+    return links[:max_links]
 
-    except asyncio.TimeoutError:
-        return False, None, None, "Timeout"
-    except Exception as e:
-        return False, None, None, str(e)
 
+# ── Maps pre-check ────────────────────────────────────────────────────────────
 
-async def verify_and_enrich(
-    row: pd.Series,
-    crawler: AsyncWebCrawler,
-    max_pages: int,
-    threshold: int,
-    testing_threshold: int,
-    timeout: int,
-    logger: logging.Logger
-) -> Dict:
-    """Verify a business website and extract enrichment data."""
-    result = {
+def new_result(row: pd.Series) -> Dict:
+    """Empty verifier result for a row."""
+    return {
         'place_id': row.get('place_id', ''),
         'name': row.get('name', ''),
         'website': row.get('website', ''),
@@ -471,6 +430,8 @@ async def verify_and_enrich(
         'crawl_error': '',
         'pages_crawled': 0,
         'matched_on': '',
+        # Verified before every candidate page was scanned (03_rescore_terms.py can't reject these)
+        'stopped_early': False,
         'best_evidence_url': '',
         'tier': 'none',
         # Enrichment fields
@@ -478,24 +439,215 @@ async def verify_and_enrich(
         'service_area_text': None,
         'description_snippet': None,
         'booking_url': None,
+        'content_hash': '',
     }
 
+
+def maps_text(row: pd.Series) -> str:
+    """Google Maps fields joined one per line (so phrases never span two fields)."""
+    values = (row.get(f) for f in MAPS_FIELDS)
+    return '\n'.join(v for v in values if isinstance(v, str) and v.strip())
+
+
+def maps_term_hits(row: pd.Series, scan: TermScan) -> List[Tuple[str, str, Dict[str, int]]]:
+    """Maps-field term hits in the stored term hits format."""
+    link = row.get('location_link')
+    return [(link if isinstance(link, str) else '', 'maps', dict(scan.hits))]
+
+
+def verify_from_maps(
+    row: pd.Series,
+    scan: TermScan,
+    confidence: int,
+    threshold: int,
+    testing_threshold: int,
+) -> Optional[Dict]:
+    """Verify and tier from Google Maps fields alone when they are decisive.
+
+    Returns None (crawl the website) unless the Maps score reaches confidence.
+    """
+    if not confidence:
+        return None
+    if scan.score < max(confidence, threshold):
+        return None
+
+    result = new_result(row)
+    result['backflow_score'] = scan.score
+    result['backflow_hits'] = '|'.join(scan.matched_terms)
+    result['matched_on'] = 'MAPS_DATA'
+    result['stopped_early'] = True
+    result['best_evidence_url'] = row.get('location_link') if isinstance(row.get('location_link'), str) else ''
+    result['tier'] = assign_tier(scan.score, scan.matched_terms, testing_threshold)
+    result['service_tags'] = '|'.join(ordered_service_tags(scan.tags))
+    result[TERM_HITS_KEY] = maps_term_hits(row, scan)
+
+    description = row.get('description')
+    if isinstance(description, str) and description.strip():
+        result['description_snippet'] = description.strip()[:200]
+    booking = row.get('booking_appointment_link')
+    if isinstance(booking, str) and booking.startswith(('http://', 'https://')):
+        result['booking_url'] = booking
+    return result
+
+
+# ── Per-page evidence ─────────────────────────────────────────────────────────
+
+@dataclass
+class PageEvidence:
+    """What one crawled page contributes to a site's result (no page text kept)."""
+    url: str
+    scan: TermScan
+    service_area: Optional[str] = None
+    description: Optional[str] = None
+    description_fallback: Optional[str] = None
+    booking_url: Optional[str] = None
+
+
+@dataclass
+class SiteEvidence:
+    """Per-site accumulators, folded one page at a time in crawl order."""
+    matched_terms: Set[str] = field(default_factory=set)
+    tags: Set[str] = field(default_factory=set)
+    service_area: Optional[str] = None
+    description: Optional[str] = None
+    description_fallback: Optional[str] = None
+    booking_url: Optional[str] = None
+    # (url, kind, {term: count}) for every page with hits, for data/term_hits.npz
+    term_hits: List[Tuple[str, str, Dict[str, int]]] = field(default_factory=list)
+
+    def add(self, page: PageEvidence, kind: str = 'internal'):
+        if page.scan.hits:
+            self.term_hits.append((page.url, kind, dict(page.scan.hits)))
+        self.matched_terms.update(page.scan.hits)
+        self.tags.update(page.scan.tags)
+        self.service_area = self.service_area or page.service_area
+        self.description = self.description or page.description
+        self.description_fallback = self.description_fallback or page.description_fallback
+        self.booking_url = self.booking_url or page.booking_url
+
+    def enrich(self, result: Dict):
+        result['service_tags'] = '|'.join(ordered_service_tags(self.tags))
+        result['service_area_text'] = self.service_area
+        result['description_snippet'] = self.description or self.description_fallback
+        result['booking_url'] = self.booking_url
+
+
+def page_evidence(url: str, text: Optional[str], page: PageRecord, website: str) -> PageEvidence:
+    """Score one page and pull its enrichment candidates from capped text."""
+    text = (text or "")[:MAX_PAGE_TEXT_CHARS]
+    return PageEvidence(
+        url=url,
+        scan=scan_page(text),
+        service_area=extract_service_area(text),
+        description=match_description(text),
+        description_fallback=fallback_description(text),
+        booking_url=extract_booking_url([page], website),
+    )
+
+
+# ── Crawling ──────────────────────────────────────────────────────────────────
+
+async def crawl_url(
+    crawler: AsyncWebCrawler,
+    url: str,
+    timeout: int,
+    logger: logging.Logger,
+    page_cache: Optional[PageCache] = None,
+    health: Optional[DomainHealth] = None,
+    homepage: bool = True,
+) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
+    """Crawl a single URL (through the page cache if given). Returns (success, text, html, error_msg).
+
+    Only homepage failures count towards the domain's circuit breaker.
+    """
+    error: Optional[str] = None
+    crawl_seconds: Optional[float] = None
+
+    if page_cache is not None:
+        # A fresh cached page needs no network, so serve it even if the domain is down now
+        cached = page_cache.lookup(url, CACHE_VARIANT)
+        if cached is not None:
+            return True, cached.text, cached.html, None
+
+    if health is not None:
+        # Dead / NXDOMAIN domains fail fast; known domains get a timeout from their history
+        blocked = await health.precheck(url)
+        if blocked:
+            return False, None, None, blocked
+        timeout = health.timeout_for(url, timeout)
+
+    async def _crawl() -> Optional[CrawledPage]:
+        nonlocal error, crawl_seconds
+        started = time.monotonic()
+        try:
+            result = await crawler.arun(
+                url=url,
+                bypass_cache=True,
+                word_count_threshold=CRAWL_WORD_THRESHOLD,
+                page_timeout=int(timeout * 1000),
+            )
+            crawl_seconds = time.monotonic() - started
+
+            if result.success:
+                text = result.markdown or result.cleaned_html or ""
+                html = result.html or ""
+                headers = getattr(result, 'response_headers', None)
+                return CrawledPage(html=html, text=text, headers=headers)
+            error = result.error_message or "Unknown error"
+
+        except asyncio.TimeoutError:
+            error = "Timeout"
+        except Exception as e:
+            error = str(e)
+        return None
+
+    if page_cache is None:
+        page = await _crawl()
+    else:
+        page = await page_cache.fetch(url, _crawl, CACHE_VARIANT)
+
+    if health is not None:
+        if page is None:
+            health.record_failure(url, error, homepage=homepage)
+        else:
+            # Only live browser loads say anything about latency
+            health.record_success(url, crawl_seconds)
+
+    if page is None:
+        return False, None, None, error
+    return True, page.text, page.html, None
+
+
+async def verify_and_enrich(
+    row: pd.Series,
+    crawler: AsyncWebCrawler,
+    max_pages: int,
+    threshold: int,
+    testing_threshold: int,
+    timeout: int,
+    logger: logging.Logger,
+    page_cache: Optional[PageCache] = None,
+    page_concurrency: int = 3,
+    discovery: Optional[SiteDiscovery] = None,
+    health: Optional[DomainHealth] = None,
+) -> Dict:
+    """Verify a business website and extract enrichment data."""
+    result = new_result(row)
+
     website = normalize_url(row.get('website', ''))
 
     if not website:
         result['crawl_status'] = 'NO_WEBSITE'
         return result
 
-    all_matched_terms = set()
-    all_text = ""
-    all_html = ""
+    evidence = SiteEvidence()
     best_score = 0
     best_url = website
 
     # Pass 1: Crawl homepage
     logger.info(f"  Crawling homepage: {website}")
 
-    success, text, html, error = await crawl_url(crawler, website, timeout, logger)
+    success, text, html, error = await crawl_url(crawler, website, timeout, logger, page_cache, health)
 
     if not success:
         result['crawl_status'] = 'CRAWL_FAILED'
@@ -505,89 +657,115 @@ async def verify_and_enrich(
         return result
 
     result['pages_crawled'] = 1
-    all_text = text or ""
-    all_html = html or ""
+    result['content_hash'] = content_hash(text)
+    homepage = extract_page(html, website)
 
-    # Score homepage
-    score, matched = score_text(text, logger)
+    # Score homepage (term hits + service tags in one scan)
+    home_evidence = page_evidence(website, text, homepage, website)
+    evidence.add(home_evidence, kind='home')
+    result[TERM_HITS_KEY] = evidence.term_hits
+    score, matched = home_evidence.scan.score, home_evidence.scan.matched_terms
 
     if score > best_score:
         best_score = score
         best_url = website
 
-    all_matched_terms.update(matched)
-
     logger.info(f"    Homepage score: {score} (matches: {len(matched)})")
 
     # If homepage score meets threshold, we're verified
     if score >= threshold:
         result['backflow_score'] = score
-        result['backflow_hits'] = '|'.join(sorted(all_matched_terms))
+        result['backflow_hits'] = '|'.join(sorted(evidence.matched_terms))
         result['matched_on'] = 'HOMEPAGE'
+        result['stopped_early'] = True
         result['best_evidence_url'] = best_url
-        result['tier'] = assign_tier(score, list(all_matched_terms), testing_threshold)
+        result['tier'] = assign_tier(score, list(evidence.matched_terms), testing_threshold)
 
-        # Extract enrichment from homepage
-        result['service_tags'] = '|'.join(extract_service_tags(all_text))
-        result['service_area_text'] = extract_service_area(all_text)
-        result['description_snippet'] = extract_description(all_text)
-        result['booking_url'] = extract_booking_url(all_html, website)
+        # Enrichment from the homepage
+        evidence.enrich(result)
 
         logger.info(f"    Verified on homepage (score: {score}, tier: {result['tier']})")
         return result
 
     # Pass 2: Crawl internal pages if needed
-    if max_pages > 1 and html:
+    if max_pages > 1 and (homepage.links or discovery is not None):
         logger.info(f"    Homepage insufficient (score: {score}), crawling internal pages...")
 
-        internal_links = extract_internal_links(html, website, max_links=max_pages - 1)
+        internal_links = extract_internal_links(homepage, website, max_links=max_pages - 1)
+        if discovery is not None:
+            internal_links = await discover_internal_links(
+                discovery, website, internal_links, max_links=max_pages - 1
+            )
 
         if internal_links:
             logger.info(f"    Found {len(internal_links)} potential service pages")
 
-            for i, (url, anchor) in enumerate(internal_links[:max_pages - 1]):
-                logger.info(f"      [{i+1}] {url} ('{anchor[:50]}')")
+            # Fetch up to page_concurrency pages at once; score each as it lands
+            semaphore = asyncio.Semaphore(max(1, page_concurrency))
+
+            async def _fetch(i: int, url: str, anchor: str):
+                async with semaphore:
+                    if discovery is not None:
+                        await discovery.throttle(url)
+                    logger.info(f"      [{i+1}] {url} ('{anchor[:50]}')")
+                    blocked = health.check(url) if health is not None else None
+                    if blocked:
+                        return i, url, (False, None, None, blocked)
+                    return i, url, await crawl_url(
+                        crawler, url, timeout, logger, page_cache, health, homepage=False
+                    )
+
+            tasks = [
+                asyncio.create_task(_fetch(i, url, anchor))
+                for i, (url, anchor) in enumerate(internal_links[:max_pages - 1])
+            ]
+            fetched: Dict[int, PageEvidence] = {}
 
-                success, page_text, page_html, error = await crawl_url(crawler, url, timeout, logger)
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    i, url, (success, page_text, page_html, error) = await next_done
 
-                if not success:
-                    logger.warning(f"        Failed: {error}")
-                    continue
+                    if not success:
+                        logger.warning(f"        Failed: {url}: {error}")
+                        continue
 
-                result['pages_crawled'] += 1
+                    result['pages_crawled'] += 1
 
-                if page_text:
-                    all_text += "\n" + page_text
-                if page_html:
-                    all_html += "\n" + page_html
+                    fetched[i] = page_evidence(url, page_text, extract_page(page_html, url), website)
+                    page_score, page_matched = fetched[i].scan.score, fetched[i].scan.matched_terms
 
-                page_score, page_matched = score_text(page_text, logger)
+                    if page_score > 0:
+                        logger.info(f"        Score: {page_score} (matches: {len(page_matched)}) {url}")
 
-                if page_score > 0:
-                    all_matched_terms.update(page_matched)
-                    logger.info(f"        Score: {page_score} (matches: {len(page_matched)})")
+                        if page_score > best_score:
+                            best_score = page_score
+                            best_url = url
 
-                    if page_score > best_score:
-                        best_score = page_score
-                        best_url = url
+                    if best_score >= threshold * 2:
+                        pending = sum(1 for t in tasks if not t.done())
+                        logger.info(f"        Strong evidence found, cancelling {pending} pending page(s)")
+                        result['stopped_early'] = pending > 0
+                        break
+            finally:
+                pending = [t for t in tasks if not t.done()]
+                for t in pending:
+                    t.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
 
-                if best_score >= threshold * 2:
-                    logger.info(f"        Strong evidence found, stopping")
-                    break
+            # Fold pages back in link order so enrichment doesn't depend on timing
+            for i in sorted(fetched):
+                evidence.add(fetched[i])
 
         result['backflow_score'] = best_score
-        result['backflow_hits'] = '|'.join(sorted(all_matched_terms))
+        result['backflow_hits'] = '|'.join(sorted(evidence.matched_terms))
 
         if best_score >= threshold:
             result['matched_on'] = 'BOTH' if score > 0 else 'INTERNAL'
             result['best_evidence_url'] = best_url
-            result['tier'] = assign_tier(best_score, list(all_matched_terms), testing_threshold)
+            result['tier'] = assign_tier(best_score, list(evidence.matched_terms), testing_threshold)
 
-            # Extract enrichment from all crawled text
-            result['service_tags'] = '|'.join(extract_service_tags(all_text))
-            result['service_area_text'] = extract_service_area(all_text)
-            result['description_snippet'] = extract_description(all_text)
-            result['booking_url'] = extract_booking_url(all_html, website)
+            # Enrichment from every crawled page
+            evidence.enrich(result)
 
             logger.info(f"    Verified on internal pages (score: {best_score}, tier: {result['tier']})")
         else:
@@ -596,7 +774,7 @@ async def verify_and_enrich(
             logger.info(f"    No sufficient evidence (score: {best_score})")
     else:
         result['backflow_score'] = score
-        result['backflow_hits'] = '|'.join(sorted(all_matched_terms))
+        result['backflow_hits'] = '|'.join(sorted(evidence.matched_terms))
         result['crawl_status'] = 'NOT_RELEVANT'
         result['matched_on'] = 'HOMEPAGE'
         result['best_evidence_url'] = website
@@ -613,27 +791,68 @@ async def process_batch(
     threshold: int,
     testing_threshold: int,
     timeout: int,
-    logger: logging.Logger
+    logger: logging.Logger,
+    block_resources: bool = True,
+    block_scripts: bool = False,
+    page_cache: Optional[PageCache] = None,
+    page_concurrency: int = 3,
+    discovery: Optional[SiteDiscovery] = None,
+    shared: Optional[SharedCrawls] = None,
+    health: Optional[DomainHealth] = None,
+    maps_confidence: int = 0,
+    proxy: Optional[str] = None,
 ) -> List[Dict]:
     """Process a batch of websites."""
     logger.info(f"\nBatch {batch_num}: Processing {len(batch_df)} websites")
     results = []
 
-    async with AsyncWebCrawler(verbose=False) as crawler:
+    async with AsyncWebCrawler(verbose=False, **({'proxy': proxy} if proxy else {})) as crawler:
+        if block_resources:
+            install_resource_blocking(crawler, "text", block_third_party_scripts=block_scripts)
+
         for idx, row in batch_df.iterrows():
             name = row.get('name', 'Unknown')
             logger.info(f"\n[{idx}] {name}")
 
-            try:
-                result = await verify_and_enrich(
+            # Decisive Maps listing data: no browser needed
+            maps_scan = scan_page(maps_text(row))
+            maps_result = verify_from_maps(row, maps_scan, maps_confidence, threshold, testing_threshold)
+            if maps_result is not None:
+                logger.info(f"  Verified from Maps data (score: {maps_result['backflow_score']}, "
+                            f"tier: {maps_result['tier']})")
+                results.append({**row.to_dict(), **maps_result})
+                continue
+
+            async def _verify(row=row) -> Dict:
+                return await verify_and_enrich(
                     row=row,
                     crawler=crawler,
                     max_pages=max_pages,
                     threshold=threshold,
                     testing_threshold=testing_threshold,
                     timeout=timeout,
-                    logger=logger
+                    logger=logger,
+                    page_cache=page_cache,
+                    page_concurrency=page_concurrency,
+                    discovery=discovery,
+                    health=health,
                 )
+
+            try:
+                if shared is None:
+                    result = await _verify()
+                else:
+                    # One crawl per domain (+ location path) per run, fanned out to every listing
+                    key = crawl_key(normalize_url(row.get('website', '')))
+                    site_result = await shared.get_or_crawl(key, _verify)
+                    result = {
+                        **site_result,
+                        'place_id': row.get('place_id', ''),
+                        'name': row.get('name', ''),
+                        'website': row.get('website', ''),
+                    }
+                    if site_result.get('place_id') != result['place_id']:
+                        logger.info(f"  Reused crawl of {key} (from {site_result.get('name', '')})")
             except Exception as e:
                 logger.error(f"  Unexpected error for {name}: {e}")
                 result = {**row.to_dict()}
@@ -644,40 +863,175 @@ async def process_batch(
                 result['service_tags'] = ''
 
             full_result = {**row.to_dict(), **result}
+            # Keep the Maps hits too, so --maps-confidence can be rescored later
+            full_result[TERM_HITS_KEY] = maps_term_hits(row, maps_scan) + list(result.get(TERM_HITS_KEY) or [])
             results.append(full_result)
 
     return results
 
 
-def load_checkpoint(logger: logging.Logger) -> Dict:
+def new_checkpoint() -> Dict:
+    """Fresh checkpoint state."""
+    return {
+        'processed_count': 0,
+        'verified_count': 0,
+        'rejected_count': 0,
+        'testing_count': 0,
+        'service_count': 0,
+        # Byte size of each output CSV as of the last committed batch
+        'output_offsets': {'verified': 0, 'rejected': 0},
+    }
+
+
+def load_checkpoint(logger: logging.Logger, state_path: Path, outputs: Dict[str, Path]) -> Dict:
     """Load checkpoint state."""
-    if STATE_JSON.exists():
+    if state_path.exists():
         try:
-            with open(STATE_JSON, 'r') as f:
+            with open(state_path, 'r') as f:
                 state = json.load(f)
             logger.info(f"Loaded checkpoint: processed {state.get('processed_count', 0)} records")
-            return state
+            if 'output_offsets' not in state:
+                # Checkpoint from before streaming output: trust what is on disk
+                state['output_offsets'] = {
+                    key: path.stat().st_size if path.exists() else 0
+                    for key, path in outputs.items()
+                }
+            return {**new_checkpoint(), **state}
         except Exception as e:
             logger.warning(f"Failed to load checkpoint: {e}")
 
-    return {
-        'processed_count': 0,
-        'verified_count': 0,
-        'rejected_count': 0,
-        'last_processed_index': -1,
-        'processed_place_ids': []
-    }
+    return new_checkpoint()
 
 
-def save_checkpoint(state: Dict, logger: logging.Logger):
-    """Save checkpoint state."""
+def save_checkpoint(state: Dict, logger: logging.Logger, state_path: Path):
+    """Save checkpoint state atomically (write temp file, fsync, rename)."""
     try:
-        with open(STATE_JSON, 'w') as f:
+        tmp = state_path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
             json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(state_path)
     except Exception as e:
         logger.error(f"Failed to save checkpoint: {e}")
 
 
+# ── Streaming output ──────────────────────────────────────────────────────────
+
+def output_columns(input_df: pd.DataFrame, path: Path) -> List[str]:
+    """Column order for an output CSV: existing header if resuming, else input + result columns."""
+    if path.exists() and path.stat().st_size > 0:
+        return list(pd.read_csv(path, nrows=0).columns)
+    return list(input_df.columns) + [c for c in RESULT_COLUMNS if c not in input_df.columns]
+
+
+def append_results(rows: List[Dict], path: Path, columns: List[str]) -> int:
+    """Append rows to a CSV and fsync it. Returns the file size afterwards."""
+    if not rows:
+        return path.stat().st_size if path.exists() else 0
+    write_header = not path.exists() or path.stat().st_size == 0
+    with open(path, 'a', newline='') as f:
+        pd.DataFrame(rows).reindex(columns=columns).to_csv(f, header=write_header, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+def rollback_output(path: Path, offset: int, logger: logging.Logger):
+    """Drop anything appended after the last committed checkpoint."""
+    if path.exists() and path.stat().st_size > offset:
+        logger.info(f"  Rolling back {path.name} to last checkpoint ({offset:,} bytes)")
+        with open(path, 'r+b') as f:
+            f.truncate(offset)
+
+
+def processed_ids_from_output(paths: List[Path]) -> Set[str]:
+    """place_ids already written to the durable outputs."""
+    ids: Set[str] = set()
+    for path in paths:
+        if path.exists() and path.stat().st_size > 0:
+            for chunk in pd.read_csv(path, usecols=['place_id'], dtype=str, chunksize=50_000):
+                ids.update(chunk['place_id'].dropna())
+    return ids
+
+
+def read_report_columns(path: Path) -> pd.DataFrame:
+    """Load just the columns generate_report() uses from an output CSV."""
+    if not path.exists() or path.stat().st_size == 0:
+        return pd.DataFrame()
+    return pd.read_csv(path, usecols=lambda c: c in REPORT_COLUMNS, low_memory=False)
+
+
+# ── Re-verification ───────────────────────────────────────────────────────────
+
+def load_previous_results() -> pd.DataFrame:
+    """place_id, verified_at, tier, pages_crawled from the current outputs."""
+    wanted = {'place_id', 'verified_at', 'tier', 'pages_crawled'}
+    frames = [
+        pd.read_csv(path, usecols=lambda c: c in wanted, dtype={'place_id': str}, low_memory=False)
+        for path in (VERIFIED_CSV, REJECTED_CSV)
+        if path.exists() and path.stat().st_size > 0
+    ]
+    if not frames:
+        return pd.DataFrame(columns=sorted(wanted))
+    return pd.concat(frames, ignore_index=True)
+
+
+def select_for_reverify(df: pd.DataFrame, args, logger: logging.Logger) -> List[str]:
+    """Rank providers by staleness/churn/tier and take the slice that fits the page budget."""
+    df = df[df['website'].notna() & (df['website'] != '')]
+    ranked = rank_for_reverify(df, load_previous_results(), load_history(HISTORY_JSON))
+    selected = select_within_budget(ranked, args.budget_pages, args.max_pages)
+
+    never = int((selected['staleness_days'] >= NEVER_VERIFIED_AGE_DAYS).sum())
+    logger.info(
+        f"Re-verification: {len(selected):,} of {len(ranked):,} providers fit the budget "
+        f"({args.budget_pages or 'unlimited'} pages"
+        f"{f', {args.budget_minutes:g} min' if args.budget_minutes else ''})"
+    )
+    if len(selected):
+        logger.info(f"  Staleness: median {selected['staleness_days'].median():.1f} days, "
+                    f"{never:,} never verified")
+    return selected['place_id'].tolist()
+
+
+def read_output(path: Path) -> pd.DataFrame:
+    if path.exists() and path.stat().st_size > 0:
+        return pd.read_csv(path, dtype={'place_id': str}, low_memory=False)
+    return pd.DataFrame()
+
+
+def merge_into_outputs(fresh: Dict[str, pd.DataFrame], logger: logging.Logger, label: str):
+    """Replace the main outputs' rows for every place_id in fresh['verified'] / fresh['rejected']."""
+    ids = set()
+    for frame in fresh.values():
+        if 'place_id' in frame.columns:
+            ids.update(frame['place_id'].dropna())
+
+    for key, path in (('verified', VERIFIED_CSV), ('rejected', REJECTED_CSV)):
+        old = read_output(path)
+        if len(old):
+            old = old[~old['place_id'].isin(ids)]
+        merged = pd.concat([old, fresh[key]], ignore_index=True)
+        tmp = path.with_suffix('.tmp')
+        if len(merged.columns):
+            merged.to_csv(tmp, index=False)
+        else:
+            tmp.write_text('')   # nothing on either side; keep the file readable as "empty"
+        tmp.replace(path)
+        logger.info(f"  {path.name}: {len(fresh[key]):,} {label} rows merged ({len(merged):,} total)")
+
+
+def merge_reverified(logger: logging.Logger):
+    """Replace re-verified providers' rows in the main outputs, then drop the reverify files."""
+    fresh = {'verified': read_output(REVERIFY_VERIFIED_CSV), 'rejected': read_output(REVERIFY_REJECTED_CSV)}
+    merge_into_outputs(fresh, logger, 're-verified')
+
+    for path in (REVERIFY_VERIFIED_CSV, REVERIFY_REJECTED_CSV, REVERIFY_STATE_JSON):
+        if path.exists():
+            path.unlink()
+
+
 def generate_report(
     input_count: int,
     verified_df: pd.DataFrame,
@@ -759,8 +1113,54 @@ def generate_report(
     logger.info(f"  Report saved: {output_path}")
 
 
-async def main_async(args, logger):
-    """Main async execution."""
+def report_outputs(input_count: int, logger: logging.Logger):
+    """Log the output sizes and regenerate verifier_report.md from disk."""
+    verified_df = read_report_columns(VERIFIED_CSV)
+    rejected_df = read_report_columns(REJECTED_CSV)
+
+    if len(verified_df):
+        logger.info(f"Verified: {VERIFIED_CSV} ({len(verified_df):,} records)")
+    else:
+        logger.warning("No verified records!")
+    if len(rejected_df):
+        logger.info(f"Rejected: {REJECTED_CSV} ({len(rejected_df):,} records)")
+
+    if len(verified_df) or len(rejected_df):
+        generate_report(input_count, verified_df, rejected_df, REPORT_MD, logger)
+
+
+def open_crawl_resources(args) -> Dict:
+    """Page cache, sitemap discovery, shared crawls and domain health (None when switched off)."""
+    return {
+        'page_cache': None if args.no_page_cache else PageCache(
+            PAGE_CACHE_DB, ttl_hours=args.cache_ttl_hours, max_mb=args.cache_max_mb
+        ),
+        'discovery': None if args.no_sitemap else SiteDiscovery(DISCOVERY_JSON),
+        'shared': None if args.no_share_domains else SharedCrawls(),
+        # Behind --proxy the proxy resolves hostnames; local DNS says nothing about them
+        'health': None if args.no_domain_health else DomainHealth(
+            DOMAIN_HEALTH_JSON, dns_precheck=not args.proxy
+        ),
+    }
+
+
+async def close_crawl_resources(resources: Dict, logger: logging.Logger):
+    page_cache, discovery = resources['page_cache'], resources['discovery']
+    shared, health = resources['shared'], resources['health']
+    if page_cache is not None:
+        logger.info(page_cache.summary())
+        await page_cache.aclose()
+    if discovery is not None:
+        await discovery.aclose()
+    if shared is not None:
+        logger.info(shared.summary())
+    if health is not None:
+        health.save()
+        logger.info(health.summary())
+
+
+def load_input(args, logger: logging.Logger) -> Tuple[pd.DataFrame, int]:
+    """Input rows to verify (after --only-with-website) and the raw input count."""
     input_path = Path(args.input)
     if not input_path.exists():
         logger.error(f"Input file not found: {input_path}")
@@ -775,30 +1175,90 @@ async def main_async(args, logger):
     if args.only_with_website:
         df = df[df['website'].notna() & (df['website'] != '')]
         logger.info(f"Filtered to {len(df):,} records with websites")
+    return df, input_count
+
+
+def classify_results(results: List[Dict], threshold: int, state: Dict) -> Tuple[List[Dict], List[Dict]]:
+    """Split a batch into verified / rejected rows and update the checkpoint counters."""
+    verified_batch = []
+    rejected_batch = []
+    for result in results:
+        if result.get('crawl_status') == 'OK' and result.get('backflow_score', 0) >= threshold:
+            verified_batch.append(result)
+            state['verified_count'] += 1
+            tier = result.get('tier', 'service')
+            state['testing_count'] += 1 if tier == 'testing' else 0
+            state['service_count'] += 1 if tier == 'service' else 0
+        else:
+            rejected_batch.append(result)
+            state['rejected_count'] += 1
+
+        state['processed_count'] += 1
+    return verified_batch, rejected_batch
 
-    # Load checkpoint
-    state = {}
-    if args.resume:
-        state = load_checkpoint(logger)
-        processed_ids = set(state.get('processed_place_ids', []))
 
+async def main_async(args, logger):
+    """Main async execution."""
+    df, input_count = load_input(args, logger)
+
+    # Re-verification streams into its own files and merges them at the end
+    if args.reverify:
+        state_path = REVERIFY_STATE_JSON
+        outputs = {'verified': REVERIFY_VERIFIED_CSV, 'rejected': REVERIFY_REJECTED_CSV}
+    else:
+        state_path = STATE_JSON
+        outputs = {'verified': VERIFIED_CSV, 'rejected': REJECTED_CSV}
+
+    # Per-page term hits for 03_rescore_terms.py; re-verified places replace their rows
+    term_hits = TermHits(TERM_HITS_NPZ)
+
+    # Load checkpoint; outputs are only trusted up to the last committed batch
+    if args.resume and state_path.exists():
+        state = load_checkpoint(logger, state_path, outputs)
+        offsets = state['output_offsets']
+        for key, path in outputs.items():
+            rollback_output(path, offsets[key], logger)
+        processed_ids = processed_ids_from_output(list(outputs.values()))
+        processed_ids.update(state.get('processed_place_ids', []))
+        if not args.reverify:
+            # Hits are saved ahead of the checkpoint; drop any from rolled-back batches
+            term_hits.keep(processed_ids)
+
+        if 'reverify_selection' in state:
+            df = df[df['place_id'].astype(str).isin(set(state['reverify_selection']))]
         if processed_ids:
-            df = df[~df['place_id'].isin(processed_ids)]
-            logger.info(f"Resuming: {len(df):,} records remaining")
+            df = df[~df['place_id'].astype(str).isin(processed_ids)]
+            logger.info(f"Resuming: {len(processed_ids):,} already written, {len(df):,} records remaining")
     else:
-        state = {
-            'processed_count': 0,
-            'verified_count': 0,
-            'rejected_count': 0,
-            'processed_place_ids': []
-        }
+        state = new_checkpoint()
+        for path in outputs.values():
+            if path.exists():
+                path.unlink()
+        if not args.reverify:
+            term_hits.clear()
+        if args.reverify:
+            state['reverify_selection'] = select_for_reverify(df, args, logger)
+            df = df[df['place_id'].astype(str).isin(set(state['reverify_selection']))]
+        save_checkpoint(state, logger, state_path)
+
+    if args.reverify and 'reverify_selection' in state:
+        # Highest priority first
+        order = {pid: i for i, pid in enumerate(state['reverify_selection'])}
+        df = df.iloc[df['place_id'].astype(str).map(order).argsort(kind='stable')]
 
     if len(df) == 0:
         logger.info("No records to process!")
+        if args.reverify:
+            merge_reverified(logger)
         return
 
-    verified_results = []
-    rejected_results = []
+    verified_columns = output_columns(df, outputs['verified'])
+    rejected_columns = output_columns(df, outputs['rejected'])
+    history = load_history(HISTORY_JSON)
+    started = time.monotonic()
+
+    resources = open_crawl_resources(args)
+    health = resources['health']
 
     total_batches = (len(df) + args.batch_size - 1) // args.batch_size
 
@@ -809,12 +1269,21 @@ async def main_async(args, logger):
     logger.info(f"Total records: {len(df):,}")
     logger.info(f"Batch size: {args.batch_size}")
     logger.info(f"Max pages per site: {args.max_pages}")
+    logger.info(f"Concurrent pages per site: {args.page_concurrency}")
     logger.info(f"Score threshold: {args.threshold}")
     logger.info(f"Testing tier threshold: {args.testing_threshold}")
+    logger.info(f"Maps data confidence: {args.maps_confidence or 'off'}")
+    logger.info(f"Resource blocking: {'off' if args.no_block_resources else 'on (text profile)'}"
+                f"{' + third-party scripts' if args.block_third_party_scripts and not args.no_block_resources else ''}")
     logger.info(f"Total batches: {total_batches}")
     logger.info("=" * 70)
 
     for i in range(0, len(df), args.batch_size):
+        if args.budget_minutes and time.monotonic() - started >= args.budget_minutes * 60:
+            logger.info(f"\nTime budget of {args.budget_minutes:g} min reached, "
+                        f"{len(df) - i:,} records left for the next cycle")
+            break
+
         batch_df = df.iloc[i:i + args.batch_size]
         batch_num = i // args.batch_size + 1
 
@@ -825,24 +1294,30 @@ async def main_async(args, logger):
             threshold=args.threshold,
             testing_threshold=args.testing_threshold,
             timeout=args.timeout,
-            logger=logger
+            logger=logger,
+            block_resources=not args.no_block_resources,
+            block_scripts=args.block_third_party_scripts,
+            page_concurrency=args.page_concurrency,
+            maps_confidence=args.maps_confidence,
+            proxy=args.proxy,
+            **resources,
         )
 
-        for result in batch_results:
-            if result.get('crawl_status') == 'OK' and result.get('backflow_score', 0) >= args.threshold:
-                verified_results.append(result)
-                state['verified_count'] += 1
-                tier = result.get('tier', 'service')
-                state['testing_count'] = state.get('testing_count', 0) + (1 if tier == 'testing' else 0)
-                state['service_count'] = state.get('service_count', 0) + (1 if tier == 'service' else 0)
-            else:
-                rejected_results.append(result)
-                state['rejected_count'] += 1
+        verified_batch, rejected_batch = classify_results(batch_results, args.threshold, state)
 
-            state['processed_count'] += 1
-            state['processed_place_ids'].append(result.get('place_id', ''))
+        # Commit: results hit disk first, then the checkpoint that points at them
+        state['output_offsets'] = {
+            'verified': append_results(verified_batch, outputs['verified'], verified_columns),
+            'rejected': append_results(rejected_batch, outputs['rejected'], rejected_columns),
+        }
+        term_hits.record(batch_results)
+        term_hits.save()
+        save_checkpoint(state, logger, state_path)
+        if health is not None:
+            health.save()
 
-        save_checkpoint(state, logger)
+        record_checks(history, batch_results)
+        save_history(history, HISTORY_JSON)
 
         logger.info(f"\nBatch {batch_num}/{total_batches} complete")
         logger.info(f"  Verified so far: {state['verified_count']:,}"
@@ -853,28 +1328,19 @@ async def main_async(args, logger):
         if i + args.batch_size < len(df):
             await asyncio.sleep(args.sleep)
 
-    # Save results
+    await close_crawl_resources(resources, logger)
+    term_hits.save(compact=True)
+    logger.info(term_hits.summary())
+
+    # Results are already on disk; read back only what the report needs
     logger.info("\n" + "=" * 70)
     logger.info("SAVING RESULTS")
     logger.info("=" * 70)
 
-    if verified_results:
-        verified_df = pd.DataFrame(verified_results)
-        verified_df.to_csv(VERIFIED_CSV, index=False)
-        logger.info(f"Verified: {VERIFIED_CSV} ({len(verified_results):,} records)")
-    else:
-        logger.warning("No verified records!")
-        verified_df = pd.DataFrame()
+    if args.reverify:
+        merge_reverified(logger)
 
-    if rejected_results:
-        rejected_df = pd.DataFrame(rejected_results)
-        rejected_df.to_csv(REJECTED_CSV, index=False)
-        logger.info(f"Rejected: {REJECTED_CSV} ({len(rejected_results):,} records)")
-    else:
-        rejected_df = pd.DataFrame()
-
-    if verified_results or rejected_results:
-        generate_report(input_count, verified_df, rejected_df, REPORT_MD, logger)
+    report_outputs(input_count, logger)
 
     # Final summary
     total = state['processed_count']
@@ -888,6 +1354,235 @@ async def main_async(args, logger):
     logger.info(f"Rejected:          {state['rejected_count']:,} ({state['rejected_count']/max(total,1)*100:.1f}%)")
     logger.info("=" * 70)
 
+# ── Sharded workers ───────────────────────────────────────────────────────────
+
+def shard_paths(worker: str) -> Dict[str, Path]:
+    """Per-worker outputs under data/shards/."""
+    return {
+        'verified': SHARD_DIR / f"verified.{worker}.csv",
+        'rejected': SHARD_DIR / f"rejected.{worker}.csv",
+        'term_hits': SHARD_DIR / f"term_hits.{worker}.npz",
+        'log': SHARD_DIR / f"verifier.{worker}.log",
+    }
+
+
+async def run_worker(args, logger: logging.Logger):
+    """Claim batches from the work queue until it is drained; results go to this worker's shard."""
+    worker = args.worker_id
+    queue = WorkQueue(QUEUE_DB)
+    queue.release(worker)   # leases left by an earlier process with this id are dead
+    args = argparse.Namespace(**{**vars(args), **queue.settings()})
+
+    df, _ = load_input(args, logger)
+    df = df.assign(place_id=df['place_id'].astype(str))
+    shards = shard_paths(worker)
+
+    # Shards are only trusted up to the last batch the queue marked done; a worker
+    # killed mid-append leaves a partial row behind that read_output() would choke on
+    offsets = queue.offsets(worker)
+    for key in ('verified', 'rejected'):
+        rollback_output(shards[key], offsets.get(key, 0), logger)
+
+    verified_columns = output_columns(df, shards['verified'])
+    rejected_columns = output_columns(df, shards['rejected'])
+    term_hits = TermHits(shards['term_hits'])
+    term_hits.keep(set(queue.ids('done', worker)))
+    resources = open_crawl_resources(args)
+    health = resources['health']
+    state = new_checkpoint()
+
+    async def _heartbeat():
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            queue.heartbeat(worker)
+
+    heartbeat = asyncio.create_task(_heartbeat())
+    batch_num = 0
+    clean = False
+    try:
+        while True:
+            ids = queue.claim(worker, args.batch_size)
+            if not ids:
+                if not queue.remaining():
+                    break
+                # Other workers still hold leases; wait in case they expire
+                await asyncio.sleep(HEARTBEAT_SECONDS)
+                continue
+
+            batch_num += 1
+            batch_results = await process_batch(
+                batch_df=df[df['place_id'].isin(set(ids))],
+                batch_num=batch_num,
+                max_pages=args.max_pages,
+                threshold=args.threshold,
+                testing_threshold=args.testing_threshold,
+                timeout=args.timeout,
+                logger=logger,
+                block_resources=not args.no_block_resources,
+                block_scripts=args.block_third_party_scripts,
+                page_concurrency=args.page_concurrency,
+                maps_confidence=args.maps_confidence,
+                proxy=args.proxy,
+                **resources,
+            )
+            verified_batch, rejected_batch = classify_results(batch_results, args.threshold, state)
+
+            # Results hit the shard before the queue hears they are done
+            offsets = {
+                'verified': append_results(verified_batch, shards['verified'], verified_columns),
+                'rejected': append_results(rejected_batch, shards['rejected'], rejected_columns),
+            }
+            term_hits.record(batch_results)
+            term_hits.save()
+            if health is not None:
+                health.save()
+            queue.complete(worker, ids, offsets)
+
+            logger.info(f"\n[{worker}] batch {batch_num} complete: {state['verified_count']:,} verified, "
+                        f"{state['rejected_count']:,} rejected so far; {queue.summary()}")
+            await asyncio.sleep(args.sleep)
+        term_hits.save(compact=True)
+        clean = True
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        # Stopped by the launcher (SIGINT); the batch in hand did not fail
+        clean = True
+        raise
+    finally:
+        heartbeat.cancel()
+        queue.release(worker, clean=clean)
+        queue.close()
+        await close_crawl_resources(resources, logger)
+
+
+def merge_shards(logger: logging.Logger) -> int:
+    """Fold every worker shard into the main outputs, term hits and change history."""
+    frames = []
+    for key in ('verified', 'rejected'):
+        for path in sorted(SHARD_DIR.glob(f"{key}.*.csv")):
+            frame = read_output(path)
+            if len(frame):
+                frames.append(frame.assign(_output=key))
+    if not frames:
+        logger.info("  No shard results to merge")
+        return 0
+
+    # A place re-queued after a worker died mid-batch can appear twice; keep the latest
+    rows = pd.concat(frames, ignore_index=True)
+    rows = rows.sort_values('verified_at', kind='stable', na_position='first').drop_duplicates('place_id', keep='last')
+    fresh = {key: rows[rows['_output'] == key].drop(columns='_output') for key in ('verified', 'rejected')}
+    merge_into_outputs(fresh, logger, 'sharded')
+
+    term_hits = TermHits(TERM_HITS_NPZ)
+    for path in sorted(SHARD_DIR.glob("term_hits.*.npz")):
+        term_hits.update(TermHits(path))
+    term_hits.save(compact=True)
+    logger.info(f"  {term_hits.summary()}")
+
+    history = load_history(HISTORY_JSON)
+    record_checks(history, rows.to_dict('records'))
+    save_history(history, HISTORY_JSON)
+    return len(rows)
+
+
+def clear_shards():
+    """Remove shard data and the work queue; worker logs are kept."""
+    for path in SHARD_DIR.glob("*"):
+        if path.suffix != '.log':
+            path.unlink()
+    for suffix in ('', '-wal', '-shm'):
+        path = Path(f"{QUEUE_DB}{suffix}")
+        if path.exists():
+            path.unlink()
+
+
+def spawn_worker(worker: str) -> subprocess.Popen:
+    # Crawler output and crash tracebacks land in the worker's log next to its own records
+    with open(shard_paths(worker)['log'], 'a') as log:
+        return subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), '--worker-id', worker],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def run_sharded(args, logger: logging.Logger):
+    """Launch args.workers verifier processes over a shared work queue, then merge their shards."""
+    if args.reverify:
+        logger.error("--workers does not support --reverify yet; run re-verification single-process")
+        sys.exit(1)
+
+    df, input_count = load_input(args, logger)
+    SHARD_DIR.mkdir(parents=True, exist_ok=True)
+
+    if not args.resume:
+        # Same as a fresh single-process run: start from empty outputs
+        clear_shards()
+        for path in (VERIFIED_CSV, REJECTED_CSV, STATE_JSON):
+            if path.exists():
+                path.unlink()
+        term_hits = TermHits(TERM_HITS_NPZ)
+        term_hits.clear()
+        term_hits.save()
+    queue = WorkQueue(QUEUE_DB)
+    if not args.resume:
+        # Listings that share a website sit next to each other, so one worker crawls the site once
+        keys = df['website'].map(lambda w: crawl_key(normalize_url(w)) if isinstance(w, str) else None)
+        order = df.assign(_key=keys.fillna('')).sort_values('_key', kind='stable')
+        queued = queue.populate(order['place_id'].astype(str).drop_duplicates())
+        queue.save_settings({k: v for k, v in vars(args).items() if k not in LAUNCHER_ONLY_ARGS})
+        logger.info(f"Queued {queued:,} providers for {args.workers} workers")
+    else:
+        logger.info(f"Resuming sharded run: {queue.summary()}")
+
+    workers = {f"w{i + 1}": spawn_worker(f"w{i + 1}") for i in range(args.workers)}
+    restarts: Counter = Counter()
+    logger.info(f"Started {len(workers)} workers (logs: {SHARD_DIR}/verifier.w*.log)")
+
+    try:
+        while workers:
+            time.sleep(HEARTBEAT_SECONDS)
+            logger.info(queue.summary())
+            for worker, proc in list(workers.items()):
+                code = proc.poll()
+                if code is None:
+                    continue
+                del workers[worker]
+                if code != 0 and queue.remaining() and restarts[worker] < MAX_WORKER_RESTARTS:
+                    # Its leases expire and go back to the queue; the replacement picks up from there
+                    restarts[worker] += 1
+                    logger.warning(f"Worker {worker} exited with {code}; restarting ({restarts[worker]})")
+                    workers[worker] = spawn_worker(worker)
+                elif code != 0:
+                    logger.warning(f"Worker {worker} exited with {code}")
+    except KeyboardInterrupt:
+        logger.info("Interrupted; stopping workers (their leases go back to the queue)")
+        for proc in workers.values():
+            proc.send_signal(signal.SIGINT)
+        for proc in workers.values():
+            proc.wait()
+
+    logger.info("\n" + "=" * 70)
+    logger.info("MERGING SHARDS")
+    logger.info("=" * 70)
+    logger.info(queue.summary())
+    merged = merge_shards(logger)
+    remaining = queue.remaining()
+    failed = queue.ids('failed')
+    queue.close()
+
+    if failed:
+        logger.warning(f"{len(failed):,} providers were leased {MAX_ATTEMPTS} times without finishing; skipped "
+                       f"(e.g. {', '.join(failed[:5])})")
+    if remaining:
+        logger.info(f"{remaining:,} providers left; continue with --workers {args.workers} --resume")
+    elif failed:
+        logger.info(f"Keeping {SHARD_DIR} and {QUEUE_DB.name} for inspection; see the worker logs")
+    else:
+        clear_shards()
+
+    report_outputs(input_count, logger)
+    logger.info(f"Sharded run merged {merged:,} providers")
+
 
 def main():
     """Main entry point."""
@@ -897,19 +1592,94 @@ def main():
     parser.add_argument('--input', default=str(INPUT_CSV), help='Input CSV file')
     parser.add_argument('--batch-size', type=int, default=25, help='Websites per batch (default: 25)')
     parser.add_argument('--max-pages', type=int, default=4, help='Max pages per site (default: 4)')
+    parser.add_argument(
+        '--page-concurrency', type=int, default=3,
+        help='Internal pages fetched at once per site (default: 3)'
+    )
     parser.add_argument('--threshold', type=int, default=2, help='Min backflow score (default: 2)')
-    parser.add_argument('--timeout', type=int, default=60, help='Per-page timeout seconds (default: 60)')
+    parser.add_argument(
+        '--timeout', type=int, default=60,
+        help='Per-page timeout seconds; upper bound for adaptive per-domain timeouts (default: 60)'
+    )
+    parser.add_argument(
+        '--no-domain-health', action='store_true',
+        help='Flat --timeout for every page, no circuit breaker or dead-domain cache'
+    )
     parser.add_argument('--sleep', type=float, default=0.3, help='Sleep between batches (default: 0.3)')
     parser.add_argument('--resume', action='store_true', help='Resume from checkpoint')
     parser.add_argument('--only-with-website', action='store_true', help='Skip records without websites')
+    parser.add_argument(
+        '--reverify', action='store_true',
+        help='Re-check only the stalest / most-changing providers within the budget, then merge'
+    )
+    parser.add_argument(
+        '--budget-pages', type=int, default=1000,
+        help='Re-verification page budget, estimated from last pages_crawled (default: 1000, 0 = unlimited)'
+    )
+    parser.add_argument(
+        '--budget-minutes', type=float, default=None,
+        help='Stop starting new batches after this many minutes'
+    )
+    parser.add_argument(
+        '--no-block-resources', action='store_true',
+        help='Load images, fonts, media and trackers (blocked by default)'
+    )
+    parser.add_argument(
+        '--block-third-party-scripts', action='store_true',
+        help='Also block non-tracker scripts from other hosts (faster, but JS-rendered sites may lose their text)'
+    )
+    parser.add_argument('--no-page-cache', action='store_true', help='Always crawl live, skip the page cache')
+    parser.add_argument(
+        '--no-share-domains', action='store_true',
+        help='Crawl every listing separately even when several share one website'
+    )
+    parser.add_argument(
+        '--no-sitemap', action='store_true',
+        help='Find internal pages from homepage links only (skip robots.txt / sitemap.xml discovery)'
+    )
+    parser.add_argument(
+        '--cache-ttl-hours', type=float, default=DEFAULT_TTL_HOURS,
+        help=f'Serve cached pages without revalidation for this long (default: {DEFAULT_TTL_HOURS})'
+    )
+    parser.add_argument(
+        '--cache-max-mb', type=float, default=DEFAULT_MAX_MB,
+        help=f'Page cache size before LRU eviction (default: {DEFAULT_MAX_MB})'
+    )
+    parser.add_argument(
+        '--maps-confidence', type=int, default=MAPS_CONFIDENCE_DEFAULT,
+        help=f'Verify without crawling when Google Maps fields score at least this '
+             f'(matched_on=MAPS_DATA; 0 = always crawl; default: {MAPS_CONFIDENCE_DEFAULT})'
+    )
     parser.add_argument(
         '--testing-threshold', type=int, default=TIER_TESTING_DEFAULT,
         help=f'Min score for tier=testing (default: {TIER_TESTING_DEFAULT})'
     )
 
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='Verifier processes sharing a SQLite work queue (default: 1 = this process only)'
+    )
+    parser.add_argument(
+        '--proxy',
+        help='Route browser page loads through this HTTP proxy (httpx side fetches use HTTP(S)_PROXY)'
+    )
+    parser.add_argument('--worker-id', help=argparse.SUPPRESS)
+
     args = parser.parse_args()
+    if args.worker_id:
+        # stdout already goes to the shard log (spawn_worker)
+        logger = setup_logging(shard_paths(args.worker_id)['log'], console=False)
+        try:
+            asyncio.run(run_worker(args, logger))
+        except KeyboardInterrupt:
+            pass
+        return
+
     logger = setup_logging()
-    asyncio.run(main_async(args, logger))
+    if args.workers > 1:
+        run_sharded(args, logger)
+    else:
+        asyncio.run(main_async(args, logger))
 
 
 if __name__ == "__main__":
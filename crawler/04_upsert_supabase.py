@@ -3,42 +3,87 @@
 Step 4: Upsert verified providers into Supabase.
 
 Reads crawler/data/verified.csv, transforms rows to match the existing DB schema,
-and upserts into providers, cities, and provider_services tables.
+and upserts into the providers and provider_services tables. cities keeps
+its provider counts and centroids up to date itself (migration 020 triggers);
+--rebuild-cities recomputes them from the whole providers table.
+
+Batches go straight to the PostgREST endpoint through upsert_engine.py, with
+--concurrency batches in flight over one pooled connection. Each provider
+batch is one call to upsert_providers_batch (migration 019), which writes the
+providers and their provider_services rows in the same transaction. A
+rejected batch is bisected down to the offending rows; those are written with
+their error to data/upsert_rejects.csv, which --retry loads back in once they
+are fixed. Settled batches are journaled (upsert_journal.py), so --resume
+continues an interrupted run where it stopped; every run ends with a
+reconciliation of the input against the database (data/upsert_report.md).
+
+Providers whose payload hash (content_hash.py) matches providers.content_hash
+are skipped along with their provider_services row; --dry-run reports how many
+rows would be inserted, updated or left alone.
+
+--bulk skips PostgREST for first loads and full rebuilds: the same payloads are
+COPYed into staging tables over a direct Postgres connection and merged in one
+transaction (bulk_loader.py).
 
 Requirements:
     SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY in .env
+    (--bulk: SUPABASE_DB_URL in .env, or --db-url, and psycopg)
 
 Usage:
     python crawler/04_upsert_supabase.py
     python crawler/04_upsert_supabase.py --dry-run
     python crawler/04_upsert_supabase.py --input crawler/data/verified.csv
+    python crawler/04_upsert_supabase.py --batch-size 200 --concurrency 8
+    python crawler/04_upsert_supabase.py --retry
+    python crawler/04_upsert_supabase.py --resume
+    python crawler/04_upsert_supabase.py --bulk
+    python crawler/04_upsert_supabase.py --rebuild-cities
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextlib
 import json
 import logging
 import math
 import os
 import re
 import sys
+import time
 import unicodedata
 from pathlib import Path
 
 import pandas as pd
 from dotenv import load_dotenv
 
+from bulk_loader import BulkLoader, BulkLoadError, db_url_from_env
+from content_hash import HASH_COLUMN, ContentDiff, add_hashes, diff_payloads
+from provider_payload import build_payloads
+from slug_index import SlugIndex
+from upsert_engine import (
+    BATCH_SIZE_DEFAULT, CONCURRENCY_DEFAULT, HTTP2_AVAILABLE, MAX_BATCH_ROWS, MAX_RETRIES_DEFAULT,
+    ORJSON_AVAILABLE, BatchSizer, UpsertEngine, UpsertError,
+)
+from upsert_journal import UpsertJournal, file_sha1
+
 _root = Path(__file__).resolve().parent.parent
 load_dotenv(_root / ".env")
 load_dotenv(_root / "web" / ".env.local")
 
-# Paths
-DATA_DIR = Path(__file__).parent / "data"
+# Paths (UPSERT_DATA_DIR points a run elsewhere, e.g. the load benchmark)
+DATA_DIR = Path(os.environ.get("UPSERT_DATA_DIR") or Path(__file__).parent / "data")
 INPUT_CSV = DATA_DIR / "verified.csv"
 LOG_FILE = DATA_DIR / "04_upsert.log"
+REJECTS_CSV = DATA_DIR / "upsert_rejects.csv"
+SLUG_INDEX_JSON = DATA_DIR / "slug_index.json"
+JOURNAL_JSON = DATA_DIR / "upsert_journal.json"
+REPORT_MD = DATA_DIR / "upsert_report.md"
 
-BATCH_SIZE = 100
+BATCH_SIZE = BATCH_SIZE_DEFAULT
+UPSERT_RPC = "upsert_providers_batch"    # migration 019
+REBUILD_CITIES_RPC = "rebuild_city_rollup"    # migration 020
 
 # ── Columns written to the providers table ────────────────────────────────────
 
@@ -139,310 +184,391 @@ def make_provider_slug(name: str, city: str, state: str) -> str:
     return f"{n}-{c}-{s}"
 
 
-def dedupe_slugs(series: pd.Series, existing_slugs: set[str] | None = None) -> pd.Series:
-    """Append -2, -3, ... to duplicate slugs (including those already in DB)."""
-    taken: set[str] = set(existing_slugs) if existing_slugs else set()
-    # Track highest used suffix number per base slug for efficiency
-    counters: dict[str, int] = {}
-    if existing_slugs:
-        for slug in existing_slugs:
-            m = re.match(r'^(.+)-(\d+)$', slug)
-            if m:
-                base, num = m.group(1), int(m.group(2))
-                counters[base] = max(counters.get(base, 0), num)
-    result = []
-    for slug in series:
-        if slug not in taken:
-            taken.add(slug)
-            result.append(slug)
-        else:
-            n = counters.get(slug, 1) + 1
-            candidate = f"{slug}-{n}"
-            while candidate in taken:
-                n += 1
-                candidate = f"{slug}-{n}"
-            counters[slug] = n
-            taken.add(candidate)
-            result.append(candidate)
-    return pd.Series(result, index=series.index)
-
-
-def _isnan(v: object) -> bool:
-    if v is None:
-        return True
-    try:
-        return math.isnan(float(v))
-    except (TypeError, ValueError):
-        return False
-
-
-def clean_row(row: dict, cols: list[str]) -> dict:
-    """Normalise a pandas row for Supabase upsert."""
-    out: dict = {}
-    for col in cols:
-        val = row.get(col)
-        if _isnan(val):
-            out[col] = None
-        elif col == "postal_code":
-            s = str(val).strip().split(".")[0].strip()
-            if s and s.isdigit():
-                out[col] = s.zfill(5)
-            elif s and s not in ("nan", "none", ""):
-                out[col] = s
-            else:
-                out[col] = None
-        elif col in ("rating", "latitude", "longitude"):
-            out[col] = float(val) if val is not None else None
-        elif col in ("reviews", "backflow_score"):
-            try:
-                out[col] = int(float(val)) if val is not None else 0
-            except (ValueError, TypeError):
-                out[col] = 0
-        elif col == "website_missing":
-            out[col] = bool(val) if val is not None else None
-        elif col == "image_urls":
-            if isinstance(val, list):
-                out[col] = val
-            else:
-                try:
-                    out[col] = json.loads(val) if val else []
-                except (json.JSONDecodeError, TypeError):
-                    out[col] = []
-        elif col == "reviews_per_score":
-            if isinstance(val, dict):
-                out[col] = {str(k): int(v) for k, v in val.items()}
-            elif isinstance(val, str) and val.strip():
-                try:
-                    out[col] = json.loads(val)
-                except (json.JSONDecodeError, TypeError):
-                    try:
-                        import ast
-                        parsed = ast.literal_eval(val)
-                        out[col] = {str(k): int(v) for k, v in parsed.items()}
-                    except Exception:
-                        out[col] = None
-            else:
-                out[col] = None
-        elif col == "service_tags":
-            # Convert pipe-delimited string to array
-            if isinstance(val, list):
-                out[col] = val
-            elif isinstance(val, str) and val.strip():
-                out[col] = [t.strip() for t in val.split('|') if t.strip()]
-            else:
-                out[col] = []
-        else:
-            out[col] = str(val) if val is not None else None
-    return out
-
-
-def get_client():
-    """Create Supabase client using service role key."""
-    from supabase import create_client
+def get_credentials(required: bool = True) -> tuple[str, str] | None:
+    """Supabase URL and service role key from the environment (None if unset and not required)."""
     url = os.environ.get("SUPABASE_URL", "") or os.environ.get("NEXT_PUBLIC_SUPABASE_URL", "")
     key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "")
     if not url or not key:
+        if not required:
+            return None
         print("ERROR: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in .env")
         sys.exit(1)
-    return create_client(url, key)
+    return url, key
 
 
-def fetch_existing_slugs(supabase, logger, exclude_place_ids: set[str] | None = None) -> set[str]:
-    """Fetch existing provider_slug values from DB to avoid collisions.
-
-    Excludes slugs belonging to place_ids in our CSV — those will be
-    overwritten by the upsert, so they shouldn't block slug assignment.
-    """
-    slugs: set[str] = set()
-    page_size = 1000
-    offset = 0
+async def fetch_remote_hashes(engine: UpsertEngine, place_ids: list[str], logger) -> dict[str, str | None] | None:
+    """{place_id: content_hash} for the providers already in the DB, or None if unavailable."""
     try:
-        while True:
-            resp = (
-                supabase.table("providers")
-                .select("provider_slug,place_id")
-                .range(offset, offset + page_size - 1)
-                .execute()
-            )
-            rows = resp.data or []
-            if not rows:
-                break
-            for r in rows:
-                pid = r.get("place_id", "")
-                s = r.get("provider_slug")
-                # Skip slugs that belong to providers we're about to upsert
-                # (their slug will be overwritten anyway)
-                if exclude_place_ids and str(pid) in exclude_place_ids:
-                    continue
-                if s:
-                    slugs.add(str(s))
-            if len(rows) < page_size:
-                break
-            offset += page_size
-        logger.info(f"  Loaded {len(slugs):,} existing provider slugs from DB (excluding {len(exclude_place_ids or set()):,} in CSV)")
-    except Exception as exc:
-        logger.warning(f"  Could not fetch existing slugs: {exc}")
-    return slugs
+        rows = await engine.fetch_in("providers", f"place_id,{HASH_COLUMN}", "place_id", place_ids)
+    except UpsertError as exc:
+        logger.warning(f"  Could not fetch content hashes ({exc}) — is migration 018 applied? Sending every row")
+        return None
+    return {str(r["place_id"]): r.get(HASH_COLUMN) for r in rows}
 
 
 # ── Upsert functions ─────────────────────────────────────────────────────────
 
-def upsert_providers(supabase, df: pd.DataFrame, dry_run: bool, logger) -> tuple[int, int, set[str]]:
-    """Upsert providers in batches. Returns (success_count, failed_count, successful_place_ids)."""
-    rows = df.to_dict("records")
-    success = 0
-    failed = 0
-    total = len(rows)
-    ok_place_ids: set[str] = set()
-
-    for i in range(0, total, BATCH_SIZE):
-        batch = rows[i: i + BATCH_SIZE]
-        clean = [clean_row(r, PROVIDER_COLS) for r in batch]
-
-        if dry_run:
-            logger.info(f"  [DRY RUN] providers [{i + len(batch):,}/{total:,}]")
-            success += len(batch)
-            for r in clean:
-                ok_place_ids.add(r["place_id"])
-            continue
+def services_json(tags: list | None) -> dict | None:
+    """provider_services.services_json for a provider's service_tags (None if no canonical tag matches)."""
+    flags = {key: False for key in CANONICAL_SERVICE_KEYS}
+    for tag in tags or ():
+        db_key = TAG_TO_KEY.get(tag)
+        if db_key:
+            flags[db_key] = True
+    return flags if any(flags.values()) else None
+
+
+def service_rows(payloads: list[dict]) -> list[dict]:
+    """provider_services rows for the payloads that have canonical service tags."""
+    rows = ({"place_id": p["place_id"], "services_json": services_json(p.get("service_tags"))} for p in payloads)
+    return [r for r in rows if r["services_json"] is not None]
+
+
+async def upsert_providers(
+    engine: UpsertEngine | None, clean: list[dict], dry_run: bool, logger,
+    sizer: BatchSizer | None = None, rejects: dict[str, str] | None = None, on_batch=None,
+) -> tuple[int, int, int, set[str]]:
+    """Upsert providers with their provider_services rows in pipelined batches.
+
+    Each batch is one call to upsert_providers_batch (migration 019), which
+    writes both tables in one transaction. Returns (success_count,
+    failed_count, services_count, successful_place_ids). Rows the database
+    rejected are added to rejects as {place_id: error}. on_batch is passed
+    to UpsertEngine.upsert.
+    """
+    total = len(clean)
+    rows = [{**p, "services_json": services_json(p.get("service_tags"))} for p in clean]
+    with_services = {r["place_id"] for r in rows if r["services_json"] is not None}
 
-        try:
-            supabase.table("providers").upsert(clean, on_conflict="place_id").execute()
-            success += len(batch)
-            for r in clean:
-                ok_place_ids.add(r["place_id"])
-            logger.info(f"  providers [{i + len(batch):,}/{total:,}]")
-        except Exception:
-            # Batch failed — fall back to row-by-row
-            logger.warning(f"  providers batch {i // BATCH_SIZE + 1} failed, retrying row-by-row...")
-            for r in clean:
-                try:
-                    supabase.table("providers").upsert(r, on_conflict="place_id").execute()
-                    success += 1
-                    ok_place_ids.add(r["place_id"])
-                except Exception as row_exc:
-                    logger.error(f"  provider {r.get('place_id')} ({r.get('name')}) ERROR: {row_exc}")
-                    failed += 1
-
-    return success, failed, ok_place_ids
-
-
-def upsert_cities(supabase, df: pd.DataFrame, dry_run: bool, logger) -> int:
-    """Recompute city counts and upsert cities table."""
-    agg = (
-        df.groupby(["city_slug", "state_code", "city"])
-        .agg(
-            provider_count=("place_id", "count"),
-            latitude=("latitude", "mean"),
-            longitude=("longitude", "mean"),
-        )
-        .reset_index()
+    if dry_run:
+        batch_size = sizer.next_size() if sizer else BATCH_SIZE
+        logger.info(f"  [DRY RUN] Would upsert {total:,} providers in ~{math.ceil(total / batch_size):,} batches")
+        logger.info(f"  [DRY RUN] Would upsert {len(with_services):,} provider_services records with them")
+        return total, 0, len(with_services), {r["place_id"] for r in clean}
+
+    stats, failures = await engine.upsert_rpc(UPSERT_RPC, rows, sizer, on_batch)
+    logger.info(f"  {stats.summary()}")
+
+    # Failed batches were bisected by the engine — what is left are the bad rows
+    failed_ids: set[str] = set()
+    for rows, error in failures:
+        for r in rows:
+            if len(rows) == 1:
+                logger.error(f"  provider {r.get('place_id')} ({r.get('name')}) ERROR: {error}")
+            failed_ids.add(r["place_id"])
+            if rejects is not None:
+                rejects[r["place_id"]] = f"providers: {error}"
+
+    ok_place_ids = {r["place_id"] for r in clean} - failed_ids
+    services_count = len(with_services & ok_place_ids)
+    logger.info(f"  provider_services: {services_count:,} records upserted with their providers")
+    return total - len(failed_ids), len(failed_ids), services_count, ok_place_ids
+
+
+# ── Rejects ───────────────────────────────────────────────────────────────────
+
+def write_rejects(df: pd.DataFrame, rejects: dict[str, str], logger):
+    """Save rejected input rows plus an upsert_error column; --retry reads them back.
+
+    A clean run removes the previous rejects file.
+    """
+    if not rejects:
+        if REJECTS_CSV.exists():
+            REJECTS_CSV.unlink()
+        return
+    out = df[df["place_id"].astype(str).isin(rejects)].copy()
+    out["upsert_error"] = out["place_id"].astype(str).map(rejects)
+    REJECTS_CSV.parent.mkdir(parents=True, exist_ok=True)
+    tmp = REJECTS_CSV.with_suffix(".tmp")
+    out.to_csv(tmp, index=False)
+    tmp.replace(REJECTS_CSV)
+    logger.warning(f"  {len(out):,} rejected rows → {REJECTS_CSV}")
+
+
+# ── Reconciliation ────────────────────────────────────────────────────────────
+
+async def reconcile(
+    engine: UpsertEngine, payloads: list[dict], diff: ContentDiff, rejects: dict[str, str],
+    journal: UpsertJournal | None, resumed: int, success: int, logger,
+):
+    """Re-read the input's providers from the DB and account for every row in REPORT_MD."""
+    logger.info("\nReconciling input against the database...")
+    remote = await fetch_remote_hashes(engine, [p["place_id"] for p in payloads], logger)
+    if remote is None:
+        return
+    hashed = HASH_COLUMN in payloads[0] if payloads else False
+    current, stale, missing = [], [], []
+    for p in payloads:
+        pid = p["place_id"]
+        if pid not in remote:
+            missing.append(pid)
+        elif hashed and remote[pid] != p[HASH_COLUMN]:
+            stale.append(pid)
+        else:
+            current.append(pid)
+    unexplained = [pid for pid in stale + missing if pid not in rejects]
+    outstanding = 0
+    if journal is not None:
+        position = {p["place_id"]: i for i, p in enumerate(payloads)}
+        outstanding = sum(not journal.covers("providers", position[p["place_id"]]) for p in diff.changed)
+
+    lines = [
+        "# Upsert Reconciliation Report",
+        "",
+        f"**Generated**: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+    ]
+    if journal is not None:
+        lines += [f"**Input**: `{journal.input_path}` (sha1 `{journal.input_sha1[:12]}`, run {journal.runs})", ""]
+    lines += [
+        "## Input",
+        "",
+        f"- **Rows**: {len(payloads):,}",
+        f"- **Unchanged (skipped by content hash)**: {len(diff.unchanged):,}",
+        f"- **Settled by an earlier run (--resume)**: {resumed:,}",
+        f"- **Upserted this run**: {success:,}",
+        f"- **Rejected**: {len(rejects):,} (see `{REJECTS_CSV.name}`)",
+        f"- **Not settled (interrupted)**: {outstanding:,}",
+        "",
+        "## Database",
+        "",
+        f"- **Present and current**: {len(current):,}" + ("" if hashed else " (no content hashes: presence only)"),
+        f"- **Present but stale**: {len(stale):,}",
+        f"- **Missing**: {len(missing):,}",
+        f"- **Stale or missing, not explained by a reject**: {len(unexplained):,}",
+        "",
+    ]
+    if unexplained:
+        lines += ["| place_id | State |", "|----------|-------|"]
+        lines += [f"| {pid} | {'missing' if pid not in remote else 'stale'} |" for pid in unexplained[:50]]
+        lines.append("")
+    with open(REPORT_MD, "w") as f:
+        f.write("\n".join(lines))
+
+    logger.info(
+        f"  DB: {len(current):,} current, {len(stale):,} stale, {len(missing):,} missing; "
+        f"{len(unexplained):,} not explained by rejects → {REPORT_MD}"
     )
+    if unexplained:
+        logger.warning(f"  Unexplained: {', '.join(unexplained[:5])}{' ...' if len(unexplained) > 5 else ''}")
 
-    city_rows = []
-    for _, row in agg.iterrows():
-        city_rows.append({
-            "city":           str(row["city"]),
-            "city_slug":      str(row["city_slug"]),
-            "state_code":     str(row["state_code"]),
-            "provider_count": int(row["provider_count"]),
-            "latitude":       float(row["latitude"]) if not _isnan(row["latitude"]) else None,
-            "longitude":      float(row["longitude"]) if not _isnan(row["longitude"]) else None,
-        })
 
-    total = len(city_rows)
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def make_sizer(args) -> BatchSizer:
+    return BatchSizer(args.batch_size, adaptive=not args.fixed_batch_size, max_rows=args.max_batch_size)
 
-    if dry_run:
-        logger.info(f"  [DRY RUN] Would upsert {total} cities")
-        return total
 
-    for i in range(0, total, BATCH_SIZE):
-        batch = city_rows[i: i + BATCH_SIZE]
+async def upsert_all(df: pd.DataFrame, args, logger, journal: UpsertJournal | None = None):
+    """Open the upsert engine and write every table.
+
+    A dry run still reads slugs and hashes when credentials are set, but writes nothing.
+    """
+    if args.bulk:
         try:
-            supabase.table("cities").upsert(
-                batch, on_conflict="city_slug,state_code"
-            ).execute()
-            logger.info(f"  cities [{i + len(batch):,}/{total:,}]")
-        except Exception as exc:
-            logger.error(f"  cities batch {i // BATCH_SIZE + 1} ERROR: {exc}")
-
-    return total
-
-
-def upsert_provider_services(
-    supabase, df: pd.DataFrame, dry_run: bool, logger,
-    ok_place_ids: set[str] | None = None,
-) -> int:
-    """Upsert provider_services from extracted service_tags (batched)."""
-    records: list[dict] = []
-    skipped_fk = 0
-
-    for _, row in df.iterrows():
-        place_id = row.get('place_id')
-        tags_raw = row.get('service_tags')
-
-        if not place_id or not tags_raw:
-            continue
-
-        # Skip if this provider wasn't successfully upserted
-        if ok_place_ids is not None and str(place_id) not in ok_place_ids:
-            skipped_fk += 1
-            continue
-
-        # Parse tags
-        if isinstance(tags_raw, list):
-            tags = tags_raw
-        elif isinstance(tags_raw, str) and tags_raw.strip():
-            tags = [t.strip() for t in tags_raw.split('|') if t.strip()]
-        else:
-            continue
+            bulk = BulkLoader(args.db_url, logger)
+        except RuntimeError as exc:
+            logger.error(f"ERROR: {exc}")
+            sys.exit(1)
+        with bulk as loader:
+            logger.info(f"Bulk load: COPY + merge over a direct connection to {loader.source}")
+            bulk_tables(loader, df, args, logger)
+        return
+
+    credentials = get_credentials(required=not args.dry_run)
+    engine_ctx = contextlib.nullcontext() if credentials is None else UpsertEngine(
+        *credentials, concurrency=args.concurrency, max_retries=args.max_retries, logger=logger,
+    )
+    async with engine_ctx as engine:
+        if engine is not None and not args.dry_run:
+            logger.info(
+                f"PostgREST: {args.concurrency} batches in flight, batch size {args.batch_size}"
+                f"{'' if args.fixed_batch_size else f' (adaptive, max {args.max_batch_size})'}, "
+                f"{'HTTP/2' if HTTP2_AVAILABLE else 'HTTP/1.1'}, "
+                f"{'orjson' if ORJSON_AVAILABLE else 'json (pip install orjson for faster encoding)'}"
+            )
+            if not HTTP2_AVAILABLE:
+                logger.warning("h2 is not installed; PostgREST requests use HTTP/1.1 "
+                               "(pip install -r crawler/requirements.txt)")
+        await upsert_tables(engine, df, args, logger, journal)
 
-        if not tags:
-            continue
 
-        # Build services_json
-        services_json = {key: False for key in CANONICAL_SERVICE_KEYS}
-        for tag in tags:
-            db_key = TAG_TO_KEY.get(tag)
-            if db_key:
-                services_json[db_key] = True
+def prepare_providers(df: pd.DataFrame, slug_index: SlugIndex, logger) -> list[dict]:
+    """Assign slugs and image URLs on df, then build hashed provider payloads."""
+    df["city_slug"] = df["city"].apply(slugify)
 
-        if not any(services_json.values()):
-            continue
+    raw_slugs = df.apply(
+        lambda r: make_provider_slug(r["name"], r["city"], r["state_code"].lower()), axis=1
+    )
+    df["provider_slug"] = slug_index.assign(df["place_id"].astype(str), raw_slugs)
 
-        records.append({
-            'place_id': str(place_id),
-            'services_json': services_json,
-        })
+    if "image_urls" not in df.columns:
+        def _google_photo(r):
+            ph = r.get("photo", "")
+            if pd.notna(ph) and str(ph).strip().startswith("http"):
+                return json.dumps([str(ph).strip()])
+            return json.dumps([])
+        df["image_urls"] = df.apply(_google_photo, axis=1)
 
-    total = len(records)
+    t0 = time.perf_counter()
+    payloads = build_payloads(df, PROVIDER_COLS)
+    add_hashes(payloads)
+    logger.info(f"Built {len(payloads):,} provider payloads in {time.perf_counter() - t0:.2f}s")
+    return payloads
+
+
+def diff_providers(payloads: list[dict], remote_hashes: dict | None, args, logger) -> ContentDiff:
+    """Split payloads into changed and unchanged (--force / --retry re-send everything)."""
+    if remote_hashes is None:
+        for p in payloads:
+            del p[HASH_COLUMN]
+    diff = diff_payloads(payloads, remote_hashes)
+    if (args.force or args.retry) and diff.unchanged:
+        # Loaders before migration 019 could write a provider but reject its services row
+        logger.info(f"  {'--force' if args.force else '--retry'}: re-sending {len(diff.unchanged):,} unchanged providers")
+        diff = ContentDiff(diff.inserts, diff.updates + diff.unchanged)
+    logger.info(f"  Providers: {diff.summary()}")
+    return diff
+
+
+def bulk_tables(loader: BulkLoader, df: pd.DataFrame, args, logger):
+    """--bulk: same payloads as upsert_tables, loaded by COPY + merge in one transaction."""
+    slug_index = SlugIndex(SLUG_INDEX_JSON, loader.source)
+    logger.info("Syncing provider slug index...")
+    if args.rebuild_slug_index:
+        slug_index.clear()
+    since = slug_index.synced_at
+    slug_index.apply(loader.slug_rows(since), incremental=since is not None, log=logger)
+
+    payloads = prepare_providers(df, slug_index, logger)
+    logger.info("Fetching provider content hashes from DB...")
+    remote_hashes = loader.remote_hashes([p["place_id"] for p in payloads])
+    if remote_hashes is None:
+        logger.warning("  providers.content_hash is missing — is migration 018 applied? Sending every row")
+    diff = diff_providers(payloads, remote_hashes, args, logger)
+    changed_ids = {p["place_id"] for p in diff.changed}
+
+    services = service_rows(diff.changed)
+
+    logger.info(f"\n── Loading {len(diff.changed):,} providers, {len(services):,} provider_services ──")
+    try:
+        stats = loader.load(diff.changed, services, dry_run=args.dry_run, rebuild_cities=args.rebuild_cities)
+    except BulkLoadError as exc:
+        logger.error(f"Bulk load rolled back — nothing was written.\n  {exc}")
+        logger.error("Fix the row, or re-run without --bulk to have bad rows bisected out to upsert_rejects.csv")
+        sys.exit(1)
 
-    if dry_run:
-        logger.info(f"  [DRY RUN] Would upsert {total} provider_services records")
-        if skipped_fk > 0:
-            logger.info(f"  provider_services: {skipped_fk} skipped (provider not in DB)")
-        return total
-
-    success = 0
-    for i in range(0, total, BATCH_SIZE):
-        batch = records[i: i + BATCH_SIZE]
+    if stats.committed:
+        written = df[df["place_id"].astype(str).isin(changed_ids)]
+        slug_index.record(zip(written["place_id"].astype(str), written["provider_slug"]))
+        slug_index.save()
+
+    logger.info("\n" + "=" * 70)
+    logger.info("BULK LOAD COMPLETE" + (" (DRY RUN — rolled back)" if args.dry_run else ""))
+    logger.info("=" * 70)
+    for table in ("providers", "provider_services"):
+        logger.info(f"  {stats.summary(table)}")
+    if stats.cities_rebuilt is not None:
+        logger.info(f"  cities: {stats.cities_rebuilt:,} corrected by the full rebuild")
+    logger.info(f"            {diff.summary()}")
+    logger.info(f"Total:      {stats.timings['total']:.2f}s")
+    logger.info("=" * 70)
+
+
+async def upsert_tables(
+    engine: UpsertEngine | None, df: pd.DataFrame, args, logger, journal: UpsertJournal | None = None,
+):
+    """engine is None on a dry run without credentials; journal is None on a dry run."""
+    # ── Sync the slug index ───────────────────────────────────────────────────
+    slug_index = SlugIndex(SLUG_INDEX_JSON, engine.base_url if engine is not None else None)
+    if engine is not None:
+        logger.info("Syncing provider slug index...")
         try:
-            supabase.table("provider_services").upsert(
-                batch, on_conflict="place_id"
-            ).execute()
-            success += len(batch)
-            logger.info(f"  provider_services [{i + len(batch):,}/{total:,}]")
-        except Exception as exc:
-            logger.error(f"  provider_services batch {i // BATCH_SIZE + 1} ERROR: {exc}")
+            await slug_index.sync(engine, logger, full=args.rebuild_slug_index)
+        except UpsertError as exc:
+            logger.warning(f"  Could not sync slug index: {exc}")
+
+    # ── Slugs, image URLs, payloads ───────────────────────────────────────────
+    payloads = prepare_providers(df, slug_index, logger)
+
+    # ── Diff against stored content hashes ───────────────────────────────────
+    remote_hashes = None
+    if engine is not None:
+        logger.info("Fetching provider content hashes from DB...")
+        remote_hashes = await fetch_remote_hashes(engine, [p["place_id"] for p in payloads], logger)
+    diff = diff_providers(payloads, remote_hashes, args, logger)
+    changed_ids = {p["place_id"] for p in diff.changed}
+
+    # ── Skip what an earlier run settled ─────────────────────────────────────
+    rejects: dict[str, str] = {}
+    send, on_batch, resumed = diff.changed, None, 0
+    if journal is not None:
+        # Input order, so each batch is one contiguous range of input positions
+        position = {p["place_id"]: i for i, p in enumerate(payloads)}
+        send = sorted(diff.changed, key=lambda p: position[p["place_id"]])
+        if journal.resumed:
+            todo = [p for p in send if not journal.covers("providers", position[p["place_id"]])]
+            resumed = len(send) - len(todo)
+            todo_ids = {p["place_id"] for p in todo}
+            rejects.update({pid: e for pid, e in journal.rejects.items() if pid not in todo_ids})
+            send = todo
+            logger.info(f"  --resume: {resumed:,} providers already settled by an earlier run")
+        positions = [position[p["place_id"]] for p in send]
+
+        def record_batch(start: int, end: int, failures: list):
+            journal.record(
+                "providers", positions[start], positions[end - 1] + 1,
+                {r["place_id"]: f"providers: {error}" for rows, error in failures for r in rows},
+            )
+        on_batch = record_batch
 
-    logger.info(f"  provider_services: {success} records upserted")
-    if skipped_fk > 0:
-        logger.info(f"  provider_services: {skipped_fk} skipped (provider not in DB)")
+    logger.info(f"\nReady to upsert {len(send):,} of {len(df):,} providers")
 
-    return success
+    # ── Upsert providers + provider_services ──────────────────────────────────
+    logger.info("\n── Upserting providers + provider_services ─────────")
+    try:
+        success, failed, services_count, ok_place_ids = await upsert_providers(
+            engine, send, args.dry_run, logger, make_sizer(args), rejects, on_batch
+        )
+    finally:
+        if journal is not None:
+            journal.save()
+
+    # ── Cities ────────────────────────────────────────────────────────────────
+    # Counts and centroids follow the providers writes (migration 020 triggers)
+    cities_count = None
+    if args.rebuild_cities:
+        logger.info("\n── Rebuilding city rollup ──────────────────────────")
+        if args.dry_run:
+            logger.info("  [DRY RUN] Would recompute every city from the providers table")
+        else:
+            cities_count = await engine.call(REBUILD_CITIES_RPC)
+            logger.info(f"  {cities_count:,} cities corrected")
 
+    if not args.dry_run:
+        write_rejects(df, rejects, logger)
+        written = df[df["place_id"].astype(str).isin(changed_ids & ok_place_ids)]
+        slug_index.record(zip(written["place_id"].astype(str), written["provider_slug"]))
+        slug_index.save()
+        if journal is not None:
+            journal.finish()
+        await reconcile(engine, payloads, diff, rejects, journal, resumed, success, logger)
+
+    # ── Summary ───────────────────────────────────────────────────────────────
+    logger.info("\n" + "=" * 70)
+    logger.info("UPSERT COMPLETE" + (" (DRY RUN)" if args.dry_run else ""))
+    logger.info("=" * 70)
+    logger.info(f"Providers:  {success:,} upserted, {failed:,} failed")
+    logger.info(f"            {diff.summary()}")
+    if rejects:
+        logger.info(f"Rejects:    {len(rejects):,} rows → {REJECTS_CSV} (fix, then re-run with --retry)")
+    if cities_count is not None:
+        logger.info(f"Rollup:     {cities_count:,} cities corrected by the full rebuild")
+    logger.info(f"Services:   {services_count:,} upserted")
+    logger.info(f"States:     {df['state_code'].nunique()}")
+    logger.info(f"Cities:     {df['city'].nunique()}")
+    logger.info("=" * 70)
 
-# ── Main ──────────────────────────────────────────────────────────────────────
 
 def main():
     parser = argparse.ArgumentParser(
@@ -456,11 +582,59 @@ def main():
         "--dry-run", action="store_true",
         help="Print what would be done without writing to DB"
     )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help=f"Rows per upsert batch to start with (default: {BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--max-batch-size", type=int, default=MAX_BATCH_ROWS,
+        help=f"Upper bound for the adaptive batch size (default: {MAX_BATCH_ROWS})"
+    )
+    parser.add_argument(
+        "--fixed-batch-size", action="store_true",
+        help="Keep --batch-size instead of adapting it to payload size and latency"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Re-send providers whose content hash is unchanged"
+    )
+    parser.add_argument(
+        "--rebuild-slug-index", action="store_true",
+        help=f"Re-fetch every provider slug instead of syncing {SLUG_INDEX_JSON.name} incrementally"
+    )
+    parser.add_argument(
+        "--retry", action="store_true",
+        help=f"Load the rows rejected last time ({REJECTS_CSV.name}) instead of --input"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help=f"Skip the batches an interrupted run of the same input settled ({JOURNAL_JSON.name})"
+    )
+    parser.add_argument(
+        "--rebuild-cities", action="store_true",
+        help="Also recompute every city's provider count and centroid from the providers table (repair job)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=CONCURRENCY_DEFAULT,
+        help=f"Upsert batches in flight at once (default: {CONCURRENCY_DEFAULT})"
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=MAX_RETRIES_DEFAULT,
+        help=f"Retries per batch on 429/5xx/network errors (default: {MAX_RETRIES_DEFAULT})"
+    )
+    parser.add_argument(
+        "--bulk", action="store_true",
+        help="COPY into staging tables and merge in one transaction over a direct DB connection"
+    )
+    parser.add_argument(
+        "--db-url", default=db_url_from_env(),
+        help="Postgres connection string for --bulk (default: SUPABASE_DB_URL or DATABASE_URL)"
+    )
 
     args = parser.parse_args()
     logger = setup_logging()
 
-    csv_path = Path(args.input)
+    csv_path = REJECTS_CSV if args.retry else Path(args.input)
     if not csv_path.exists():
         logger.error(f"Input file not found: {csv_path}")
         sys.exit(1)
@@ -518,56 +692,16 @@ def main():
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
 
-    # ── Connect to Supabase (early, to fetch existing slugs) ────────────────
-    supabase = None
-    existing_slugs: set[str] = set()
-    if not args.dry_run:
-        supabase = get_client()
-        csv_place_ids = set(df["place_id"].astype(str).tolist())
-        logger.info("Fetching existing provider slugs from DB...")
-        existing_slugs = fetch_existing_slugs(supabase, logger, exclude_place_ids=csv_place_ids)
-
-    # ── Generate slugs ────────────────────────────────────────────────────────
-    df["city_slug"] = df["city"].apply(slugify)
-
-    raw_slugs = df.apply(
-        lambda r: make_provider_slug(r["name"], r["city"], r["state_code"].lower()), axis=1
-    )
-    df["provider_slug"] = dedupe_slugs(raw_slugs, existing_slugs)
+    journal = None
+    if args.bulk:
+        if args.resume:
+            logger.info("--resume has no effect with --bulk: a bulk load commits all at once or not at all")
+    elif not args.dry_run:
+        journal = UpsertJournal(JOURNAL_JSON, file_sha1(csv_path), str(csv_path))
+        if args.resume and not journal.resume():
+            logger.info(f"--resume: no journal for this input in {JOURNAL_JSON} — starting from the first row")
 
-    # ── Image URLs ────────────────────────────────────────────────────────────
-    if "image_urls" not in df.columns:
-        def _google_photo(r):
-            ph = r.get("photo", "")
-            if pd.notna(ph) and str(ph).strip().startswith("http"):
-                return json.dumps([str(ph).strip()])
-            return json.dumps([])
-        df["image_urls"] = df.apply(_google_photo, axis=1)
-
-    logger.info(f"\nReady to upsert {len(df):,} providers")
-
-    # ── Upsert providers ──────────────────────────────────────────────────────
-    logger.info("\n── Upserting providers ─────────────────────────────")
-    success, failed, ok_place_ids = upsert_providers(supabase, df, args.dry_run, logger)
-
-    # ── Upsert cities ─────────────────────────────────────────────────────────
-    logger.info("\n── Upserting cities ────────────────────────────────")
-    cities_count = upsert_cities(supabase, df, args.dry_run, logger)
-
-    # ── Upsert provider_services ──────────────────────────────────────────────
-    logger.info("\n── Upserting provider_services ─────────────────────")
-    services_count = upsert_provider_services(supabase, df, args.dry_run, logger, ok_place_ids)
-
-    # ── Summary ───────────────────────────────────────────────────────────────
-    logger.info("\n" + "=" * 70)
-    logger.info("UPSERT COMPLETE" + (" (DRY RUN)" if args.dry_run else ""))
-    logger.info("=" * 70)
-    logger.info(f"Providers:  {success:,} upserted, {failed:,} failed")
-    logger.info(f"Cities:     {cities_count:,} upserted")
-    logger.info(f"Services:   {services_count:,} upserted")
-    logger.info(f"States:     {df['state_code'].nunique()}")
-    logger.info(f"Cities:     {df['city'].nunique()}")
-    logger.info("=" * 70)
+    asyncio.run(upsert_all(df, args, logger, journal))
 
 
 if __name__ == "__main__":
@@ -27,10 +27,9 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 
 import httpx
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
 _root = Path(__file__).resolve().parent.parent
@@ -44,11 +43,19 @@ try:
 except ImportError:
     CRAWL4AI_AVAILABLE = False
 
+from crawl_profiles import install_resource_blocking
+from crawl_share import SharedCrawls, crawl_key
+from page_cache import DEFAULT_TTL_HOURS, CrawledPage, PageCache, page_variant
+from page_extract import PageRecord, extract_page
+from site_discovery import SiteDiscovery
+
 # ─── Paths ────────────────────────────────────────────────────────────────────
 
 DATA_DIR = Path(__file__).parent / "data"
 STATE_FILE       = DATA_DIR / "image_db_state.json"
 LOG_FILE         = DATA_DIR / "image_db_enrichment.log"
+PAGE_CACHE_DB    = DATA_DIR / "page_cache.sqlite"
+DISCOVERY_JSON   = DATA_DIR / "site_discovery.json"
 
 # ─── Tuning constants ─────────────────────────────────────────────────────────
 
@@ -61,6 +68,8 @@ IMAGE_TIMEOUT       = 15
 IMAGE_MAX_BYTES     = 5 * 1024 * 1024
 VISION_CONCURRENCY  = 2
 CRAWL_TIMEOUT       = 30
+CRAWL_WORD_THRESHOLD = 0
+CACHE_VARIANT       = page_variant("images", CRAWL_WORD_THRESHOLD)
 DEFAULT_BATCH_SIZE  = 25
 DB_PAGE_SIZE        = 1000
 
@@ -252,45 +261,11 @@ def heuristic_filter(urls: List[str]) -> List[str]:
 # ─── HTML parsing helpers ─────────────────────────────────────────────────────
 
 
-def extract_images_from_html(html: str, base_url: str) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    urls: List[str] = []
-
-    for tag in soup.find_all("img"):
-        src = tag.get("src", "").strip()
-        if src:
-            abs_url = urljoin(base_url, src)
-            if abs_url.startswith("http"):
-                urls.append(abs_url)
-        srcset = tag.get("srcset", "")
-        for part in srcset.split(","):
-            tokens = part.strip().split()
-            if not tokens:
-                continue
-            s = tokens[0]
-            if s:
-                abs_url = urljoin(base_url, s)
-                if abs_url.startswith("http"):
-                    urls.append(abs_url)
-
-    for meta in soup.find_all("meta"):
-        prop = (meta.get("property") or meta.get("name") or "").lower()
-        if prop in ("og:image", "twitter:image", "twitter:image:src"):
-            content = (meta.get("content") or "").strip()
-            if content.startswith("http"):
-                urls.append(content)
-
-    return urls
-
-
-def extract_service_links(html: str, base_url: str) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    base_domain = urlparse(base_url).netloc
+def extract_service_links(page: PageRecord) -> List[str]:
+    base_domain = urlparse(page.url).netloc
     links: List[str] = []
 
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip()
-        abs_url = urljoin(base_url, href)
+    for abs_url, _anchor in page.links:
         parsed = urlparse(abs_url)
         if parsed.netloc != base_domain:
             continue
@@ -429,24 +404,97 @@ async def vision_verify_batch(
 # ─── Crawl4AI page helper ─────────────────────────────────────────────────────
 
 
-async def crawl_page(crawler: Any, url: str) -> Optional[str]:
-    try:
-        result = await crawler.arun(
-            url=url,
-            bypass_cache=True,
-            word_count_threshold=0,
-            page_timeout=CRAWL_TIMEOUT * 1000,
-        )
-        if result.success and result.html:
-            return result.html
-    except Exception as e:
-        logger.debug(f"Crawl error for {url}: {e}")
-    return None
+async def crawl_page(crawler: Any, url: str, page_cache: Optional[PageCache] = None) -> Optional[str]:
+    async def _crawl() -> Optional[CrawledPage]:
+        try:
+            result = await crawler.arun(
+                url=url,
+                bypass_cache=True,
+                word_count_threshold=CRAWL_WORD_THRESHOLD,
+                page_timeout=CRAWL_TIMEOUT * 1000,
+            )
+            if result.success and result.html:
+                return CrawledPage(
+                    html=result.html,
+                    text=result.markdown or "",
+                    headers=getattr(result, "response_headers", None),
+                )
+        except Exception as e:
+            logger.debug(f"Crawl error for {url}: {e}")
+        return None
+
+    page = await (page_cache.fetch(url, _crawl, CACHE_VARIANT) if page_cache else _crawl())
+    return page.html if page else None
 
 
 # ─── Per-provider pipeline ────────────────────────────────────────────────────
 
 
+async def crawl_candidates(
+    website: str,
+    name: str,
+    crawler: Any,
+    page_cache: Optional[PageCache] = None,
+    discovery: Optional[SiteDiscovery] = None,
+) -> List[Tuple[str, List[str]]]:
+    """Crawl homepage + service pages and return (page URL, candidate image URLs), homepage first."""
+    site_pages: List[Tuple[str, List[str]]] = []
+    pages_to_crawl = [website]
+
+    # Service pages listed in the sitemap, known before rendering anything
+    if discovery is not None:
+        found = await discovery.discover(website)
+        for link in found.ranked() + found.page_urls:
+            if len(pages_to_crawl) >= MAX_PAGES:
+                break
+            if (
+                link not in pages_to_crawl
+                and SERVICE_PAGE_RE.search(urlparse(link).path)
+                and discovery.allowed(link)
+            ):
+                pages_to_crawl.append(link)
+
+    crawled: set = set()
+    for page_url in pages_to_crawl[:MAX_PAGES]:
+        if page_url in crawled:
+            continue
+        crawled.add(page_url)
+
+        if discovery is not None:
+            await discovery.throttle(page_url)
+        html = await crawl_page(crawler, page_url, page_cache)
+        if not html:
+            continue
+
+        page = extract_page(html, page_url)
+        imgs = page.image_urls
+        site_pages.append((page_url, imgs))
+        logger.debug(f"  {name}: {len(imgs)} imgs from {page_url}")
+
+        if len(pages_to_crawl) < MAX_PAGES:
+            links = extract_service_links(page)
+            for link in links:
+                if discovery is not None and not discovery.allowed(link):
+                    continue
+                if link not in crawled and len(pages_to_crawl) < MAX_PAGES:
+                    pages_to_crawl.append(link)
+
+    return site_pages
+
+
+async def crawl_evidence(
+    best_evidence: str,
+    crawler: Any,
+    page_cache: Optional[PageCache] = None,
+    discovery: Optional[SiteDiscovery] = None,
+) -> List[str]:
+    """Candidate image URLs from one listing's best_evidence page."""
+    if discovery is not None:
+        await discovery.throttle(best_evidence)
+    html = await crawl_page(crawler, best_evidence, page_cache)
+    return extract_page(html, best_evidence).image_urls if html else []
+
+
 async def enrich_provider(
     provider: Dict[str, Any],
     crawler: Any,
@@ -454,6 +502,9 @@ async def enrich_provider(
     vision_client: Any,
     vision_semaphore: asyncio.Semaphore,
     args: argparse.Namespace,
+    page_cache: Optional[PageCache] = None,
+    discovery: Optional[SiteDiscovery] = None,
+    shared: Optional[SharedCrawls] = None,
 ) -> Dict[str, Any]:
     """
     Run the full A->B->C pipeline for one provider from DB.
@@ -487,29 +538,25 @@ async def enrich_provider(
     candidate_urls: List[str] = []
 
     if website and CRAWL4AI_AVAILABLE and not args.no_crawl:
-        pages_to_crawl = [website]
-        if best_evidence and best_evidence != website:
-            pages_to_crawl.append(best_evidence)
-
-        crawled: set = set()
-        for page_url in pages_to_crawl[:MAX_PAGES]:
-            if page_url in crawled:
-                continue
-            crawled.add(page_url)
+        async def _crawl() -> List[Tuple[str, List[str]]]:
+            return await crawl_candidates(website, name, crawler, page_cache, discovery)
 
-            html = await crawl_page(crawler, page_url)
-            if not html:
-                continue
-
-            imgs = extract_images_from_html(html, page_url)
+        if shared is None:
+            site_pages = await _crawl()
+        else:
+            # Listings sharing a website reuse the first listing's site crawl;
+            # best_evidence differs per listing, so it is crawled below for each one
+            site_pages = await shared.get_or_crawl(crawl_key(website), _crawl)
+
+        evidence_imgs: List[str] = []
+        crawled_urls = {url for url, _ in site_pages}
+        if best_evidence and best_evidence != website and best_evidence not in crawled_urls:
+            evidence_imgs = await crawl_evidence(best_evidence, crawler, page_cache, discovery)
+
+        # Homepage, then best_evidence, then service pages
+        page_imgs = [imgs for _, imgs in site_pages]
+        for imgs in page_imgs[:1] + [evidence_imgs] + page_imgs[1:]:
             candidate_urls.extend(imgs)
-            logger.debug(f"  {name}: {len(imgs)} imgs from {page_url}")
-
-            if len(pages_to_crawl) < MAX_PAGES:
-                links = extract_service_links(html, page_url)
-                for link in links:
-                    if link not in crawled and len(pages_to_crawl) < MAX_PAGES:
-                        pages_to_crawl.append(link)
 
     # Google Maps photo as fallback (only if no crawled candidates found)
     if not candidate_urls and google_photo_urls:
@@ -643,13 +690,22 @@ async def run(args: argparse.Namespace) -> None:
         follow_redirects=True,
     )
 
+    page_cache = None
+    if not args.no_page_cache and not args.no_crawl:
+        page_cache = PageCache(PAGE_CACHE_DB, ttl_hours=args.cache_ttl_hours)
+    discovery = None
+    if not args.no_sitemap and not args.no_crawl:
+        discovery = SiteDiscovery(DISCOVERY_JSON)
+    shared = None if args.no_share_domains else SharedCrawls()
+
     batch_size = args.batch_size
 
     try:
         async def _process_batch(batch: List[Dict[str, Any]], crawler: Any) -> None:
             tasks = [
                 enrich_provider(
-                    provider, crawler, http_client, vision_client, vision_semaphore, args
+                    provider, crawler, http_client, vision_client, vision_semaphore, args,
+                    page_cache, discovery, shared,
                 )
                 for provider in batch
             ]
@@ -697,12 +753,21 @@ async def run(args: argparse.Namespace) -> None:
 
         if CRAWL4AI_AVAILABLE and not args.no_crawl:
             async with AsyncWebCrawler(verbose=False) as crawler:
+                if not args.no_block_resources:
+                    install_resource_blocking(crawler, "images")
                 await _run_batches(crawler)
         else:
             await _run_batches(None)
 
     finally:
         await http_client.aclose()
+        if page_cache is not None:
+            logger.info(page_cache.summary())
+            await page_cache.aclose()
+        if discovery is not None:
+            await discovery.aclose()
+        if shared is not None:
+            logger.info(shared.summary())
 
     total_processed = len(state["processed_ids"])
     enriched = state["enriched_count"]
@@ -754,6 +819,26 @@ def main() -> None:
         "--no-crawl", action="store_true",
         help="Skip Crawl4AI website crawling (no candidates without Google photo fallback)"
     )
+    parser.add_argument(
+        "--no-page-cache", action="store_true",
+        help="Always crawl live instead of reusing crawler/data/page_cache.sqlite"
+    )
+    parser.add_argument(
+        "--no-share-domains", action="store_true",
+        help="Crawl every listing separately even when several share one website"
+    )
+    parser.add_argument(
+        "--no-sitemap", action="store_true",
+        help="Find service pages from homepage links only (skip robots.txt / sitemap.xml)"
+    )
+    parser.add_argument(
+        "--cache-ttl-hours", type=float, default=DEFAULT_TTL_HOURS,
+        help="Serve cached pages without revalidation for this long"
+    )
+    parser.add_argument(
+        "--no-block-resources", action="store_true",
+        help="Load media, fonts and third-party scripts (blocked by default; images always load)"
+    )
     parser.add_argument(
         "--dry-run", action="store_true",
         help="Discover and filter candidates but skip Vision API calls and DB updates"
@@ -0,0 +1,63 @@
+"""
+Backflow verification terms, weights and tier rules.
+
+Shared by 03_verify_and_enrich.py (which scores pages with them) and
+03_rescore_terms.py (which re-applies them to stored term hits without a
+browser), so both always start from the same table.
+
+Scoring: a page scores the sum of the weights of the distinct terms it
+mentions, capped at MAX_SCORE. A verified site is tier=testing when its score
+reaches the testing threshold and it mentions a TESTING_TIER_TERMS term,
+otherwise tier=service from TIER_SERVICE_DEFAULT up.
+"""
+
+BACKFLOW_TERMS = {
+    # High value terms (exact service names)
+    'backflow testing': 3,
+    'backflow tester': 3,
+    'backflow test': 3,
+    'backflow inspection': 2,
+    'backflow preventer': 2,
+    'backflow prevention': 2,
+    'backflow installation': 2,
+    'backflow repair': 2,
+    'backflow service': 2,
+    'backflow certification': 2,
+    'backflow certified': 2,
+
+    # Medium value terms
+    'cross connection': 1,
+    'cross-connection': 1,
+    'cross connection control': 2,
+    'rpz': 1,
+    'rpz testing': 2,
+    'reduced pressure zone': 1,
+    'reduced pressure': 1,
+    'dcva': 1,
+    'double check valve': 1,
+    'double-check valve': 1,
+    'pvb': 1,
+    'pressure vacuum breaker': 1,
+
+    # Context terms (lower value)
+    'backflow': 1,
+    'back flow': 1,
+    'irrigation backflow': 2,
+    'sprinkler backflow': 2,
+    'test report': 1,
+    'annual test': 1,
+}
+
+TESTING_TIER_TERMS = {
+    'backflow testing', 'backflow tester', 'backflow test',
+    'rpz testing', 'backflow inspection', 'backflow certification',
+    'backflow certified', 'annual backflow test', 'test report',
+    'cross connection control',
+}
+
+MAX_SCORE = 10
+TIER_TESTING_DEFAULT = 4
+TIER_SERVICE_DEFAULT = 2
+
+# Maps score at which 03_verify_and_enrich.py verifies without crawling
+MAPS_CONFIDENCE_DEFAULT = 4
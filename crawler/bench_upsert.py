@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the Supabase writers against a local stand-in.
+
+Two subcommands:
+
+  serve  – start a local project (local_supabase.py: scratch Postgres with
+           supabase/migrations applied behind a PostgREST-compatible
+           endpoint) and print its SUPABASE_URL / SUPABASE_DB_URL, for
+           running a loader against it by hand
+  run    – generate synthetic providers at each --sizes, load them with each
+           of --loaders into an emptied database and report providers/sec,
+           p95 write latency and how many rows landed
+
+Synthetic providers are rows of --input (verified.csv) sampled with
+replacement and given fresh place_ids, names and slugs, so payloads have the
+real column mix and cities. --bad-rate of them carry a review count that
+overflows providers.reviews, which the database rejects.
+
+Loaders:
+
+  upsert, upsert-bulk   04_upsert_supabase.py, PostgREST batches / --bulk
+  load, load-bulk       scripts/load_to_supabase.py, supabase-py batches / --bulk
+  images                per-provider writes of 06_enrich_images_db.py
+  services              per-provider writes of enrich_services_from_website.py
+  reviews               per-provider writes of enrich_reviews_outscraper.py
+
+The script loaders run as separate processes with UPSERT_DATA_DIR /
+LOADER_DATA_DIR pointing at a scratch directory, so the real outputs are
+never touched. The enrichment scripts spend their time crawling and calling
+APIs, so only their database writes are replayed, in-process and one
+provider at a time as the scripts issue them, for the first --writer-limit
+providers (seeded directly into the database first).
+
+--failure-rate answers that share of REST writes with a 503. The table shows
+what each loader makes of it: 04 retries and bisects, load_to_supabase
+parks the whole batch in failed_rows.csv, the enrichment writers log and
+move on (leaving half-written providers, which don't count as landed).
+--bulk loads skip the REST endpoint entirely; one bad row rolls them back.
+
+Latency p95 is measured by the stand-in per write request, injected latency
+included; throughput is providers landed per wall-clock second, process
+start-up and CSV parsing included.
+
+Needs psycopg 3, plus pgserver (pip install pgserver) unless --db-url names
+a Postgres server the benchmark may create a scratch database on. The
+load* and enrichment loaders need supabase-py and are skipped without it.
+
+Usage:
+    python crawler/bench_upsert.py run
+    python crawler/bench_upsert.py run --sizes 1000,10000 --loaders upsert,load --failure-rate 0.05
+    python crawler/bench_upsert.py run --bad-rate 0.001 --latency-ms 40 --json bench_upsert.json
+    python crawler/bench_upsert.py serve --port 54321
+"""
+
+import argparse
+import json
+import logging
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from local_supabase import SERVICE_KEY, LocalSupabase
+
+try:
+    from supabase import create_client
+    SUPABASE_AVAILABLE = True
+except ImportError:
+    SUPABASE_AVAILABLE = False
+
+# Paths
+CRAWLER_DIR = Path(__file__).parent
+DATA_DIR = CRAWLER_DIR / "data"
+INPUT_CSV = DATA_DIR / "verified.csv"
+UPSERT = CRAWLER_DIR / "04_upsert_supabase.py"
+LOAD = CRAWLER_DIR.parent / "scripts" / "load_to_supabase.py"
+
+DEFAULT_SIZES = "1000,10000,100000"
+BAD_REVIEWS = 99_999_999_999    # overflows providers.reviews (integer)
+
+# Input columns either loader reads; the rest of verified.csv is dropped
+BENCH_COLUMNS = [
+    "place_id", "google_id", "name", "phone", "website",
+    "website_clean", "website_domain", "website_missing",
+    "address", "city", "state", "state_code", "postal_code",
+    "latitude", "longitude",
+    "type", "subtypes", "category",
+    "rating", "reviews", "reviews_per_score",
+    "backflow_score", "tier",
+    "best_evidence_url",
+    "location_link", "reviews_link", "location_reviews_link",
+    "photo", "service_tags",
+    "provider_slug", "city_slug",
+]
+SEED_COLUMNS = ["place_id", "name", "city", "state_code", "city_slug", "provider_slug", "latitude", "longitude"]
+
+
+def setup_logging() -> logging.Logger:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    for noisy in ('pgserver', 'httpx'):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+    return logging.getLogger("bench_upsert")
+
+
+# ─── Synthetic providers ──────────────────────────────────────────────────────
+
+def slugify(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text).strip().lower()).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^\w\s-]", "", text)
+    return re.sub(r"[-\s]+", "-", text).strip("-")
+
+
+def synthetic_providers(template: pd.DataFrame, n: int, seed: int = 0, bad_rate: float = 0.0) -> pd.DataFrame:
+    """n rows sampled from template with unique place_ids / names / slugs; bad_rate of them rejected by the DB."""
+    template = template.dropna(subset=["name", "city", "state_code"])
+    df = template.sample(n=n, replace=True, random_state=seed).reset_index(drop=True)
+    df = df[[c for c in BENCH_COLUMNS if c in df.columns]].copy()
+    ids = pd.Series(range(n)).map("{:07d}".format)
+    df["place_id"] = "bench-" + ids
+    df["google_id"] = "0xbench:" + ids
+    # Short enough that the id survives the 50-character cut in the provider slug
+    df["name"] = df["name"].astype(str).str.strip().str[:40].str.strip() + " " + ids
+    df["city_slug"] = df["city"].map(slugify)
+    df["provider_slug"] = (
+        df["name"].map(slugify).str[:50].str.rstrip("-") + "-" + df["city_slug"]
+        + "-" + df["state_code"].astype(str).str.lower()
+    )
+    rng = np.random.default_rng(seed)
+    bad = rng.random(n) < bad_rate
+    df["reviews"] = np.where(bad, BAD_REVIEWS, pd.to_numeric(df.get("reviews"), errors="coerce").fillna(0))
+    df["reviews"] = df["reviews"].astype("int64")
+    return df
+
+
+def seed_rows(df: pd.DataFrame) -> List[Dict]:
+    """Minimal provider rows for the enrichment writers to update."""
+    seed = df[df["reviews"] != BAD_REVIEWS][SEED_COLUMNS].copy()
+    seed["state_code"] = seed["state_code"].astype(str).str.upper().str.strip()
+    return seed.astype(object).where(seed.notna(), None).to_dict("records")
+
+
+# ─── Enrichment writes ────────────────────────────────────────────────────────
+# The supabase-py calls each script makes per provider, in the same order.
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def write_images(client, place_id: str, i: int):
+    """06_enrich_images_db.update_provider_images"""
+    client.table("providers").update(
+        {"image_urls": [f"https://bench-{i}.example.com/img/{k}.jpg" for k in range(3)]}
+    ).eq("place_id", place_id).execute()
+
+
+def write_services(client, place_id: str, i: int):
+    """enrich_services_from_website.process_provider"""
+    client.table("provider_services").upsert({
+        "place_id": place_id,
+        "services_json": {"backflow_testing": True, "rpz_testing": i % 2 == 0, "commercial": i % 3 == 0},
+        "evidence_json": {"backflow_testing": [{"source": "homepage", "url": f"https://bench-{i}.example.com",
+                                                 "snippet": "Certified backflow testing and repair"}]},
+        "updated_at": _now(),
+    }, on_conflict="place_id").execute()
+    client.table("providers").update(
+        {"service_tags": ["Backflow Testing", "RPZ Testing"] if i % 2 == 0 else ["Backflow Testing"]}
+    ).eq("place_id", place_id).execute()
+
+
+def write_reviews(client, place_id: str, i: int):
+    """enrich_reviews_outscraper.process_provider"""
+    text = "Showed up on time, tested both backflow assemblies and filed the paperwork with the city. " * 2
+    rows = [{
+        "place_id": place_id, "rating": 5 - k % 2, "review_text": text, "text_excerpt": text[:200],
+        "author_initials": "J.D.", "relative_time": "2025-06-01",
+        "review_url": f"https://maps.example.com/review/{i}-{k}", "sort_key": "most_relevant",
+        "updated_at": _now(),
+    } for k in range(4)]
+    client.table("provider_reviews").delete().eq("place_id", place_id).execute()
+    client.table("provider_reviews").insert(rows).execute()
+    client.table("providers").update({"top_review_excerpt": rows[0]["text_excerpt"]}).eq("place_id", place_id).execute()
+
+
+# Loader → script + flags, or writer + the query counting providers it fully wrote
+LOADERS: Dict[str, Dict] = {
+    'upsert': {'script': UPSERT, 'flags': []},
+    'upsert-bulk': {'script': UPSERT, 'flags': ['--bulk']},
+    'load': {'script': LOAD, 'flags': [], 'supabase_py': True},
+    'load-bulk': {'script': LOAD, 'flags': ['--bulk'], 'supabase_py': True},
+    'images': {
+        'writer': write_images, 'supabase_py': True,
+        'landed': "SELECT count(*) FROM providers WHERE jsonb_array_length(image_urls) = 3",
+    },
+    'services': {
+        'writer': write_services, 'supabase_py': True,
+        'landed': "SELECT count(*) FROM providers p JOIN provider_services s USING (place_id) "
+                  "WHERE cardinality(p.service_tags) > 0",
+    },
+    'reviews': {
+        'writer': write_reviews, 'supabase_py': True,
+        'landed': "SELECT count(*) FROM providers p WHERE top_review_excerpt IS NOT NULL "
+                  "AND (SELECT count(*) FROM provider_reviews r WHERE r.place_id = p.place_id) = 4",
+    },
+}
+DEFAULT_LOADERS = ','.join(LOADERS)
+
+
+# ─── serve ────────────────────────────────────────────────────────────────────
+
+def local_project(args, port: int = 0) -> LocalSupabase:
+    return LocalSupabase(
+        db_url=args.db_url,
+        port=port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+
+
+def cmd_serve(args, logger: logging.Logger):
+    with local_project(args, port=args.port) as local:
+        applied, skipped = local.migrations
+        logger.info(f"{len(applied)} migrations applied"
+                    + (f", skipped {', '.join(skipped)}" if skipped else ""))
+        print(f"SUPABASE_URL={local.server.url}")
+        print(f"SUPABASE_SERVICE_ROLE_KEY={SERVICE_KEY}")
+        print(f"SUPABASE_DB_URL={local.db_url}")
+        logger.info("Serving (Ctrl-C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            logger.info(local.server.summary())
+
+
+# ─── run ──────────────────────────────────────────────────────────────────────
+
+def count_csv_rows(path: Path) -> int:
+    if not path.exists() or path.stat().st_size == 0:
+        return 0
+    return len(pd.read_csv(path, usecols=["place_id"], low_memory=False))
+
+
+def run_script(spec: Dict, local: LocalSupabase, csv_path: Path, data_dir: Path, logger: logging.Logger) -> Dict:
+    """One loader process against the local project; returns wall time, exit code and rejected rows."""
+    env = {**local.env(), 'UPSERT_DATA_DIR': str(data_dir), 'LOADER_DATA_DIR': str(data_dir)}
+    if spec['script'] == LOAD:
+        shutil.copy(csv_path, data_dir / "providers_final.csv")
+        cmd = [sys.executable, str(LOAD), *spec['flags']]
+        rejects = data_dir / "failed_rows.csv"
+    else:
+        cmd = [sys.executable, str(UPSERT), '--input', str(csv_path), *spec['flags']]
+        rejects = data_dir / "upsert_rejects.csv"
+
+    log_path = data_dir / "output.log"
+    started = time.perf_counter()
+    with open(log_path, 'w') as log:
+        proc = subprocess.run(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        tail = log_path.read_text(errors='replace').strip().splitlines()[-3:]
+        logger.warning(f"  exited with {proc.returncode}: " + " | ".join(line.strip() for line in tail))
+    return {'exit_code': proc.returncode, 'wall_s': wall, 'rejected': count_csv_rows(rejects)}
+
+
+def run_writer(writer: Callable, local: LocalSupabase, place_ids: List[str]) -> Dict:
+    """Replay an enrichment script's writes for place_ids; failures are counted, as the scripts log them."""
+    client = create_client(local.server.url, SERVICE_KEY)
+    failed = 0
+    started = time.perf_counter()
+    for i, place_id in enumerate(place_ids):
+        try:
+            writer(client, place_id, i)
+        except Exception:
+            failed += 1
+    return {'exit_code': 0, 'wall_s': time.perf_counter() - started, 'rejected': failed}
+
+
+def cmd_run(args, logger: logging.Logger):
+    input_path = Path(args.input)
+    if not input_path.exists():
+        logger.error(f"Template input not found: {input_path}")
+        sys.exit(1)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    loaders = [name.strip() for name in args.loaders.split(',') if name.strip()]
+    unknown = [name for name in loaders if name not in LOADERS]
+    if unknown:
+        logger.error(f"Unknown loader(s): {', '.join(unknown)} (choose from {', '.join(LOADERS)})")
+        sys.exit(1)
+    if not SUPABASE_AVAILABLE:
+        skipped = [name for name in loaders if LOADERS[name].get('supabase_py')]
+        if skipped:
+            logger.warning(f"supabase-py not installed (pip install supabase) — skipping {', '.join(skipped)}")
+        loaders = [name for name in loaders if not LOADERS[name].get('supabase_py')]
+
+    template = pd.read_csv(input_path, low_memory=False)
+    scratch = Path(tempfile.mkdtemp(prefix="bench_upsert_"))
+    results = []
+    try:
+        with local_project(args) as local:
+            applied, skipped = local.migrations
+            logger.info(f"Local project on {local.server.url}: {len(applied)} migrations applied"
+                        + (f", skipped {', '.join(skipped)}" if skipped else "")
+                        + f" (latency {args.latency_ms:g}±{args.jitter_ms:g} ms, "
+                        f"write failures {args.failure_rate:.0%}, bad rows {args.bad_rate:.2%})")
+
+            for size in sizes:
+                df = synthetic_providers(template, size, seed=args.seed, bad_rate=args.bad_rate)
+                csv_path = scratch / f"providers_{size}.csv"
+                df.to_csv(csv_path, index=False)
+                bad = int((df["reviews"] == BAD_REVIEWS).sum())
+
+                for name in loaders:
+                    spec = LOADERS[name]
+                    local.reset()
+                    data_dir = scratch / f"{name}_{size}"
+                    data_dir.mkdir()
+                    if 'writer' in spec:
+                        seeds = seed_rows(df)[:args.writer_limit]
+                        local.insert("providers", seeds)
+                        local.server.reset_stats()
+                        rows, expected = len(seeds), len(seeds)
+                        logger.info(f"[{name} {size:,}] replaying writes for {rows:,} providers")
+                        measured = run_writer(spec['writer'], local, [s["place_id"] for s in seeds])
+                        landed = local.scalar(spec['landed'])
+                    else:
+                        rows, expected = size, size - bad
+                        logger.info(f"[{name} {size:,}] {spec['script'].name} {' '.join(spec['flags'])}".rstrip())
+                        measured = run_script(spec, local, csv_path, data_dir, logger)
+                        landed = local.scalar("SELECT count(*) FROM providers")
+
+                    server = local.server
+                    wall = measured['wall_s']
+                    results.append({
+                        'loader': name,
+                        'size': size,
+                        'rows': rows,
+                        'expected': expected,
+                        'landed': landed,
+                        'missing': expected - landed,
+                        **measured,
+                        'rows_per_s': landed / wall if wall else 0.0,
+                        'writes': server.stats['writes'],
+                        'write_p95_ms': server.latency_p95() * 1000,
+                        'injected_failures': server.stats['injected_failures'],
+                    })
+                    logger.info(f"  {landed:,}/{expected:,} landed in {wall:.1f}s; {server.summary()}")
+    finally:
+        if args.keep:
+            logger.info(f"Kept scratch data in {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    print()
+    print(f"{'loader':13}{'size':>9}{'landed':>9}{'missing':>9}{'rejected':>10}{'rows/s':>9}"
+          f"{'wall s':>8}{'writes':>8}{'p95 ms':>8}{'injected':>10}")
+    for r in results:
+        p95 = f"{r['write_p95_ms']:.0f}" if r['writes'] else "-"
+        print(f"{r['loader']:13}{r['size']:>9,}{r['landed']:>9,}{r['missing']:>9,}{r['rejected']:>10,}"
+              f"{r['rows_per_s']:>9,.0f}{r['wall_s']:>8.1f}{r['writes']:>8,}{p95:>8}{r['injected_failures']:>10,}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': {k: v for k, v in vars(args).items() if k != 'func'}, 'results': results},
+                      f, indent=2)
+        logger.info(f"Wrote {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Supabase stand-in and loader throughput benchmark')
+    parser.add_argument('--db-url', default=None,
+                        help='Postgres server to create the scratch database on (default: start one with pgserver)')
+    parser.add_argument('--seed', type=int, default=0, help='Sampling / failure injection seed (default: 0)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for name, func, help_text in (
+        ('serve', cmd_serve, 'Run a local project for loaders to write to'),
+        ('run', cmd_run, 'Benchmark the loaders against a local project'),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--latency-ms', type=float, default=0 if name == 'serve' else 20,
+                       help=f"Added latency per request (default: {0 if name == 'serve' else 20})")
+        p.add_argument('--jitter-ms', type=float, default=0 if name == 'serve' else 5,
+                       help=f"Uniform ± jitter on the latency (default: {0 if name == 'serve' else 5})")
+        p.add_argument('--failure-rate', type=float, default=0.0, help='Writes answered 503 (0-1)')
+        p.set_defaults(func=func)
+        if name == 'serve':
+            p.add_argument('--port', type=int, default=54321, help='Listen port (default: 54321)')
+        else:
+            p.add_argument('--input', default=str(INPUT_CSV), help='CSV to sample synthetic providers from')
+            p.add_argument('--sizes', default=DEFAULT_SIZES,
+                           help=f"Comma-separated provider counts (default: {DEFAULT_SIZES})")
+            p.add_argument('--loaders', default=DEFAULT_LOADERS,
+                           help=f"Comma-separated loaders (default: {DEFAULT_LOADERS})")
+            p.add_argument('--bad-rate', type=float, default=0.0, help='Rows the database rejects (0-1)')
+            p.add_argument('--writer-limit', type=int, default=1000,
+                           help='Providers per enrichment writer run (default: 1000)')
+            p.add_argument('--json', help='Also write the results to this JSON file')
+            p.add_argument('--keep', action='store_true', help='Keep the scratch CSVs and loader outputs')
+
+    args = parser.parse_args()
+    args.func(args, setup_logging())
+
+
+if __name__ == "__main__":
+    main()
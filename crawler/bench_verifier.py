@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for 03_verify_and_enrich.py.
+
+Three subcommands:
+
+  record  – sample providers with websites from clean_places.csv and record
+            their homepage, robots.txt, sitemaps, top service pages and JS/CSS
+            into a fixture corpus (crawler/data/fixtures/ by default)
+  serve   – run the replay proxy on a fixed port, for poking at by hand
+  run     – replay the corpus through the verifier once per crawl mode and
+            report sites/minute, pages/site, peak RSS and CPU time
+
+Each benchmark run is a separate verifier process with VERIFIER_DATA_DIR set
+to a scratch directory, so the real outputs, caches and history are never
+touched. Page loads go through --proxy and httpx side fetches through
+HTTP_PROXY, both pointing at the replay server; nothing reaches the network.
+
+Peak RSS is the largest single process in the run's tree (the browser
+included) and CPU time is user + system for the whole tree, both from
+os.wait4().
+
+Usage:
+    python crawler/bench_verifier.py record --sites 50
+    python crawler/bench_verifier.py run --latency-ms 150 --jitter-ms 100 --failure-rate 0.02
+    python crawler/bench_verifier.py run --modes serial,default --dead-rate 0.1 --json bench.json
+    python crawler/bench_verifier.py serve --port 8899
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from fixture_corpus import FixtureCorpus, ReplayServer, record_sites, replay_env
+
+# Paths
+CRAWLER_DIR = Path(__file__).parent
+DATA_DIR = CRAWLER_DIR / "data"
+INPUT_CSV = DATA_DIR / "clean_places.csv"
+FIXTURES_DIR = DATA_DIR / "fixtures"
+VERIFIER = CRAWLER_DIR / "03_verify_and_enrich.py"
+
+# Crawl modes: verifier flags, and whether to measure a second run over a warm page cache
+MODES: Dict[str, Dict] = {
+    'serial': {
+        'flags': ['--page-concurrency', '1', '--no-sitemap', '--no-share-domains',
+                  '--no-domain-health', '--no-page-cache', '--maps-confidence', '0'],
+    },
+    'default': {'flags': []},
+    'cached': {'flags': [], 'warm': True},
+    'workers': {'flags': ['--workers', '4']},
+}
+DEFAULT_MODES = 'serial,default,cached'
+
+
+def setup_logging() -> logging.Logger:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    return logging.getLogger("bench_verifier")
+
+
+# ─── record / serve ───────────────────────────────────────────────────────────
+
+def cmd_record(args, logger: logging.Logger):
+    df = pd.read_csv(args.input, low_memory=False)
+    df = df[df['website'].notna() & (df['website'].astype(str).str.strip() != '')]
+    sample = df.sample(n=min(args.sites, len(df)), random_state=args.seed)
+    corpus = FixtureCorpus(Path(args.corpus))
+
+    logger.info(f"Recording {len(sample):,} sites into {args.corpus}")
+    started = time.monotonic()
+    asyncio.run(record_sites(corpus, sample, pages_per_site=args.pages, assets_per_site=args.assets))
+    logger.info(f"Done in {time.monotonic() - started:.0f}s; {corpus.summary()}")
+
+
+def replay_server(args, corpus: FixtureCorpus, port: int = 0) -> ReplayServer:
+    return ReplayServer(
+        corpus,
+        port=port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        dead_rate=args.dead_rate,
+        seed=args.seed,
+    )
+
+
+def cmd_serve(args, logger: logging.Logger):
+    server = replay_server(args, FixtureCorpus(Path(args.corpus)), port=args.port)
+    logger.info(f"Replaying {args.corpus} on http://127.0.0.1:{args.port} (Ctrl-C to stop)")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info(server.summary())
+
+
+# ─── run ──────────────────────────────────────────────────────────────────────
+
+def start_in_thread(server: ReplayServer) -> asyncio.AbstractEventLoop:
+    """Run the replay server on its own event loop so the benchmark can block on children."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_run, daemon=True).start()
+    ready.wait()
+    return loop
+
+
+def replay_input(corpus: FixtureCorpus, path: Path):
+    """Corpus sites with http:// websites, so page loads stay on the plain-HTTP proxy."""
+    sites = corpus.sites()
+    sites['website'] = sites['website'].astype(str).str.strip().str.replace(
+        r'^(https?://)?', 'http://', regex=True
+    )
+    sites.to_csv(path, index=False)
+
+
+def run_verifier(args, flags: List[str], data_dir: Path, input_csv: Path, proxy_url: str) -> Dict:
+    """One verifier process; returns wall time, CPU time and peak RSS."""
+    cmd = [
+        sys.executable, str(VERIFIER), '--input', str(input_csv), '--batch-size', str(args.batch_size),
+        '--max-pages', str(args.max_pages), '--timeout', str(args.timeout), '--sleep', '0',
+        '--proxy', proxy_url, *flags,
+    ]
+    env = {**replay_env(proxy_url), 'VERIFIER_DATA_DIR': str(data_dir)}
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return {
+        'exit_code': proc.returncode,
+        'wall_s': time.perf_counter() - started,
+        'cpu_s': usage.ru_utime + usage.ru_stime,
+        'peak_rss_mb': rss_mb,
+    }
+
+
+def output_stats(data_dir: Path) -> Dict:
+    """Sites processed, verified and pages crawled, from a run's outputs."""
+    frames = {}
+    for key, name in (('verified', "verified.csv"), ('rejected', "rejected_by_verifier.csv")):
+        path = data_dir / name
+        if path.exists() and path.stat().st_size > 0:
+            frames[key] = pd.read_csv(path, usecols=lambda c: c in {'place_id', 'pages_crawled'}, low_memory=False)
+    if not frames:
+        return {'sites': 0, 'verified': 0, 'pages': 0}
+    rows = pd.concat(frames.values(), ignore_index=True)
+    return {
+        'sites': len(rows),
+        'verified': len(frames.get('verified', [])),
+        'pages': int(pd.to_numeric(rows.get('pages_crawled'), errors='coerce').fillna(0).sum()),
+    }
+
+
+def cmd_run(args, logger: logging.Logger):
+    corpus = FixtureCorpus(Path(args.corpus))
+    if not corpus.sites_path.exists():
+        logger.error(f"No fixture corpus at {args.corpus}; run 'bench_verifier.py record' first")
+        sys.exit(1)
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        logger.error(f"Unknown mode(s): {', '.join(unknown)} (choose from {', '.join(MODES)})")
+        sys.exit(1)
+
+    server = replay_server(args, corpus)
+    loop = start_in_thread(server)
+    logger.info(f"{corpus.summary()}; replay proxy on {server.proxy_url} "
+                f"(latency {args.latency_ms:g}±{args.jitter_ms:g} ms, failures {args.failure_rate:.0%}, "
+                f"dead hosts {args.dead_rate:.0%})")
+
+    results = []
+    try:
+        for mode in modes:
+            spec = MODES[mode]
+            data_dir = Path(tempfile.mkdtemp(prefix=f"bench_{mode}_"))
+            try:
+                input_csv = data_dir / "bench_input.csv"
+                replay_input(corpus, input_csv)
+                if spec.get('warm'):
+                    logger.info(f"[{mode}] warming the page cache")
+                    run_verifier(args, spec['flags'], data_dir, input_csv, server.proxy_url)
+
+                logger.info(f"[{mode}] running: {' '.join(spec['flags']) or '(defaults)'}")
+                measured = run_verifier(args, spec['flags'], data_dir, input_csv, server.proxy_url)
+                stats = output_stats(data_dir)
+            finally:
+                if not args.keep:
+                    shutil.rmtree(data_dir, ignore_errors=True)
+
+            sites = stats['sites']
+            results.append({
+                'mode': mode,
+                **measured,
+                **stats,
+                'sites_per_min': sites / measured['wall_s'] * 60 if measured['wall_s'] else 0.0,
+                'pages_per_site': stats['pages'] / sites if sites else 0.0,
+            })
+            if measured['exit_code'] != 0:
+                logger.warning(f"[{mode}] verifier exited with {measured['exit_code']}")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+
+    logger.info(server.summary())
+    print()
+    print(f"{'mode':10}{'sites':>7}{'verified':>10}{'sites/min':>11}{'pages/site':>12}"
+          f"{'wall s':>9}{'CPU s':>9}{'peak RSS MB':>13}")
+    for r in results:
+        print(f"{r['mode']:10}{r['sites']:>7,}{r['verified']:>10,}{r['sites_per_min']:>11.1f}"
+              f"{r['pages_per_site']:>12.2f}{r['wall_s']:>9.1f}{r['cpu_s']:>9.1f}{r['peak_rss_mb']:>13.0f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': {k: v for k, v in vars(args).items() if k != 'func'}, 'results': results},
+                      f, indent=2)
+        logger.info(f"Wrote {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline fixture corpus and verifier throughput benchmark')
+    parser.add_argument('--corpus', default=str(FIXTURES_DIR), help='Fixture corpus directory')
+    parser.add_argument('--seed', type=int, default=0, help='Sampling / failure injection seed (default: 0)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='Record a sample of provider sites into the corpus')
+    rec.add_argument('--input', default=str(INPUT_CSV), help='Input CSV to sample from')
+    rec.add_argument('--sites', type=int, default=50, help='Sites to sample (default: 50)')
+    rec.add_argument('--pages', type=int, default=6, help='Service pages recorded per site (default: 6)')
+    rec.add_argument('--assets', type=int, default=20, help='Scripts/stylesheets recorded per site (default: 20)')
+    rec.set_defaults(func=cmd_record)
+
+    for name, func, help_text in (
+        ('serve', cmd_serve, 'Run the replay proxy'),
+        ('run', cmd_run, 'Benchmark the verifier against the replay proxy'),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--latency-ms', type=float, default=100, help='Added latency per response (default: 100)')
+        p.add_argument('--jitter-ms', type=float, default=50, help='Uniform ± jitter on the latency (default: 50)')
+        p.add_argument('--failure-rate', type=float, default=0.0, help='Requests answered 503 / dropped (0-1)')
+        p.add_argument('--dead-rate', type=float, default=0.0, help='Hosts that drop every connection (0-1)')
+        p.set_defaults(func=func)
+        if name == 'serve':
+            p.add_argument('--port', type=int, default=8899, help='Listen port (default: 8899)')
+        else:
+            p.add_argument('--modes', default=DEFAULT_MODES,
+                           help=f"Comma-separated crawl modes: {', '.join(MODES)} (default: {DEFAULT_MODES})")
+            p.add_argument('--batch-size', type=int, default=25, help='Verifier --batch-size (default: 25)')
+            p.add_argument('--max-pages', type=int, default=4, help='Verifier --max-pages (default: 4)')
+            p.add_argument('--timeout', type=int, default=30, help='Verifier --timeout (default: 30)')
+            p.add_argument('--json', help='Also write the results to this JSON file')
+            p.add_argument('--keep', action='store_true', help='Keep each mode\'s scratch data directory')
+
+    args = parser.parse_args()
+    args.func(args, setup_logging())
+
+
+if __name__ == "__main__":
+    main()
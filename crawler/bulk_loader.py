@@ -0,0 +1,228 @@
+"""
+Bulk loader: COPY into unlogged staging tables, then one set-based merge per table.
+
+For first loads and full rebuilds PostgREST's JSON batches are the bottleneck,
+not the database. --bulk (04_upsert_supabase.py, scripts/load_to_supabase.py)
+talks to Postgres directly instead:
+
+  1. COPY the prepared payloads into UNLOGGED tables in the `loader` schema
+     (not exposed through the API; no WAL for the staged copy)
+  2. INSERT INTO providers ... SELECT FROM loader.stage_providers
+     ON CONFLICT (place_id) DO UPDATE — likewise provider_services. The
+     city rollup triggers (migration 020) update cities from the merge
+  3. COMMIT — everything lands or nothing does
+
+A dry run performs every step and rolls back, so it reports exact insert /
+update counts. One bad row fails the whole load with the database's error;
+load without --bulk to have it bisected out (upsert_engine.py).
+
+Requires psycopg 3 (pip install "psycopg[binary]") and a direct connection
+string: --db-url, or SUPABASE_DB_URL / DATABASE_URL in .env
+(Supabase dashboard → Project Settings → Database → Connection string).
+Works the same against a local Postgres with supabase/migrations applied.
+
+Usage:
+    with BulkLoader(db_url, logger) as loader:
+        remote = loader.remote_hashes(place_ids)
+        stats = loader.load(provider_payloads, service_rows, dry_run=False)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg.types.json import Jsonb
+    PSYCOPG_AVAILABLE = True
+except ImportError:
+    PSYCOPG_AVAILABLE = False
+
+STAGE_SCHEMA = "loader"
+JSONB_COLS = {"image_urls", "reviews_per_score", "services_json"}
+
+# table → (conflict columns, staging table DDL body). providers is staged
+# LIKE providers so new columns are picked up without touching this file.
+STAGES = {
+    "providers": ("place_id", None),
+    "provider_services": ("place_id", "place_id text, services_json jsonb"),
+}
+
+
+class BulkLoadError(Exception):
+    """The load was rolled back; message carries the table and the database's error."""
+
+
+def db_url_from_env() -> str:
+    return os.environ.get("SUPABASE_DB_URL", "") or os.environ.get("DATABASE_URL", "")
+
+
+@dataclass
+class BulkStats:
+    inserted: Dict[str, int] = field(default_factory=dict)
+    updated: Dict[str, int] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    committed: bool = False
+    cities_rebuilt: Optional[int] = None
+
+    def summary(self, table: str) -> str:
+        return (
+            f"{table}: {self.inserted.get(table, 0):,} inserted, {self.updated.get(table, 0):,} updated "
+            f"(copy {self.timings.get(f'copy {table}', 0):.2f}s, merge {self.timings.get(f'merge {table}', 0):.2f}s)"
+        )
+
+
+class BulkLoader:
+    """One direct Postgres connection; load() is a single transaction."""
+
+    def __init__(self, db_url: str, logger: Optional[logging.Logger] = None):
+        if not PSYCOPG_AVAILABLE:
+            raise RuntimeError('--bulk needs psycopg 3: pip install "psycopg[binary]"')
+        if not db_url:
+            raise RuntimeError("--bulk needs --db-url or SUPABASE_DB_URL / DATABASE_URL")
+        self.db_url = db_url
+        self.logger = logger or logging.getLogger(__name__)
+        self.conn = None
+
+    def __enter__(self) -> 'BulkLoader':
+        self.conn = psycopg.connect(self.db_url)
+        return self
+
+    def __exit__(self, *exc):
+        self.conn.close()
+
+    @property
+    def source(self) -> str:
+        """host:port/dbname, without credentials — identifies the database for the slug index."""
+        info = self.conn.info
+        return f"postgresql://{info.host}:{info.port}/{info.dbname}"
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def remote_hashes(self, place_ids: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """{place_id: content_hash} for providers already in the DB (None if there is no hash column)."""
+        try:
+            with self.conn.transaction():
+                rows = self.conn.execute(
+                    "SELECT place_id, content_hash FROM providers WHERE place_id = ANY(%s)", (place_ids,)
+                ).fetchall()
+        except psycopg.errors.UndefinedColumn:
+            return None
+        return {pid: h for pid, h in rows}
+
+    def slug_rows(self, since: Optional[str]) -> List[Dict[str, str]]:
+        """{place_id, provider_slug, updated_at} for providers updated at or after since (all if None)."""
+        query = "SELECT place_id, provider_slug, updated_at FROM providers"
+        params: tuple = ()
+        if since:
+            query += " WHERE updated_at >= %s"
+            params = (since,)
+        with self.conn.transaction():
+            rows = self.conn.execute(query + " ORDER BY updated_at, place_id", params).fetchall()
+        return [
+            {'place_id': pid, 'provider_slug': slug, 'updated_at': ts.isoformat() if ts else None}
+            for pid, slug, ts in rows
+        ]
+
+    # ── Load ─────────────────────────────────────────────────────────────────
+
+    def _stage(self, table: str) -> sql.Identifier:
+        stage = sql.Identifier(STAGE_SCHEMA, f"stage_{table}")
+        _, ddl = STAGES[table]
+        if ddl is None:
+            body = sql.SQL("(LIKE {} INCLUDING DEFAULTS)").format(sql.Identifier(table))
+        else:
+            body = sql.SQL("(" + ddl + ")")
+        # Recreated per load so it always matches the live table's columns; DROP holds
+        # an exclusive lock until commit, so concurrent loads queue up
+        self.conn.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(stage))
+        self.conn.execute(sql.SQL("CREATE UNLOGGED TABLE {} {}").format(stage, body))
+        return stage
+
+    def _copy(self, stage: sql.Identifier, cols: List[str], rows: List[Dict[str, Any]]):
+        started = time.perf_counter()
+        jsonb = [c in JSONB_COLS for c in cols]
+        copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+            stage, sql.SQL(", ").join(map(sql.Identifier, cols))
+        )
+        with self.conn.cursor().copy(copy_sql) as copy:
+            for row in rows:
+                copy.write_row([
+                    Jsonb(row.get(c)) if j and row.get(c) is not None else row.get(c)
+                    for c, j in zip(cols, jsonb)
+                ])
+        return time.perf_counter() - started
+
+    def _merge(self, table: str, cols: List[str], select: sql.Composable) -> tuple[int, int]:
+        conflict, _ = STAGES[table]
+        keys = {k.strip() for k in conflict.split(",")}
+        updates = sql.SQL(", ").join(
+            sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in cols if c not in keys
+        )
+        query = sql.SQL(
+            "WITH merged AS (INSERT INTO {table} ({cols}) {select} "
+            "ON CONFLICT ({conflict}) DO UPDATE SET {updates} RETURNING (xmax = 0) AS inserted) "
+            "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged"
+        ).format(
+            table=sql.Identifier(table),
+            cols=sql.SQL(", ").join(map(sql.Identifier, cols)),
+            select=select,
+            conflict=sql.SQL(", ").join(map(sql.Identifier, [k.strip() for k in conflict.split(",")])),
+            updates=updates,
+        )
+        inserted, updated = self.conn.execute(query).fetchone()
+        return inserted, updated
+
+    def _load_table(self, table: str, rows: List[Dict[str, Any]], stats: BulkStats):
+        if not rows:
+            return
+        cols = list(rows[0].keys())
+        stage = self._stage(table)
+        stats.timings[f"copy {table}"] = self._copy(stage, cols, rows)
+
+        started = time.perf_counter()
+        select = sql.SQL("SELECT {} FROM {}").format(sql.SQL(", ").join(map(sql.Identifier, cols)), stage)
+        inserted, updated = self._merge(table, cols, select)
+        stats.timings[f"merge {table}"] = time.perf_counter() - started
+        stats.inserted[table], stats.updated[table] = inserted, updated
+        self.logger.info(f"  {stats.summary(table)}")
+
+    def load(
+        self,
+        providers: List[Dict[str, Any]],
+        services: List[Dict[str, Any]],
+        dry_run: bool = False,
+        rebuild_cities: bool = False,
+    ) -> BulkStats:
+        """Stage and merge both tables in one transaction (rolled back on dry_run).
+
+        rebuild_cities also recomputes every city from providers (rebuild_city_rollup, migration 020).
+        """
+        stats = BulkStats()
+        started = time.perf_counter()
+        table = None
+        try:
+            self.conn.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(STAGE_SCHEMA)))
+            for table, rows in (("providers", providers), ("provider_services", services)):
+                self._load_table(table, rows, stats)
+            if rebuild_cities:
+                table = "cities"
+                stats.cities_rebuilt = self.conn.execute("SELECT rebuild_city_rollup()").fetchone()[0]
+            if dry_run:
+                self.conn.rollback()
+            else:
+                self.conn.commit()
+                stats.committed = True
+        except psycopg.Error as exc:
+            self.conn.rollback()
+            raise BulkLoadError(f"{table or 'setup'}: {exc}".strip()) from exc
+        except BaseException:
+            self.conn.rollback()
+            raise
+        stats.timings["total"] = time.perf_counter() - started
+        return stats
@@ -0,0 +1,89 @@
+"""
+Stable content hashes of provider payloads, so unchanged rows are not re-sent.
+
+Every upsert used to re-send every row of the CSV. Each of those writes fires
+the providers_updated_at trigger, which invalidates downstream caches even
+when nothing changed. Instead:
+
+  content_hash() – sha1 of the normalized payload (the exact dict sent to
+                   PostgREST) as canonical JSON: sorted keys, no whitespace
+  providers.content_hash (migration 018) stores the hash written last
+  diff_payloads() – splits payloads against the remote hashes into inserts
+                   (place_id not in the table), updates (hash differs or was
+                   never stored) and unchanged rows
+
+Only inserts and updates are sent. Columns the upsert does not write (e.g.
+enrichment output) are not part of the hash, so skipping a row never
+overwrites them.
+
+Usage:
+    add_hashes(payloads)
+    remote = {r["place_id"]: r["content_hash"] for r in fetched_rows}
+    diff = diff_payloads(payloads, remote)
+    print(diff.summary())
+    send(diff.changed)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+HASH_COLUMN = "content_hash"
+KEY_COLUMN = "place_id"
+
+
+def content_hash(payload: Dict[str, Any]) -> str:
+    """sha1 over the payload's canonical JSON, ignoring any stored hash."""
+    body = {k: v for k, v in payload.items() if k != HASH_COLUMN}
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def add_hashes(payloads: List[Dict[str, Any]]):
+    """Set payload[HASH_COLUMN] on every payload, in place."""
+    for payload in payloads:
+        payload[HASH_COLUMN] = content_hash(payload)
+
+
+@dataclass
+class ContentDiff:
+    inserts: List[Dict[str, Any]] = field(default_factory=list)
+    updates: List[Dict[str, Any]] = field(default_factory=list)
+    unchanged: List[Dict[str, Any]] = field(default_factory=list)
+    compared: bool = True     # False when no remote hashes were available
+
+    @property
+    def changed(self) -> List[Dict[str, Any]]:
+        return self.inserts + self.updates
+
+    def summary(self) -> str:
+        if not self.compared:
+            return f"{len(self.changed):,} rows (no remote hashes to compare against — sending all)"
+        return (
+            f"{len(self.inserts):,} to insert, {len(self.updates):,} to update, "
+            f"{len(self.unchanged):,} unchanged"
+        )
+
+
+def diff_payloads(payloads: List[Dict[str, Any]], remote: Optional[Dict[str, Optional[str]]]) -> ContentDiff:
+    """Split hashed payloads by what the remote table holds.
+
+    remote maps place_id → stored hash (None for rows written before hashes
+    existed). remote=None means the hashes couldn't be read: everything is
+    an update.
+    """
+    if remote is None:
+        return ContentDiff(updates=list(payloads), compared=False)
+    diff = ContentDiff()
+    for payload in payloads:
+        key = str(payload[KEY_COLUMN])
+        if key not in remote:
+            diff.inserts.append(payload)
+        elif remote[key] != payload[HASH_COLUMN]:
+            diff.updates.append(payload)
+        else:
+            diff.unchanged.append(payload)
+    return diff
@@ -0,0 +1,223 @@
+"""
+Resource-blocking crawl profiles for Crawl4AI.
+
+The verifier and enrichers only need page HTML / text, but a full browser load
+pulls every image, font, video, analytics script and chat widget on the page.
+A profile installs a Playwright route handler on each page that aborts requests
+for blocked resource types and known third-party trackers before they leave
+the browser.
+
+Profiles:
+  text    – page text + links only (verifier, services enrichment). Only
+            trackers are blocked among scripts: jQuery from a public CDN or a
+            JS-rendered theme can be all that puts text on the page
+  images  – lets images through, blocks media, fonts and third-party scripts
+            (image enrichers)
+
+block_third_party_scripts=True opts the text profile into the images
+behaviour. Scripts from SITE_BUILDER_HOSTS always load: Wix, Squarespace and
+similar builders render the page from their own CDN.
+
+Usage:
+    from crawl_profiles import install_resource_blocking
+
+    async with AsyncWebCrawler(verbose=False) as crawler:
+        install_resource_blocking(crawler, "text")
+        result = await crawler.arun(url=...)
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# ─── Profiles ─────────────────────────────────────────────────────────────────
+
+# Playwright request.resource_type values
+RESOURCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "text": {
+        "blocked_types": frozenset({
+            "image", "media", "font", "texttrack", "eventsource", "websocket", "manifest",
+        }),
+        "block_third_party_scripts": False,
+    },
+    "images": {
+        "blocked_types": frozenset({
+            "media", "font", "texttrack", "eventsource", "websocket", "manifest",
+        }),
+        "block_third_party_scripts": True,
+    },
+}
+
+DEFAULT_PROFILE = "text"
+
+# Hosts (and their subdomains) that never contribute page content:
+# analytics, ad networks, tag managers, session recorders, chat widgets.
+TRACKER_HOSTS: FrozenSet[str] = frozenset({
+    # Analytics / tag managers
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com",
+    "googlesyndication.com", "doubleclick.net", "analytics.google.com",
+    "segment.com", "segment.io", "mixpanel.com", "heapanalytics.com",
+    "amplitude.com", "quantserve.com", "scorecardresearch.com",
+    "clarity.ms", "bat.bing.com",
+    # Session recording / heatmaps
+    "hotjar.com", "hotjar.io", "fullstory.com", "mouseflow.com", "crazyegg.com",
+    "luckyorange.com", "inspectlet.com",
+    # Social pixels / embeds
+    "connect.facebook.net", "facebook.net", "ads-twitter.com", "analytics.tiktok.com",
+    "snap.licdn.com", "px.ads.linkedin.com", "pinimg.com",
+    # Chat widgets / call tracking
+    "intercom.io", "intercomcdn.com", "drift.com", "driftt.com", "tawk.to",
+    "livechatinc.com", "zopim.com", "zdassets.com", "olark.com", "crisp.chat",
+    "podium.com", "birdeye.com", "callrail.com", "calltrk.com", "leadconnectorhq.com",
+    "ngage.ly", "apexchat.net",
+    # Video players
+    "youtube.com", "ytimg.com", "vimeo.com", "vimeocdn.com", "wistia.com", "wistia.net",
+    # Review / reputation badges
+    "trustpilot.com", "yotpo.com",
+})
+
+# Website builders whose pages are rendered client-side from these hosts;
+# their scripts are never treated as third-party.
+SITE_BUILDER_HOSTS: FrozenSet[str] = frozenset({
+    "parastorage.com", "wixstatic.com", "wix.com",              # Wix
+    "squarespace.com", "squarespace-cdn.com", "sqspcdn.com",   # Squarespace
+    "weebly.com", "editmysite.com",                            # Weebly / Square Online
+    "wsimg.com",                                               # GoDaddy Websites
+    "cdn-website.com", "multiscreensite.com",                  # Duda
+    "website-files.com",                                       # Webflow
+})
+
+
+# ─── Matching ─────────────────────────────────────────────────────────────────
+
+
+def _host(url: str) -> str:
+    try:
+        host = urlparse(url).hostname or ""
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _in_hosts(host: str, hosts: FrozenSet[str]) -> bool:
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        if ".".join(parts[i:]) in hosts:
+            return True
+    return False
+
+
+def is_tracker_host(host: str) -> bool:
+    """True if host (or any parent domain) is in TRACKER_HOSTS."""
+    return _in_hosts(host, TRACKER_HOSTS)
+
+
+def is_site_builder_host(host: str) -> bool:
+    """True if host (or any parent domain) is in SITE_BUILDER_HOSTS."""
+    return _in_hosts(host, SITE_BUILDER_HOSTS)
+
+
+def _same_site(host: str, site_host: str) -> bool:
+    return host == site_host or host.endswith("." + site_host) or site_host.endswith("." + host)
+
+
+def should_block(
+    resource_type: str,
+    request_url: str,
+    site_host: Optional[str],
+    profile: str = DEFAULT_PROFILE,
+    block_third_party_scripts: Optional[bool] = None,
+) -> bool:
+    """Decide whether a browser request should be aborted under a profile.
+
+    The top-level document is never blocked; site_host is the host of the
+    page being crawled (used to tell first-party from third-party scripts).
+    block_third_party_scripts overrides the profile's setting when not None.
+    """
+    if resource_type == "document":
+        return False
+
+    spec = RESOURCE_PROFILES[profile]
+    if resource_type in spec["blocked_types"]:
+        return True
+
+    host = _host(request_url)
+    if not host:
+        return False
+    if is_tracker_host(host):
+        return True
+
+    if block_third_party_scripts is None:
+        block_third_party_scripts = spec["block_third_party_scripts"]
+    if (
+        block_third_party_scripts
+        and resource_type == "script"
+        and site_host
+        and not _same_site(host, site_host)
+        and not is_site_builder_host(host)
+    ):
+        return True
+
+    return False
+
+
+# ─── Crawl4AI integration ────────────────────────────────────────────────────
+
+
+def install_resource_blocking(
+    crawler: Any,
+    profile: str = DEFAULT_PROFILE,
+    block_third_party_scripts: Optional[bool] = None,
+) -> bool:
+    """Install a request-blocking hook on a started AsyncWebCrawler.
+
+    Uses the strategy's ``before_goto`` hook, which every Crawl4AI release
+    exposes, and registers a Playwright route on the page before navigation.
+    Returns False (and leaves the crawler untouched) if the strategy does not
+    support hooks.
+    """
+    if profile not in RESOURCE_PROFILES:
+        raise ValueError(f"Unknown crawl profile: {profile!r}")
+
+    strategy = getattr(crawler, "crawler_strategy", None)
+    if strategy is None or not hasattr(strategy, "set_hook"):
+        logger.warning("Crawler strategy has no hooks; resource blocking disabled")
+        return False
+
+    async def _before_goto(page: Any, **kwargs: Any) -> Any:
+        if getattr(page, "_resource_block_profile", None) == profile:
+            return page
+        target_url = kwargs.get("url") or getattr(page, "url", "") or ""
+        state = {"site_host": _host(target_url) or None}
+
+        async def _route(route: Any) -> None:
+            request = route.request
+            try:
+                # Track the top-level document so a reused page follows its site
+                if request.resource_type == "document" and request.frame.parent_frame is None:
+                    state["site_host"] = _host(request.url) or state["site_host"]
+                if should_block(
+                    request.resource_type, request.url, state["site_host"], profile, block_third_party_scripts
+                ):
+                    await route.abort()
+                else:
+                    await route.continue_()
+            except Exception:
+                # Let the request through rather than leave it pending until the
+                # navigation times out; fails again only if the route was already
+                # handled (page closed / navigation replaced)
+                try:
+                    await route.continue_()
+                except Exception:
+                    pass
+
+        await page.route("**/*", _route)
+        page._resource_block_profile = profile
+        return page
+
+    strategy.set_hook("before_goto", _before_goto)
+    return True
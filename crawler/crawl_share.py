@@ -0,0 +1,94 @@
+"""
+Domain-level crawl sharing for providers that list the same website.
+
+Franchises and multi-location companies put one website on many Google Maps
+listings. SharedCrawls memoises one crawl per crawl key for the whole run and
+hands the result to every provider on that key, including providers whose
+crawl is still in flight in the same asyncio.gather batch.
+
+The crawl key is the normalised domain (lower-cased, no www., no scheme, query
+or fragment) plus the URL path, so a listing that points at a location page
+("acme.com/locations/austin") still gets its own crawl, while "acme.com",
+"https://www.acme.com/?utm_source=gmb" and "acme.com/index.html" share one.
+
+Usage:
+    from crawl_share import SharedCrawls, crawl_key
+
+    shared = SharedCrawls()
+    result = await shared.get_or_crawl(crawl_key(website), lambda: crawl_site(website))
+    logger.info(shared.summary())
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlparse
+
+from page_extract import site_domain
+
+T = TypeVar("T")
+
+# Paths that are just another name for the homepage
+HOME_PATHS = {'', '/index.html', '/index.htm', '/index.php', '/home', '/default.aspx'}
+
+
+def crawl_key(url: Any) -> Optional[str]:
+    """Normalised domain + path for a listing's website, or None if unusable."""
+    if not isinstance(url, str) or not url.strip():
+        return None
+    url = url.strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    try:
+        path = urlparse(url).path
+    except ValueError:
+        return None
+    domain = site_domain(url)
+    if not domain:
+        return None
+    path = path.rstrip('/').lower()
+    return domain + ('' if path in HOME_PATHS else path)
+
+
+class SharedCrawls:
+    """Run-level memo of crawl key -> result, with in-flight deduplication."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stats: Counter = Counter()
+        self._results: Dict[str, asyncio.Future] = {}
+
+    async def get_or_crawl(self, key: Optional[str], crawl: Callable[[], Awaitable[T]]) -> T:
+        """Return the shared result for key, running crawl() only for the first caller.
+
+        A crawl that raises is not memoised; the next provider on the key retries.
+        """
+        if not self.enabled or key is None:
+            return await crawl()
+
+        future = self._results.get(key)
+        if future is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._results[key] = future
+        try:
+            result = await crawl()
+        except BaseException as e:
+            del self._results[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()   # mark retrieved; waiters re-raise it themselves
+            raise
+        self.stats["crawled"] += 1
+        future.set_result(result)
+        return result
+
+    def summary(self) -> str:
+        s = self.stats
+        return f"shared crawls: {s['crawled']} sites crawled, {s['shared']} providers reused a crawl"
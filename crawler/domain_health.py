@@ -0,0 +1,236 @@
+"""
+Per-domain crawl health: adaptive timeouts, a circuit breaker and a dead-domain cache.
+
+A flat --timeout lets one dead site burn timeout × max_pages seconds, run after
+run. DomainHealth remembers, per domain (persisted in data/domain_health.json):
+
+  latencies   – recent successful page load times; the next timeout is
+                p90 × 1.5 + 5s, clamped to [MIN_TIMEOUT, --timeout]
+  failures    – consecutive failed homepage crawls; FAILURE_THRESHOLD in a row
+                (this run or earlier ones) opens the circuit for DEAD_TTL_HOURS.
+                A slow or broken internal page says little about the site, so
+                it is logged but not counted; any successful load resets it
+  dead_until  – while open, crawls fail immediately without a browser. A
+                hostname that does not resolve (NXDOMAIN) is cached as dead
+                for NXDOMAIN_TTL_HOURS
+
+After dead_until passes the next crawl is let through; one more failure
+re-opens the circuit straight away, a success closes it.
+
+save() merges into the file rather than overwriting it: only domains this
+process touched are replaced, under a lock, so --workers processes don't drop
+each other's failures.
+
+The DNS lookup in precheck() uses the local resolver, so it is switched off
+(dns_precheck=False) when page loads go through a proxy: the proxy resolves
+hostnames, and a replay proxy serves fixture hosts that need not exist at all.
+
+Usage:
+    health = DomainHealth(DATA_DIR / "domain_health.json", dns_precheck=not proxy)
+    reason = await health.precheck(url)          # None, or why to skip it
+    timeout = health.timeout_for(url, default=60)
+    ...
+    health.record_success(url, seconds) / health.record_failure(url, error, homepage=True)
+    health.save()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+
+import numpy as np
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from page_extract import site_domain
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 20          # recent successful loads kept per domain
+MIN_SAMPLES = 3               # below this the default timeout is used
+LATENCY_PERCENTILE = 90
+TIMEOUT_FACTOR = 1.5
+TIMEOUT_MARGIN = 5.0          # seconds
+MIN_TIMEOUT = 10.0            # seconds
+
+FAILURE_THRESHOLD = 3
+DEAD_TTL_HOURS = 24
+NXDOMAIN_TTL_HOURS = 7 * 24
+DNS_TIMEOUT = 5.0
+DNS_RECHECK_HOURS = 24
+# Resolved once before trusting a negative answer, so an offline box doesn't
+# mark every domain as NXDOMAIN
+DNS_CANARY_HOST = 'example.com'
+
+# Browser / resolver messages that mean the hostname does not exist
+NXDOMAIN_MARKERS = (
+    'err_name_not_resolved', 'name or service not known', 'nodename nor servname',
+    'no address associated with hostname', 'getaddrinfo failed', 'nxdomain',
+)
+
+
+def is_nxdomain(error: Optional[str]) -> bool:
+    error = (error or '').lower()
+    return any(marker in error for marker in NXDOMAIN_MARKERS)
+
+
+class DomainHealth:
+    """Latency history + circuit breaker state per domain."""
+
+    def __init__(self, path: Path, dns_precheck: bool = True):
+        self.path = Path(path)
+        self.dns_precheck = dns_precheck
+        self.stats: Counter = Counter()
+        self._domains: Dict[str, Dict] = {}
+        self._touched: Set[str] = set()
+        self._dns_checked: Dict[str, float] = {}
+        self._resolver_ok: Optional[bool] = None
+
+        self._domains = self._read()
+
+    def _read(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable domain health file {self.path}: {e}")
+            return {}
+
+    def _entry(self, url: str) -> Dict:
+        domain = site_domain(url)
+        self._touched.add(domain)
+        return self._domains.setdefault(domain, {'latencies': [], 'failures': 0})
+
+    # ── Circuit breaker ──────────────────────────────────────────────────────
+
+    def check(self, url: str) -> Optional[str]:
+        """Reason to skip url's domain right now, or None if it may be crawled."""
+        entry = self._domains.get(site_domain(url))
+        if not entry or entry.get('dead_until', 0) <= time.time():
+            return None
+        until = datetime.fromtimestamp(entry['dead_until']).strftime('%Y-%m-%d %H:%M')
+        return f"{entry.get('dead_reason', 'Circuit open')} (cached until {until})"
+
+    async def precheck(self, url: str) -> Optional[str]:
+        """check() plus a DNS lookup the first time a host is seen (per DNS_RECHECK_HOURS)."""
+        reason = self.check(url)
+        if reason:
+            self.stats['skipped'] += 1
+            return reason
+        if not self.dns_precheck:
+            return None
+
+        host = urlparse(url).hostname
+        if not host or time.time() - self._dns_checked.get(host, 0) < DNS_RECHECK_HOURS * 3600:
+            return None
+        if self._resolver_ok is False:
+            return None
+        self._dns_checked[host] = time.time()
+        if await self._resolves(host) is False and await self._resolver_works():
+            self.record_failure(url, 'NXDOMAIN')
+            self.stats['skipped'] += 1
+            return self.check(url)
+        return None
+
+    @staticmethod
+    async def _resolves(host: str) -> Optional[bool]:
+        """True/False for a definite DNS answer, None if the resolver itself misbehaved."""
+        try:
+            await asyncio.wait_for(
+                asyncio.get_running_loop().getaddrinfo(host, 443, type=socket.SOCK_STREAM),
+                timeout=DNS_TIMEOUT,
+            )
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+                return False
+            return None
+        except (asyncio.TimeoutError, OSError):
+            return None
+        return True
+
+    async def _resolver_works(self) -> bool:
+        if self._resolver_ok is None:
+            self._resolver_ok = bool(await self._resolves(DNS_CANARY_HOST))
+            if not self._resolver_ok:
+                logger.warning("DNS canary lookup failed; NXDOMAIN prechecks disabled for this run")
+        return self._resolver_ok
+
+    def record_failure(self, url: str, error: Optional[str], homepage: bool = True):
+        """Log a failed load; only homepage failures (and NXDOMAIN) can open the circuit."""
+        entry = self._entry(url)
+        entry['last_error'] = (error or '')[:200]
+        self.stats['failures'] += 1
+        if not homepage and not is_nxdomain(error):
+            return
+        entry['failures'] = entry.get('failures', 0) + 1
+
+        if is_nxdomain(error):
+            entry['dead_until'] = time.time() + NXDOMAIN_TTL_HOURS * 3600
+            entry['dead_reason'] = 'NXDOMAIN'
+            self.stats['tripped'] += 1
+        elif entry['failures'] >= FAILURE_THRESHOLD:
+            entry['dead_until'] = time.time() + DEAD_TTL_HOURS * 3600
+            entry['dead_reason'] = f"Circuit open after {entry['failures']} consecutive failures"
+            self.stats['tripped'] += 1
+
+    def record_success(self, url: str, seconds: Optional[float] = None):
+        entry = self._entry(url)
+        entry['failures'] = 0
+        entry.pop('dead_until', None)
+        entry.pop('dead_reason', None)
+        if seconds is not None:
+            entry['latencies'] = (entry.get('latencies', []) + [round(seconds, 2)])[-LATENCY_SAMPLES:]
+
+    # ── Adaptive timeouts ────────────────────────────────────────────────────
+
+    def timeout_for(self, url: str, default: float) -> float:
+        """Timeout from the domain's latency history, never above default."""
+        entry = self._domains.get(site_domain(url))
+        latencies = entry.get('latencies', []) if entry else []
+        if len(latencies) < MIN_SAMPLES:
+            return default
+        adaptive = np.percentile(latencies, LATENCY_PERCENTILE) * TIMEOUT_FACTOR + TIMEOUT_MARGIN
+        return float(min(default, max(MIN_TIMEOUT, adaptive)))
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self):
+        """Write the domains touched here over the current file (other processes' entries survive)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix('.lock'), 'w') as lock:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            merged = self._read()
+            merged.update({d: self._domains[d] for d in self._touched if d in self._domains})
+            tmp = self.path.with_suffix(f'.{os.getpid()}.tmp')  # workers may save concurrently
+            with open(tmp, 'w') as f:
+                json.dump(merged, f)
+                f.flush()
+                os.fsync(f.fileno())
+            tmp.replace(self.path)
+        # Pick up what the other workers learned, e.g. domains they found dead
+        self._domains = merged
+        self._touched.clear()
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"domain health: {s['skipped']} crawls skipped (dead/NXDOMAIN), "
+            f"{s['failures']} failures recorded, {s['tripped']} circuits opened"
+        )
@@ -0,0 +1,349 @@
+"""
+Offline crawl fixtures: record a sample of provider sites, replay them locally.
+
+Benchmarking 03_verify_and_enrich.py against live contractor sites measures
+their mood as much as our code: sites change, rate-limit and go down. A
+FixtureCorpus is a directory holding a fixed sample of sites:
+
+  sites.csv      – the input rows that were sampled (original websites)
+  index.json     – {key: {"url", "status", "content_type", "body"} or {"error"}}
+                   where key = host (no www.) + path + query
+  bodies/<sha1>  – response bodies, de-duplicated
+
+record_sites() fetches each site's homepage, robots.txt, sitemaps, the
+best-ranked service pages and their scripts/stylesheets with httpx.
+
+ReplayServer is a plain-HTTP forward proxy that answers only from the corpus,
+with injected latency and failures. Point the browser (--proxy) and httpx
+(HTTP_PROXY) at it and use http:// websites; bodies are served with https://
+rewritten to http://, so every follow-up request also stays on the proxy.
+Anything not in the corpus is a 404 and CONNECT (TLS) is refused, so nothing
+leaves the machine.
+
+Usage:
+    corpus = FixtureCorpus(DATA_DIR / "fixtures")
+    await record_sites(corpus, sample_df, pages_per_site=6)
+
+    server = ReplayServer(corpus, latency_ms=150, failure_rate=0.02)
+    await server.start()      # server.proxy_url -> "http://127.0.0.1:PORT"
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse, urlsplit
+
+import httpx
+import pandas as pd
+
+from page_extract import extract_page, site_domain
+from site_discovery import FALLBACK_SITEMAPS, parse_sitemap, rank_urls
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (compatible; BackflowDirectoryBot/1.0)"
+FETCH_TIMEOUT = 20
+MAX_BODY_BYTES = 5 * 1024 * 1024
+MAX_CHILD_SITEMAPS = 3
+MAX_HEAD_BYTES = 64 * 1024
+
+_ASSET_RE = re.compile(
+    r"""<(?:script[^>]+src|link[^>]+href)\s*=\s*["']([^"']+\.(?:js|css)(?:\?[^"']*)?)["']""", re.I
+)
+_TEXT_TYPES = ('text/', 'application/javascript', 'application/xml', 'application/json', '+xml')
+
+
+def fixture_key(url: str) -> str:
+    """host (no www.) + path + query; the lookup key for a URL in the corpus."""
+    parts = urlsplit(url)
+    return site_domain(url) + (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+
+class FixtureCorpus:
+    """On-disk URL -> recorded response store."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.bodies = self.root / "bodies"
+        self.index_path = self.root / "index.json"
+        self.sites_path = self.root / "sites.csv"
+        self.index: Dict[str, Dict] = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def add(self, url: str, status: int, content_type: str, body: bytes):
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha1(body).hexdigest()
+        path = self.bodies / digest
+        if not path.exists():
+            path.write_bytes(body)
+        self.index[fixture_key(url)] = {
+            'url': url, 'status': status, 'content_type': content_type, 'body': digest,
+        }
+
+    def add_error(self, url: str, error: str):
+        self.index.setdefault(fixture_key(url), {'url': url, 'error': error[:200]})
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        return self.index.get(fixture_key(url))
+
+    def body(self, entry: Dict) -> bytes:
+        return (self.bodies / entry['body']).read_bytes()
+
+    def sites(self) -> pd.DataFrame:
+        return pd.read_csv(self.sites_path, low_memory=False)
+
+    def save(self, sites: Optional[pd.DataFrame] = None):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        tmp.replace(self.index_path)
+        if sites is not None:
+            sites.to_csv(self.sites_path, index=False)
+
+    def summary(self) -> str:
+        errors = sum(1 for e in self.index.values() if 'error' in e)
+        size = sum(p.stat().st_size for p in self.bodies.glob('*')) if self.bodies.exists() else 0
+        return f"fixture corpus: {len(self.index):,} URLs ({errors:,} errors), {size / 1e6:.1f} MB of bodies"
+
+
+# ─── Recording ────────────────────────────────────────────────────────────────
+
+async def _record(client: httpx.AsyncClient, corpus: FixtureCorpus, url: str) -> Optional[httpx.Response]:
+    if corpus.lookup(url) is not None:
+        return None
+    try:
+        resp = await client.get(url)
+    except Exception as e:
+        corpus.add_error(url, str(e) or type(e).__name__)
+        return None
+    body = resp.content[:MAX_BODY_BYTES]
+    content_type = resp.headers.get('content-type', '')
+    corpus.add(url, resp.status_code, content_type, body)
+    if str(resp.url) != url:
+        corpus.add(str(resp.url), resp.status_code, content_type, body)
+    return resp
+
+
+async def record_site(
+    client: httpx.AsyncClient,
+    corpus: FixtureCorpus,
+    website: str,
+    pages_per_site: int,
+    assets_per_site: int,
+):
+    """Homepage, robots.txt, sitemaps, top service pages and their JS/CSS for one site."""
+    home = await _record(client, corpus, website)
+    if home is None or home.status_code >= 400:
+        return
+    base = str(home.url)
+    origin = f"{urlparse(base).scheme}://{urlparse(base).netloc}"
+
+    robots = await _record(client, corpus, origin + "/robots.txt")
+    listed = []
+    if robots is not None and robots.status_code == 200:
+        listed = [line.split(':', 1)[1].strip() for line in robots.text.splitlines()
+                  if line.lower().startswith('sitemap:')]
+    sitemap_pages: List[str] = []
+    queue = listed or [origin + path for path in FALLBACK_SITEMAPS]
+    fetched = 0
+    while queue and fetched <= MAX_CHILD_SITEMAPS:
+        resp = await _record(client, corpus, queue.pop(0))
+        fetched += 1
+        if resp is None or resp.status_code != 200:
+            continue
+        pages, children = parse_sitemap(resp.content)
+        sitemap_pages.extend(pages)
+        queue.extend(children)
+        if pages and not listed:
+            break
+
+    record = extract_page(home.text, base)
+    links = [u for u, _ in record.same_site_links(base)]
+    candidates = rank_urls(list(dict.fromkeys(sitemap_pages + links)), limit=pages_per_site)
+    html_pages = [home.text]
+    for url in candidates:
+        resp = await _record(client, corpus, url)
+        if resp is not None and 'html' in resp.headers.get('content-type', ''):
+            html_pages.append(resp.text)
+
+    assets = []
+    for html in html_pages:
+        assets.extend(urljoin(base, m) for m in _ASSET_RE.findall(html or ''))
+    for url in list(dict.fromkeys(assets))[:assets_per_site]:
+        await _record(client, corpus, url)
+
+
+async def record_sites(
+    corpus: FixtureCorpus,
+    sites: pd.DataFrame,
+    pages_per_site: int = 6,
+    assets_per_site: int = 20,
+    concurrency: int = 8,
+):
+    """Record every site in sites (a sample of input rows with a 'website' column)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(FETCH_TIMEOUT, connect=10),
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+    ) as client:
+
+        async def _one(website: str):
+            async with semaphore:
+                url = website if website.startswith(('http://', 'https://')) else 'https://' + website
+                logger.info(f"  Recording {url}")
+                await record_site(client, corpus, url, pages_per_site, assets_per_site)
+
+        websites = sites['website'].dropna().astype(str).str.strip()
+        await asyncio.gather(*(_one(w) for w in websites.drop_duplicates() if w))
+    corpus.save(sites)
+
+
+# ─── Replay ───────────────────────────────────────────────────────────────────
+
+class ReplayServer:
+    """HTTP forward proxy serving only recorded responses, with latency/failure injection.
+
+    latency_ms ± jitter_ms is added to every response. failure_rate of requests
+    get a 503 or a dropped connection; dead_rate of hosts (chosen by seed) drop
+    every connection, like a site that is down.
+    """
+
+    def __init__(
+        self,
+        corpus: FixtureCorpus,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        failure_rate: float = 0.0,
+        dead_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.corpus = corpus
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.dead_rate = dead_rate
+        self.seed = seed
+        self.stats: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def is_dead(self, host: str) -> bool:
+        return random.Random(f"{self.seed}:{host}").random() < self.dead_rate
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        try:
+            await self._respond(head[:MAX_HEAD_BYTES].decode('latin-1'), writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, head: str, writer: asyncio.StreamWriter):
+        lines = head.split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            return await self._send(writer, 400, b"bad request")
+        if method == "CONNECT":
+            self.stats['connect_refused'] += 1
+            return await self._send(writer, 403, b"replay proxy serves plain http only")
+
+        headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+        url = target if target.startswith("http") else f"http://{headers.get('host', '')}{target}"
+        self.stats['requests'] += 1
+
+        if self.is_dead(site_domain(url)):
+            self.stats['dead'] += 1
+            return
+        delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if self._rng.random() < self.failure_rate:
+            self.stats['injected_failures'] += 1
+            if self._rng.random() < 0.5:
+                return await self._send(writer, 503, b"injected failure")
+            return
+
+        entry = self.corpus.lookup(url)
+        if entry is None:
+            self.stats['not_recorded'] += 1
+            return await self._send(writer, 404, b"not recorded")
+        if 'error' in entry:
+            self.stats['recorded_errors'] += 1
+            return
+
+        body = self.corpus.body(entry)
+        content_type = entry.get('content_type') or 'application/octet-stream'
+        if any(t in content_type for t in _TEXT_TYPES):
+            body = body.replace(b"https://", b"http://")
+        self.stats['served'] += 1
+        await self._send(writer, entry['status'], b"" if method == "HEAD" else body, content_type)
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str = "text/plain"):
+        head = (
+            f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"replay: {s['requests']:,} requests, {s['served']:,} served, {s['not_recorded']:,} not recorded, "
+            f"{s['injected_failures']:,} injected failures, {s['dead']:,} to dead hosts"
+        )
+
+
+def replay_env(proxy_url: str) -> Dict[str, str]:
+    """Environment for a child process whose httpx side-fetches should use the replay proxy."""
+    env = dict(os.environ)
+    for key in ('HTTP_PROXY', 'http_proxy', 'ALL_PROXY', 'all_proxy'):
+        env[key] = proxy_url
+    for key in ('NO_PROXY', 'no_proxy', 'HTTPS_PROXY', 'https_proxy'):
+        env.pop(key, None)
+    return env
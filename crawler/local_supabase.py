@@ -0,0 +1,648 @@
+"""
+Local Supabase stand-in: a scratch Postgres with supabase/migrations applied,
+fronted by a PostgREST-compatible HTTP endpoint.
+
+The loaders (04_upsert_supabase.py, scripts/load_to_supabase.py, the
+enrichment writers) only ever talk to a hosted project, so their write paths
+could not be measured or exercised without one. LocalSupabase gives them a
+private database instead:
+
+  Postgres      – a throwaway cluster started with pgserver (pip install
+                  pgserver), or a new scratch database created on the server
+                  given by db_url (needs CREATEDB). Existing databases are
+                  never written to; the scratch one is dropped on close
+  migrations    – every supabase/migrations/*.sql in order, each in its own
+                  transaction, after creating the anon / authenticated /
+                  service_role roles. Migrations that need Supabase-only
+                  schemas (014: storage buckets) are skipped with a warning
+  RestServer    – the subset of PostgREST the loaders use, served under
+                  /rest/v1 from a pool of POOL_SIZE connections (PostgREST's
+                  default db-pool):
+                    GET     select, order, limit/offset or Range, filters
+                            (eq neq gt gte lt lte like ilike is in, not.)
+                    POST    insert; upsert with on_conflict and
+                            Prefer: resolution=merge-duplicates|ignore-duplicates
+                    PATCH   update rows matching the filters
+                    DELETE  delete rows matching the filters
+                    POST    rpc/<function> with named arguments
+                  Each request is one statement, so one transaction, and
+                  database errors come back with PostgREST's status codes
+                  and {"code", "message", "details", "hint"} bodies. The
+                  pool connects as the cluster owner, which bypasses RLS the
+                  way the service role key does; the key itself is not checked
+
+Like ReplayServer (fixture_corpus.py), RestServer adds latency_ms ± jitter_ms
+to every request and answers failure_rate of the writes (POST / PATCH /
+DELETE) with a 503 before they reach the database. stats counts requests,
+rows written and injected failures; write_latencies holds the time each
+write took, injected latency included.
+
+Usage:
+    with LocalSupabase(latency_ms=20, failure_rate=0.02) as local:
+        env = local.env()       # SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY / SUPABASE_DB_URL
+        subprocess.run([...], env=env)
+        print(local.server.summary())
+        local.reset()           # empty the provider tables between runs
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg.conninfo import make_conninfo
+    from psycopg.types.json import Jsonb
+    PSYCOPG_AVAILABLE = True
+except ImportError:
+    PSYCOPG_AVAILABLE = False
+
+try:
+    import pgserver
+    PGSERVER_AVAILABLE = True
+except ImportError:
+    PGSERVER_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "supabase" / "migrations"
+SUPABASE_ROLES = ("anon", "authenticated", "service_role")
+# Emptied by reset(); CASCADE takes the tables that reference providers along
+RESET_TABLES = ("providers", "provider_services", "provider_reviews", "cities")
+# JWT-shaped so supabase-py accepts it; RestServer never checks it
+SERVICE_KEY = "local.service-role.key"
+POOL_SIZE = 10
+MAX_BODY_BYTES = 256 * 1024 * 1024
+
+OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=",
+             "like": "LIKE", "ilike": "ILIKE"}
+IS_VALUES = {"null": "NULL", "true": "TRUE", "false": "FALSE", "unknown": "UNKNOWN"}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+_IN_ITEM_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|([^,]+)')
+
+
+class RestError(Exception):
+    """A request PostgREST would refuse before reaching the database."""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def pg_status(sqlstate: Optional[str]) -> int:
+    """HTTP status PostgREST answers a database error with."""
+    code = sqlstate or ""
+    if code in ("23505", "23503"):
+        return 409
+    if code in ("42883", "42P01"):
+        return 404
+    if code == "42501":
+        return 403
+    if code[:2] in ("22", "23", "42", "P0"):
+        return 400
+    return 500
+
+
+# ─── Database setup ───────────────────────────────────────────────────────────
+
+def create_database(server_url: str, name: str) -> str:
+    """CREATE DATABASE name on the server of server_url; returns its connection string."""
+    with psycopg.connect(server_url, autocommit=True) as conn:
+        conn.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name)))
+    return make_conninfo(server_url, dbname=name)
+
+
+def drop_database(server_url: str, name: str):
+    with psycopg.connect(server_url, autocommit=True) as conn:
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name)))
+
+
+def apply_migrations(db_url: str, migrations_dir: Path = MIGRATIONS_DIR) -> Tuple[List[str], List[str]]:
+    """Create the Supabase API roles, then run each migration in its own transaction.
+
+    Returns (applied, skipped) file names; a migration that fails is rolled
+    back and skipped, the rest still run.
+    """
+    applied: List[str] = []
+    skipped: List[str] = []
+    with psycopg.connect(db_url, autocommit=True) as conn:
+        for role in SUPABASE_ROLES:
+            if conn.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", (role,)).fetchone() is None:
+                conn.execute(sql.SQL("CREATE ROLE {} NOLOGIN").format(sql.Identifier(role)))
+        for path in sorted(migrations_dir.glob("*.sql")):
+            try:
+                with conn.transaction():
+                    conn.execute(path.read_text())
+                applied.append(path.name)
+            except psycopg.Error as e:
+                logger.warning(f"Skipped migration {path.name}: {str(e).splitlines()[0]}")
+                skipped.append(path.name)
+    return applied, skipped
+
+
+# ─── PostgREST subset ─────────────────────────────────────────────────────────
+
+def _names(columns: str) -> List[str]:
+    """Column names of a select / columns / on_conflict list ("a","b" quoting allowed)."""
+    return [c.strip().strip('"') for c in columns.split(",") if c.strip().strip('"')]
+
+
+def _idents(columns: str) -> sql.Composable:
+    names = _names(columns)
+    if not names or any("(" in c or ":" in c for c in names):
+        raise RestError(400, "PGRST100", f"unsupported select: {columns}")
+    return sql.SQL(", ").join(sql.SQL("*") if c == "*" else sql.Identifier(c) for c in names)
+
+
+def _in_values(arg: str) -> List[str]:
+    if not (arg.startswith("(") and arg.endswith(")")):
+        raise RestError(400, "PGRST100", f"bad in. list: {arg}")
+    values = []
+    for quoted, bare in _IN_ITEM_RE.findall(arg[1:-1]):
+        values.append(re.sub(r"\\(.)", r"\1", quoted) if quoted else bare.strip())
+    return values
+
+
+def _where(table: str, params: List[Tuple[str, str]]) -> Tuple[Optional[sql.Composable], list]:
+    """WHERE clause (None without filters) and its parameters from PostgREST column filters on table."""
+    clauses: List[sql.Composable] = []
+    args: list = []
+    for column, expr in params:
+        if column in RESERVED_PARAMS:
+            continue
+        negate = expr.startswith("not.")
+        op, _, arg = expr[4:].partition(".") if negate else expr.partition(".")
+        col = sql.Identifier(table, column)
+        if op == "in":
+            values = _in_values(arg)
+            if values:
+                clause = sql.SQL("{} IN ({})").format(col, sql.SQL(", ").join(sql.Placeholder() * len(values)))
+                args.extend(values)
+            else:
+                clause = sql.SQL("FALSE")
+        elif op == "is":
+            if arg.lower() not in IS_VALUES:
+                raise RestError(400, "PGRST100", f"bad is. value: {arg}")
+            clause = sql.SQL("{} IS " + IS_VALUES[arg.lower()]).format(col)
+        elif op in OPERATORS:
+            if op in ("like", "ilike"):
+                arg = arg.replace("*", "%")
+            clause = sql.SQL("{} " + OPERATORS[op] + " %s").format(col)
+            args.append(arg)
+        else:
+            raise RestError(400, "PGRST100", f"unsupported filter: {column}={expr}")
+        clauses.append(sql.SQL("NOT ({})").format(clause) if negate else clause)
+    if not clauses:
+        return None, args
+    return sql.SQL(" WHERE ") + sql.SQL(" AND ").join(clauses), args
+
+
+def _order(order: str) -> sql.Composable:
+    terms = []
+    for term in order.split(","):
+        name, *mods = term.strip().split(".")
+        parts = [sql.Identifier(name)]
+        for mod in mods:
+            keyword = {"asc": "ASC", "desc": "DESC", "nullsfirst": "NULLS FIRST", "nullslast": "NULLS LAST"}.get(mod)
+            if keyword is None:
+                raise RestError(400, "PGRST100", f"bad order: {term}")
+            parts.append(sql.SQL(keyword))
+        terms.append(sql.SQL(" ").join(parts))
+    return sql.SQL(" ORDER BY ") + sql.SQL(", ").join(terms)
+
+
+def _prefer(header: Optional[str]) -> Dict[str, str]:
+    prefs = {}
+    for item in (header or "").split(","):
+        key, _, value = item.strip().partition("=")
+        if key:
+            prefs[key] = value
+    return prefs
+
+
+def _jsonb(value: Any) -> Any:
+    return Jsonb(value) if isinstance(value, (list, dict)) else value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+    server: "_HTTPServer"
+
+    def log_message(self, *args):
+        pass
+
+    # ── Plumbing ─────────────────────────────────────────────────────────────
+
+    def _send(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, default=str).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, code: str, message: str):
+        self._send(status, {"code": code, "message": message, "details": None, "hint": None})
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise RestError(413, "PGRST102", "request body too large")
+        data = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(data) if data else None
+        except ValueError:
+            raise RestError(400, "PGRST102", "invalid JSON body") from None
+
+    def _dispatch(self):
+        rest = self.server.rest
+        started = time.perf_counter()
+        is_write = self.command != "GET"
+        rest.count("requests")
+        try:
+            body = self._body() if is_write else None
+            url = urlsplit(self.path)
+            if not url.path.startswith("/rest/v1/"):
+                raise RestError(404, "PGRST125", f"not found: {url.path}")
+            target = url.path[len("/rest/v1/"):].strip("/")
+            params = parse_qsl(url.query, keep_blank_values=True)
+
+            delay = rest.delay()
+            if delay:
+                time.sleep(delay)
+            if is_write and rest.inject_failure():
+                rest.count("injected_failures")
+                return self._error(503, "PGRST000", "injected failure")
+
+            status, result, headers, rows = rest.execute(
+                self.command, target, params, body, self.headers
+            )
+            self._send(status, result, headers)
+            if is_write:
+                rest.count("writes")
+                rest.count("rows_written", rows)
+        except RestError as e:
+            rest.count("errors")
+            self._error(e.status, e.code, str(e))
+        except psycopg.Error as e:
+            rest.count("errors")
+            if isinstance(e, psycopg.OperationalError):
+                return self._error(503, "PGRST000", str(e).splitlines()[0] if str(e) else type(e).__name__)
+            self._error(pg_status(e.sqlstate), e.sqlstate or "XX000", str(e).splitlines()[0])
+        finally:
+            if is_write:
+                rest.record_latency(time.perf_counter() - started)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    rest: "RestServer"
+
+
+class RestServer:
+    """PostgREST-compatible endpoint over a Postgres database, with latency/failure injection."""
+
+    def __init__(
+        self,
+        db_url: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        failure_rate: float = 0.0,
+        pool_size: int = POOL_SIZE,
+        seed: int = 0,
+    ):
+        self.db_url = db_url
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.pool_size = pool_size
+        self.stats: Counter = Counter()
+        self.write_latencies: List[float] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pool: "queue.Queue[psycopg.Connection]" = queue.Queue()
+        self._httpd: Optional[_HTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """Project URL for SUPABASE_URL (the API lives under /rest/v1)."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Open the connection pool and serve on a background thread."""
+        for _ in range(self.pool_size):
+            self._pool.put(psycopg.connect(self.db_url, autocommit=True))
+        self._httpd = _HTTPServer((self.host, self.port), _Handler)
+        self._httpd.rest = self
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    # ── Injection & stats ────────────────────────────────────────────────────
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def inject_failure(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.failure_rate
+
+    def count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def record_latency(self, seconds: float):
+        with self._lock:
+            self.write_latencies.append(seconds)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = Counter()
+            self.write_latencies = []
+
+    def latency_p95(self) -> float:
+        with self._lock:
+            return float(np.percentile(self.write_latencies, 95)) if self.write_latencies else 0.0
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"rest: {s['requests']:,} requests, {s['writes']:,} writes ({s['rows_written']:,} rows), "
+            f"{s['errors']:,} errors, {s['injected_failures']:,} injected failures, "
+            f"p95 write {self.latency_p95() * 1000:.0f}ms"
+        )
+
+    # ── Requests ─────────────────────────────────────────────────────────────
+
+    def execute(self, method: str, target: str, params: List[Tuple[str, str]], body: Any,
+                headers) -> Tuple[int, Any, Dict[str, str], int]:
+        """Run one request; returns (status, JSON body or None, extra headers, rows written)."""
+        conn = self._pool.get()
+        try:
+            if conn.closed or conn.broken:
+                conn = psycopg.connect(self.db_url, autocommit=True)
+            if target.startswith("rpc/"):
+                return self._rpc(conn, target[4:], body)
+            if "/" in target or not target:
+                raise RestError(404, "PGRST125", f"not found: {target}")
+            prefs = _prefer(headers.get("Prefer"))
+            if method == "GET":
+                return self._select(conn, target, params, headers.get("Range"))
+            if method == "POST":
+                return self._insert(conn, target, params, body, prefs)
+            if method == "PATCH":
+                return self._update(conn, target, params, body, prefs)
+            if method == "DELETE":
+                return self._delete(conn, target, params, prefs)
+            raise RestError(405, "PGRST117", f"unsupported method {method}")
+        finally:
+            self._pool.put(conn)
+
+    @staticmethod
+    def _rows(cur) -> List[Dict[str, Any]]:
+        names = [d.name for d in cur.description]
+        return [dict(zip(names, r)) for r in cur.fetchall()]
+
+    def _select(self, conn, table: str, params, range_header: Optional[str]):
+        q = dict(params)
+        where, args = _where(table, params)
+        query = sql.SQL("SELECT {} FROM {}").format(_idents(q.get("select", "*")), sql.Identifier(table))
+        if where is not None:
+            query += where
+        if q.get("order"):
+            query += _order(q["order"])
+        limit, offset = q.get("limit"), q.get("offset")
+        if range_header and limit is None:
+            first, _, last = range_header.partition("-")
+            offset = first or None
+            limit = str(int(last) - int(first or 0) + 1) if last else None
+        if limit is not None:
+            query += sql.SQL(" LIMIT {}").format(sql.Literal(int(limit)))
+        if offset:
+            query += sql.SQL(" OFFSET {}").format(sql.Literal(int(offset)))
+        rows = self._rows(conn.execute(query, args))
+        start = int(offset or 0)
+        content_range = f"{start}-{start + len(rows) - 1}/*" if rows else "*/*"
+        return 200, rows, {"Content-Range": content_range}, 0
+
+    def _insert(self, conn, table: str, params, body: Any, prefs: Dict[str, str]):
+        rows = body if isinstance(body, list) else [body] if isinstance(body, dict) else None
+        if rows is None:
+            raise RestError(400, "PGRST102", "body must be a JSON object or array")
+        representation = prefs.get("return") == "representation"
+        if not rows:
+            return (201, [], {}, 0) if representation else (201, None, {}, 0)
+        q = dict(params)
+        columns = q.get("columns") or ",".join(rows[0].keys())
+        cols = _idents(columns)
+        query = sql.SQL("INSERT INTO {t} ({c}) SELECT {c} FROM jsonb_populate_recordset(NULL::{t}, %s)").format(
+            t=sql.Identifier(table), c=cols
+        )
+        resolution = prefs.get("resolution")
+        if resolution in ("merge-duplicates", "ignore-duplicates"):
+            conflict = q.get("on_conflict") or self._primary_key(conn, table)
+            keys = set(_names(conflict))
+            updates = [c for c in _names(columns) if c not in keys]
+            query += sql.SQL(" ON CONFLICT ({}) ").format(_idents(conflict))
+            if resolution == "merge-duplicates" and updates:
+                query += sql.SQL("DO UPDATE SET ") + sql.SQL(", ").join(
+                    sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in updates
+                )
+            else:
+                query += sql.SQL("DO NOTHING")
+        if representation:
+            query += sql.SQL(" RETURNING *")
+        cur = conn.execute(query, [Jsonb(rows)])
+        return 201, self._rows(cur) if representation else None, {}, len(rows)
+
+    def _update(self, conn, table: str, params, body: Any, prefs: Dict[str, str]):
+        if not isinstance(body, dict) or not body:
+            raise RestError(400, "PGRST102", "PATCH body must be a non-empty JSON object")
+        where, args = _where(table, params)
+        query = sql.SQL("UPDATE {t} SET {s} FROM jsonb_populate_record(NULL::{t}, %s) AS p").format(
+            t=sql.Identifier(table),
+            s=sql.SQL(", ").join(sql.SQL("{0} = p.{0}").format(sql.Identifier(c)) for c in body),
+        )
+        if where is not None:
+            query += where
+        return self._modify(conn, query, [Jsonb(body), *args], prefs)
+
+    def _delete(self, conn, table: str, params, prefs: Dict[str, str]):
+        where, args = _where(table, params)
+        query = sql.SQL("DELETE FROM {}").format(sql.Identifier(table))
+        if where is not None:
+            query += where
+        return self._modify(conn, query, args, prefs)
+
+    def _modify(self, conn, query: sql.Composable, args: list, prefs: Dict[str, str]):
+        if prefs.get("return") == "representation":
+            cur = conn.execute(query + sql.SQL(" RETURNING *"), args)
+            rows = self._rows(cur)
+            return 200, rows, {}, len(rows)
+        cur = conn.execute(query, args)
+        return 204, None, {}, max(cur.rowcount, 0)
+
+    def _rpc(self, conn, function: str, body: Any):
+        args = body or {}
+        if not isinstance(args, dict):
+            raise RestError(400, "PGRST102", "rpc arguments must be a JSON object")
+        call = sql.SQL("SELECT to_jsonb({}({}))").format(
+            sql.Identifier(function),
+            sql.SQL(", ").join(sql.SQL("{} => %s").format(sql.Identifier(k)) for k in args),
+        )
+        result = conn.execute(call, [_jsonb(v) for v in args.values()]).fetchone()[0]
+        rows = len(args["p_rows"]) if isinstance(args.get("p_rows"), list) else 0
+        return 200, result, {}, rows
+
+    def _primary_key(self, conn, table: str) -> str:
+        cols = conn.execute(
+            "SELECT a.attname FROM pg_index i "
+            "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+            "WHERE i.indrelid = %s::regclass AND i.indisprimary ORDER BY a.attnum",
+            (table,),
+        ).fetchall()
+        if not cols:
+            raise RestError(400, "PGRST103", f"{table} has no primary key; pass on_conflict")
+        return ",".join(c for (c,) in cols)
+
+
+# ─── Local project ────────────────────────────────────────────────────────────
+
+class LocalSupabase:
+    """Scratch database with the migrations applied, plus a RestServer in front of it."""
+
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        if not PSYCOPG_AVAILABLE:
+            raise RuntimeError('local_supabase needs psycopg 3: pip install "psycopg[binary]"')
+        if not db_url and not PGSERVER_AVAILABLE:
+            raise RuntimeError("No Postgres: pass a server connection string (--db-url) or pip install pgserver")
+        self.server_url = db_url
+        self.rest_options = dict(port=port, latency_ms=latency_ms, jitter_ms=jitter_ms,
+                                 failure_rate=failure_rate, seed=seed)
+        self.database = f"backflow_local_{os.getpid()}"
+        self.db_url = ""
+        self.migrations: Tuple[List[str], List[str]] = ([], [])
+        self.server: Optional[RestServer] = None
+        self._pg = None
+        self._pgdata: Optional[str] = None
+
+    def __enter__(self) -> 'LocalSupabase':
+        try:
+            self.start()
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if not self.server_url:
+            self._pgdata = tempfile.mkdtemp(prefix="backflow_pg_")
+            self._pg = pgserver.get_server(self._pgdata, cleanup_mode="stop")
+            self.server_url = self._pg.get_uri("postgres")
+        self.db_url = create_database(self.server_url, self.database)
+        self.migrations = apply_migrations(self.db_url)
+        self.server = RestServer(self.db_url, **self.rest_options)
+        self.server.start()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        if self.db_url:
+            drop_database(self.server_url, self.database)
+            self.db_url = ""
+        if self._pg is not None:
+            self._pg.cleanup()
+            self._pg = None
+        if self._pgdata:
+            shutil.rmtree(self._pgdata, ignore_errors=True)
+            self._pgdata = None
+
+    def env(self) -> Dict[str, str]:
+        """Environment for a loader process that should write to this project."""
+        env = dict(os.environ)
+        env.update({
+            "SUPABASE_URL": self.server.url,
+            "NEXT_PUBLIC_SUPABASE_URL": self.server.url,
+            "SUPABASE_SERVICE_ROLE_KEY": SERVICE_KEY,
+            "SUPABASE_DB_URL": self.db_url,
+            "DATABASE_URL": self.db_url,
+        })
+        for key in ("HTTP_PROXY", "http_proxy", "ALL_PROXY", "all_proxy"):
+            env.pop(key, None)
+        env["NO_PROXY"] = env["no_proxy"] = "127.0.0.1,localhost"
+        return env
+
+    def reset(self):
+        """Empty the provider tables (and whatever references them) and the REST stats."""
+        with psycopg.connect(self.db_url, autocommit=True) as conn:
+            conn.execute(sql.SQL("TRUNCATE {} CASCADE").format(
+                sql.SQL(", ").join(map(sql.Identifier, RESET_TABLES))
+            ))
+        self.server.reset_stats()
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]):
+        """Insert rows straight into the database (keys of the first row), e.g. to seed a benchmark."""
+        if not rows:
+            return
+        with psycopg.connect(self.db_url, autocommit=True) as conn:
+            conn.execute(
+                sql.SQL("INSERT INTO {t} ({c}) SELECT {c} FROM jsonb_populate_recordset(NULL::{t}, %s)").format(
+                    t=sql.Identifier(table), c=sql.SQL(", ").join(map(sql.Identifier, rows[0]))
+                ),
+                [Jsonb(rows)],
+            )
+
+    def scalar(self, query: str, params: tuple = ()) -> Any:
+        """First column of the first row of query, run directly against the database."""
+        with psycopg.connect(self.db_url, autocommit=True) as conn:
+            row = conn.execute(query, params).fetchone()
+        return row[0] if row else None
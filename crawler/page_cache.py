@@ -0,0 +1,287 @@
+"""
+Persistent page cache with conditional revalidation for crawls.
+
+Every verifier / enrichment run used to fetch the same provider websites from
+scratch in a full browser. PageCache stores each crawled page on disk (SQLite,
+zlib-compressed) keyed by URL and extraction variant:
+
+  body (rendered HTML), text (markdown), ETag, Last-Modified, fetch time
+
+The variant (page_variant(): resource profile + word_count_threshold) keeps
+callers that extract differently apart. The verifier (text, wct=10), the
+image enrichers (images, wct=0) and the services enricher (text, wct=50)
+share one cache file but each only ever sees markdown produced with its own
+settings.
+
+Lookup order in PageCache.fetch():
+  1. Fresh entry (younger than the TTL)            -> served from disk ("hit")
+  2. Stale entry with an ETag / Last-Modified      -> conditional GET over httpx;
+     304 Not Modified refreshes the entry            ("revalidated")
+  3. Otherwise                                     -> browser crawl, stored ("fetched")
+
+Entries are evicted least-recently-used once the cache exceeds max_bytes.
+Failures are never cached.
+
+Usage:
+    cache = PageCache(DATA_DIR / "page_cache.sqlite", ttl_hours=168)
+    page = await cache.fetch(url, lambda: crawl_with_browser(url), variant=page_variant("text", 10))
+    ...
+    await cache.aclose()
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_HOURS = 7 * 24
+DEFAULT_MAX_MB = 1024
+REVALIDATE_TIMEOUT = 10
+USER_AGENT = "Mozilla/5.0 (compatible; BackflowDirectoryBot/1.0)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url           TEXT NOT NULL,
+    variant       TEXT NOT NULL DEFAULT '',
+    body          BLOB,
+    text          BLOB,
+    etag          TEXT,
+    last_modified TEXT,
+    fetched_at    REAL NOT NULL,
+    accessed_at   REAL NOT NULL,
+    size          INTEGER NOT NULL,
+    PRIMARY KEY (url, variant)
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+"""
+
+
+def page_variant(profile: str, word_count_threshold: int) -> str:
+    """Cache key part for pages crawled with a crawl_profiles profile and a crawl4ai word_count_threshold."""
+    return f"{profile}/wct={word_count_threshold}"
+
+
+@dataclass
+class CachedPage:
+    url: str
+    html: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    source: str = "hit"   # hit | revalidated | fetched
+
+
+@dataclass
+class CrawledPage:
+    """What a crawl callback hands back to PageCache.fetch()."""
+    html: str
+    text: str
+    headers: Optional[Dict[str, str]] = None
+
+
+def _pack(value: Optional[str]) -> Optional[bytes]:
+    return zlib.compress(value.encode("utf-8"), 6) if value else None
+
+
+def _unpack(blob: Optional[bytes]) -> str:
+    return zlib.decompress(blob).decode("utf-8") if blob else ""
+
+
+def _header(headers: Optional[Dict[str, Any]], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return str(value) if value else None
+    return None
+
+
+class PageCache:
+    """Disk-backed URL -> page store with TTL, conditional GET and LRU eviction."""
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_hours: float = DEFAULT_TTL_HOURS,
+        max_mb: float = DEFAULT_MAX_MB,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.stats: Counter = Counter()
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pages)")}
+        if columns and "variant" not in columns:
+            # Entries from before variants can't be attributed to a caller's settings
+            logger.info(f"Dropping pre-variant page cache entries in {self.path}")
+            self._db.execute("DROP TABLE pages")
+        self._db.executescript(_SCHEMA)
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    # ── Storage ──────────────────────────────────────────────────────────────
+
+    def get(self, url: str, variant: str = "") -> Optional[CachedPage]:
+        row = self._db.execute(
+            "SELECT body, text, etag, last_modified, fetched_at FROM pages WHERE url = ? AND variant = ?",
+            (url, variant),
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute(
+            "UPDATE pages SET accessed_at = ? WHERE url = ? AND variant = ?", (time.time(), url, variant)
+        )
+        body, text, etag, last_modified, fetched_at = row
+        return CachedPage(url, _unpack(body), _unpack(text), etag, last_modified, fetched_at)
+
+    def put(
+        self,
+        url: str,
+        html: str,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        variant: str = "",
+    ) -> CachedPage:
+        body_blob, text_blob = _pack(html), _pack(text)
+        size = len(body_blob or b"") + len(text_blob or b"")
+        now = time.time()
+        old = self._db.execute(
+            "SELECT size FROM pages WHERE url = ? AND variant = ?", (url, variant)
+        ).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO pages "
+            "(url, variant, body, text, etag, last_modified, fetched_at, accessed_at, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, variant, body_blob, text_blob, etag, last_modified, now, now, size),
+        )
+        self._total += size - (old[0] if old else 0)
+        if self._total > self.max_bytes:
+            self.evict()
+        return CachedPage(url, html or "", text or "", etag, last_modified, now, source="fetched")
+
+    def mark_revalidated(self, url: str, variant: str = "") -> None:
+        now = time.time()
+        self._db.execute(
+            "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ? AND variant = ?",
+            (now, now, url, variant),
+        )
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until the cache is under 90% of max size."""
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if self._total <= target:
+            return 0
+        rows = self._db.execute("SELECT url, variant, size FROM pages ORDER BY accessed_at ASC")
+        doomed = []
+        for url, variant, size in rows:
+            if self._total <= target:
+                break
+            doomed.append((url, variant))
+            self._total -= size
+        self._db.executemany("DELETE FROM pages WHERE url = ? AND variant = ?", doomed)
+        removed = len(doomed)
+        self.stats["evicted"] += removed
+        return removed
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at < self.ttl
+
+    def lookup(self, url: str, variant: str = "") -> Optional[CachedPage]:
+        """Fresh entry for url without touching the network, else None."""
+        cached = self.get(url, variant)
+        if cached is None or not self.is_fresh(cached):
+            return None
+        self.stats["hit"] += 1
+        return cached
+
+    # ── Revalidation ─────────────────────────────────────────────────────────
+
+    async def revalidate(self, page: CachedPage) -> bool:
+        """Conditional GET; True if the server answered 304 Not Modified."""
+        headers = {"User-Agent": USER_AGENT}
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        if len(headers) == 1:
+            return False
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(REVALIDATE_TIMEOUT, connect=5),
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        try:
+            resp = await self._client.get(page.url, headers=headers)
+        except Exception as e:
+            logger.debug(f"Revalidation failed for {page.url}: {e}")
+            return False
+        return resp.status_code == 304
+
+    async def fetch(
+        self,
+        url: str,
+        crawl: Callable[[], Awaitable[Optional[CrawledPage]]],
+        variant: str = "",
+    ) -> Optional[CachedPage]:
+        """Serve url from cache when fresh or unchanged, otherwise crawl and store it.
+
+        variant must describe how crawl extracts text (page_variant()); entries
+        stored under another variant are never served.
+        """
+        cached = self.get(url, variant)
+        if cached is not None:
+            if self.is_fresh(cached):
+                self.stats["hit"] += 1
+                return cached
+            if await self.revalidate(cached):
+                self.mark_revalidated(url, variant)
+                self.stats["revalidated"] += 1
+                cached.source = "revalidated"
+                return cached
+
+        crawled = await crawl()
+        if crawled is None:
+            self.stats["failed"] += 1
+            return None
+
+        self.stats["fetched"] += 1
+        return self.put(
+            url,
+            crawled.html,
+            crawled.text,
+            etag=_header(crawled.headers, "etag"),
+            last_modified=_header(crawled.headers, "last-modified"),
+            variant=variant,
+        )
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"page cache: {s['hit']} hits, {s['revalidated']} revalidated (304), "
+            f"{s['fetched']} fetched, {s['failed']} failed, {s['evicted']} evicted"
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._db.close()
@@ -0,0 +1,178 @@
+"""
+One-parse-per-page HTML extractor shared by the verifier and image enrichers.
+
+Each crawled page is parsed exactly once (lxml when available, otherwise
+BeautifulSoup's html.parser) into a PageRecord holding everything downstream
+steps read from HTML:
+
+  links          – (absolute url, anchor text) for every http(s) <a href>
+  booking_urls   – links whose href/anchor look like book/quote/schedule
+  image_urls     – <img> src and srcset in document order (each followed by its
+                   lazy-load data-src / data-lazy-src / data-original /
+                   data-srcset), then og:image / twitter:image last, the
+                   order the image enrichers always took candidates in
+  meta           – <meta name|property> -> content (lower-cased keys)
+
+Usage:
+    from page_extract import extract_page
+
+    page = extract_page(html, url)
+    for href, anchor in page.links: ...
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+
+# Optional fast parser
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# ─── Link classification ──────────────────────────────────────────────────────
+
+# Booking link indicators (matched against lower-cased href + anchor text)
+BOOKING_INDICATORS = [
+    'book', 'quote', 'schedule', 'appointment',
+    'contact', 'request', 'estimate', 'get-started',
+]
+
+# Third-party booking hosts accepted even though they are off-site
+BOOKING_DOMAINS = ['calendly.com', 'acuityscheduling.com', 'square.site']
+
+IMAGE_META_KEYS = ('og:image', 'twitter:image', 'twitter:image:src')
+
+# Attributes that carry the real image URL on lazy-loaded <img> tags
+LAZY_SRC_ATTRS = ('data-src', 'data-lazy-src', 'data-original')
+
+
+@dataclass
+class PageRecord:
+    """Everything the pipeline reads from one page's HTML."""
+    url: str
+    title: str = ""
+    links: List[Tuple[str, str]] = field(default_factory=list)
+    booking_urls: List[str] = field(default_factory=list)
+    image_urls: List[str] = field(default_factory=list)
+    meta: Dict[str, str] = field(default_factory=dict)
+
+    def same_site_links(self, base_url: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Links on the same domain (ignoring www.) as base_url or the page."""
+        base = site_domain(base_url or self.url)
+        return [(u, a) for u, a in self.links if site_domain(u) == base]
+
+
+def site_domain(url: str) -> str:
+    """Lower-cased netloc without a leading www."""
+    try:
+        netloc = urlparse(url).netloc.lower()
+    except ValueError:
+        return ""
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def is_booking_link(href: str, anchor: str) -> bool:
+    combined = href.lower() + ' ' + anchor.lower()
+    return any(ind in combined for ind in BOOKING_INDICATORS)
+
+
+# ─── Parsing ──────────────────────────────────────────────────────────────────
+
+
+def _absolute(base_url: str, href: str) -> Optional[str]:
+    href = (href or "").strip()
+    if not href or href.startswith(('data:', 'javascript:', 'mailto:', 'tel:')):
+        return None
+    try:
+        abs_url = urldefrag(urljoin(base_url, href))[0]
+    except ValueError:
+        return None
+    return abs_url if abs_url.startswith(('http://', 'https://')) else None
+
+
+def _srcset_urls(srcset: str) -> Iterable[str]:
+    for part in (srcset or "").split(','):
+        tokens = part.strip().split()
+        if tokens:
+            yield tokens[0]
+
+
+def _iter_elements_lxml(html: str):
+    """Yield (tag, attrs, text) for the elements we care about."""
+    try:
+        root = lxml.html.document_fromstring(
+            html.encode('utf-8', 'replace'),
+            parser=lxml.html.HTMLParser(encoding='utf-8'),
+        )
+    except (etree.ParserError, ValueError):
+        return
+    for el in root.iter('a', 'img', 'meta', 'title'):
+        tag = el.tag
+        text = el.text_content() if tag in ('a', 'title') else ""
+        yield tag, el.attrib, text
+
+
+def _iter_elements_bs4(html: str):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for el in soup.find_all(['a', 'img', 'meta', 'title']):
+        attrs = {k: (' '.join(v) if isinstance(v, list) else v) for k, v in el.attrs.items()}
+        text = el.get_text(' ') if el.name in ('a', 'title') else ""
+        yield el.name, attrs, text
+
+
+def extract_page(html: Optional[str], url: str) -> PageRecord:
+    """Parse a page once and return its links, booking/image candidates and meta."""
+    page = PageRecord(url=url)
+    if not html:
+        return page
+
+    elements = _iter_elements_lxml(html) if LXML_AVAILABLE else _iter_elements_bs4(html)
+    base_domain = site_domain(url)
+    seen_links = set()
+    meta_images: List[str] = []
+
+    for tag, attrs, text in elements:
+        if tag == 'a':
+            href = attrs.get('href')
+            abs_url = _absolute(url, href)
+            if not abs_url:
+                continue
+            anchor = ' '.join(text.split())
+            if (abs_url, anchor) not in seen_links:
+                seen_links.add((abs_url, anchor))
+                page.links.append((abs_url, anchor))
+            if is_booking_link(href, anchor) and (
+                site_domain(abs_url) == base_domain
+                or any(d in abs_url for d in BOOKING_DOMAINS)
+            ):
+                page.booking_urls.append(abs_url)
+
+        elif tag == 'img':
+            sources = [attrs.get('src')] + list(_srcset_urls(attrs.get('srcset')))
+            sources += [attrs.get(a) for a in LAZY_SRC_ATTRS]
+            sources += list(_srcset_urls(attrs.get('data-srcset')))
+            for src in sources:
+                abs_url = _absolute(url, src)
+                if abs_url:
+                    page.image_urls.append(abs_url)
+
+        elif tag == 'meta':
+            key = (attrs.get('property') or attrs.get('name') or '').strip().lower()
+            content = (attrs.get('content') or '').strip()
+            if not key:
+                continue
+            page.meta.setdefault(key, content)
+            if key in IMAGE_META_KEYS and content.startswith('http'):
+                meta_images.append(content)
+
+        elif tag == 'title' and not page.title:
+            page.title = ' '.join(text.split())
+
+    page.image_urls.extend(meta_images)
+    return page
@@ -0,0 +1,142 @@
+"""
+Columnar builder for provider upsert payloads.
+
+clean_row() used to branch on the column name for every cell and parse
+image_urls / reviews_per_score one row at a time. build_payloads() coerces
+each column of the frame once instead:
+
+  postal_code               – float ZIPs ("7001.0") → "07001"; other non-empty
+                              values kept as strings
+  rating, latitude,         – float (unparseable → None)
+  longitude
+  reviews, backflow_score   – int (unparseable → 0)
+  website_missing           – bool ("true"/"false"/"1"/"0" strings understood)
+  image_urls                – JSON array → list (bad JSON → [])
+  reviews_per_score         – JSON or Python-literal dict ("{'5': 12}") →
+                              {str: int}; parsed once per distinct value
+  service_tags              – "A|B|C" → ["A", "B", "C"]
+  everything else           – str
+
+Missing values (NaN, None, "nan") become None in every column, and the result
+is a list of plain dicts with native Python values, ready for any JSON encoder.
+
+Usage:
+    payloads = build_payloads(df, PROVIDER_COLS)
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+FLOAT_COLS = ("rating", "latitude", "longitude")
+INT_COLS = ("reviews", "backflow_score")
+TRUE_STRINGS = {"true", "t", "1", "yes", "y"}
+
+
+def _missing(s: pd.Series) -> np.ndarray:
+    """NaN / None, plus strings that clean_row would have parsed as NaN."""
+    missing = s.isna().to_numpy()
+    if s.dtype == object:
+        missing |= s.astype(str).str.strip().str.lower().eq("nan").to_numpy()
+    return missing
+
+
+def _map_unique(s: pd.Series, parse: Callable[[Any], Any]) -> pd.Series:
+    """Apply parse once per distinct value (values must be hashable)."""
+    try:
+        uniques = pd.unique(s)
+    except TypeError:
+        return s.map(parse)
+    parsed = {v: parse(v) for v in uniques}
+    return s.map(parsed.__getitem__)
+
+
+def _postal_code(s: pd.Series) -> pd.Series:
+    code = s.astype(str).str.strip().str.split(".").str[0].str.strip()
+    digits = code.str.fullmatch(r"\d+").fillna(False).astype(bool)
+    out = code.where(~digits, code.str.zfill(5))
+    return out.where(code.ne("") & ~code.str.lower().isin(("nan", "none")), None)
+
+
+def _bool(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in TRUE_STRINGS
+    return bool(v)
+
+
+def _json_list(v: Any) -> list:
+    if isinstance(v, list):
+        return v
+    try:
+        parsed = json.loads(v) if v else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def _score_dict(v: Any) -> Dict[str, int] | None:
+    # Scrapy exports reviews_per_score as a Python dict string: "{'1': 12, '5': 1500}"
+    if isinstance(v, str):
+        if not v.strip():
+            return None
+        try:
+            return json.loads(v)
+        except (json.JSONDecodeError, TypeError):
+            try:
+                v = ast.literal_eval(v)
+            except Exception:
+                return None
+    if isinstance(v, dict):
+        try:
+            return {str(k): int(n) for k, n in v.items()}
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _tags(v: Any) -> list:
+    if isinstance(v, list):
+        return v
+    if isinstance(v, str) and v.strip():
+        return [t.strip() for t in v.split("|") if t.strip()]
+    return []
+
+
+def build_column(s: pd.Series, col: str) -> List[Any]:
+    """One payload column as a list of native Python values."""
+    missing = _missing(s)
+    if col == "postal_code":
+        out = _postal_code(s)
+    elif col in FLOAT_COLS:
+        out = pd.to_numeric(s, errors="coerce").astype(object)
+    elif col in INT_COLS:
+        out = pd.to_numeric(s, errors="coerce").fillna(0).astype(np.int64).astype(object)
+    elif col == "website_missing":
+        out = s.map(_bool, na_action="ignore")
+    elif col == "image_urls":
+        out = _map_unique(s, _json_list)
+    elif col == "reviews_per_score":
+        out = _map_unique(s, _score_dict)
+    elif col == "service_tags":
+        out = _map_unique(s, _tags)
+    else:
+        out = s.astype(str)
+    out = out.astype(object)
+    out[missing | out.isna().to_numpy()] = None
+    return out.tolist()
+
+
+def build_payloads(df: pd.DataFrame, cols: List[str]) -> List[Dict[str, Any]]:
+    """Upsert payloads for every row of df (columns missing from df are None)."""
+    # Duplicate names (e.g. after a rename) resolve to the last one, as in a row dict
+    df = df.loc[:, ~df.columns.duplicated(keep="last")]
+    columns = [
+        build_column(df[col], col) if col in df.columns else [None] * len(df)
+        for col in cols
+    ]
+    return [dict(zip(cols, values)) for values in zip(*columns)]
@@ -0,0 +1,339 @@
+"""
+robots.txt + sitemap.xml page discovery with a per-domain cache.
+
+Finding service pages by scanning homepage anchors (verifier pass 2, image
+enrichers) or by guessing subpaths (services enrichment) costs a full browser
+render per guess, and most guesses 404. SiteDiscovery asks the site instead:
+
+  1. robots.txt   – Disallow rules, Crawl-delay and Sitemap: lines
+  2. sitemap.xml  – listed sitemaps (or /sitemap.xml, /sitemap_index.xml),
+                    following sitemap indexes a few levels deep
+
+Page URLs are ranked by service keywords in their path before anything is
+rendered. Results are cached per domain in data/site_discovery.json, and
+throttle() spaces requests to a domain by its Crawl-delay.
+
+Usage:
+    from site_discovery import SiteDiscovery
+
+    discovery = SiteDiscovery(DATA_DIR / "site_discovery.json")
+    found = await discovery.discover("https://example.com")
+    for url in found.ranked(limit=3):
+        if discovery.allowed(url):
+            await discovery.throttle(url)
+            ...
+    await discovery.aclose()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import html
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from page_extract import site_domain
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_HOURS = 7 * 24
+FETCH_TIMEOUT = 10
+USER_AGENT = "Mozilla/5.0 (compatible; BackflowDirectoryBot/1.0)"
+ROBOTS_AGENT = "BackflowDirectoryBot"
+
+MAX_SITEMAP_FETCHES = 6            # sitemap files fetched per domain (incl. indexes)
+MAX_SITEMAP_BYTES = 10 * 1024 * 1024
+MAX_PAGE_URLS = 2000               # page URLs kept per domain
+MAX_ROBOTS_CHARS = 64 * 1024
+MAX_CRAWL_DELAY = 10.0             # ignore absurd Crawl-delay values beyond this
+
+FALLBACK_SITEMAPS = ("/sitemap.xml", "/sitemap_index.xml")
+
+# ─── Ranking ──────────────────────────────────────────────────────────────────
+
+# Path keyword -> weight (matched against the lower-cased path, "_" read as "-")
+SERVICE_URL_KEYWORDS: Dict[str, int] = {
+    'backflow': 6,
+    'rpz': 5,
+    'cross-connect': 5,
+    'prevent': 3,
+    'testing': 3,
+    'inspection': 2,
+    'certif': 2,
+    'service': 2,
+    'plumbing': 1,
+    'irrigation': 1,
+    'sprinkler': 1,
+    'repair': 1,
+    'install': 1,
+}
+
+# Archive-style paths rarely describe the business's own services
+LOW_VALUE_SEGMENTS = ('/blog/', '/tag/', '/category/', '/author/', '/page/', '/news/')
+
+NON_PAGE_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.pdf', '.zip',
+    '.mp4', '.mp3', '.css', '.js', '.xml', '.txt',
+)
+
+# Child sitemaps worth following first (WordPress/Yoast/Squarespace naming)
+_SITEMAP_PRIORITY = re.compile(r"page|service|location|main|static", re.I)
+_SITEMAP_SKIP = re.compile(r"post[-_]tag|category|author|product|attachment|image|video", re.I)
+
+_LOC_RE = re.compile(rb"<loc>\s*(.*?)\s*</loc>", re.I | re.S)
+
+
+def url_score(url: str, keywords: Dict[str, int] = SERVICE_URL_KEYWORDS) -> int:
+    """Keyword score of a URL path (0 = not a service page candidate)."""
+    path = urlparse(url).path.lower().replace('_', '-')
+    if not path.strip('/') or path.endswith(NON_PAGE_EXTENSIONS):
+        return 0
+    score = sum(w for kw, w in keywords.items() if kw in path)
+    if score and any(seg in path for seg in LOW_VALUE_SEGMENTS):
+        score -= 2
+    return max(score, 0)
+
+
+def rank_urls(
+    urls: List[str],
+    keywords: Dict[str, int] = SERVICE_URL_KEYWORDS,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """Service-page candidates, best first (shorter paths win ties)."""
+    scored = [(url_score(u, keywords), len(urlparse(u).path), u) for u in urls]
+    ranked = [u for s, _, u in sorted((t for t in scored if t[0] > 0), key=lambda t: (-t[0], t[1]))]
+    return ranked[:limit] if limit else ranked
+
+
+# ─── Parsing ──────────────────────────────────────────────────────────────────
+
+
+def parse_sitemap(body: bytes) -> Tuple[List[str], List[str]]:
+    """Return (page_urls, child_sitemap_urls) from a sitemap or sitemap index."""
+    if body[:2] == b"\x1f\x8b":
+        try:
+            body = gzip.decompress(body)[:MAX_SITEMAP_BYTES]
+        except (OSError, EOFError):
+            return [], []
+    locs = [html.unescape(m.decode("utf-8", "replace")) for m in _LOC_RE.findall(body)]
+    locs = [u for u in locs if u.startswith(("http://", "https://"))]
+    if b"<sitemapindex" in body[:2048].lower():
+        return [], locs
+    return locs, []
+
+
+def parse_robots(text: str) -> RobotFileParser:
+    parser = RobotFileParser()
+    parser.parse(text.splitlines())
+    return parser
+
+
+def parse_crawl_delay(text: str, agent: str = ROBOTS_AGENT) -> Optional[float]:
+    """Crawl-delay for agent (falling back to *), capped at MAX_CRAWL_DELAY.
+
+    RobotFileParser only understands whole seconds, so this reads the groups
+    directly to also accept values like "0.5".
+    """
+    delays: Dict[str, float] = {}
+    agents: List[str] = []
+    in_rules = False
+    for raw in text.splitlines():
+        line = raw.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        key, value = (part.strip() for part in line.split(':', 1))
+        key = key.lower()
+        if key == 'user-agent':
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        else:
+            in_rules = True
+            if key == 'crawl-delay':
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for a in agents:
+                    delays.setdefault(a, delay)
+    delay = delays.get(agent.lower(), delays.get('*'))
+    return min(delay, MAX_CRAWL_DELAY) if delay and delay > 0 else None
+
+
+@dataclass
+class DiscoveryResult:
+    """What a domain's robots.txt + sitemaps say about it."""
+    domain: str
+    page_urls: List[str] = field(default_factory=list)
+    crawl_delay: Optional[float] = None
+    from_cache: bool = False
+
+    def ranked(
+        self,
+        keywords: Dict[str, int] = SERVICE_URL_KEYWORDS,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        return rank_urls(self.page_urls, keywords, limit)
+
+
+class SiteDiscovery:
+    """Per-domain robots.txt / sitemap cache with Crawl-delay pacing."""
+
+    def __init__(self, path: Path, ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.path = Path(path)
+        self.ttl = ttl_hours * 3600
+        self._entries: Dict[str, Dict] = {}
+        self._robots: Dict[str, RobotFileParser] = {}
+        self._delays: Dict[str, Optional[float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._next_at: Dict[str, float] = {}
+        self._dirty = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable discovery cache {self.path}: {e}")
+
+    # ── Fetching ─────────────────────────────────────────────────────────────
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(FETCH_TIMEOUT, connect=5),
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def _get(self, url: str) -> Tuple[int, bytes]:
+        try:
+            resp = await self._http().get(url)
+        except Exception as e:
+            logger.debug(f"Discovery fetch failed for {url}: {e}")
+            return 0, b""
+        return resp.status_code, resp.content[:MAX_SITEMAP_BYTES]
+
+    async def _fetch_robots(self, origin: str) -> str:
+        status, body = await self._get(origin + "/robots.txt")
+        if status in (401, 403):
+            return "User-agent: *\nDisallow: /\n"
+        if status != 200 or b"<html" in body[:512].lower():
+            return ""
+        return body.decode("utf-8", "replace")[:MAX_ROBOTS_CHARS]
+
+    async def _fetch_sitemaps(self, origin: str, listed: List[str]) -> List[str]:
+        queue = list(dict.fromkeys(listed))
+        # Conventional locations, tried one at a time only when robots.txt lists none
+        fallbacks = [] if queue else [origin + p for p in FALLBACK_SITEMAPS]
+        seen = set()
+        pages: List[str] = []
+        while len(seen) < MAX_SITEMAP_FETCHES and len(pages) < MAX_PAGE_URLS:
+            if not queue:
+                if pages or not fallbacks:
+                    break
+                queue.append(fallbacks.pop(0))
+            sitemap_url = queue.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            status, body = await self._get(sitemap_url)
+            if status != 200 or not body:
+                continue
+            page_urls, children = parse_sitemap(body)
+            pages.extend(page_urls)
+            children = [c for c in children if not _SITEMAP_SKIP.search(c)]
+            children.sort(key=lambda c: 0 if _SITEMAP_PRIORITY.search(c) else 1)
+            queue.extend(children)
+        return list(dict.fromkeys(pages))[:MAX_PAGE_URLS]
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    async def discover(self, site_url: str) -> DiscoveryResult:
+        """robots.txt + sitemap pages for site_url's domain (cached for ttl_hours)."""
+        domain = site_domain(site_url)
+        if not domain:
+            return DiscoveryResult(domain="")
+
+        async with self._locks[domain]:
+            entry = self._entries.get(domain)
+            from_cache = entry is not None and time.time() - entry.get("fetched_at", 0) < self.ttl
+            if not from_cache:
+                parsed = urlparse(site_url)
+                origin = f"{parsed.scheme or 'https'}://{parsed.netloc}"
+                robots_text = await self._fetch_robots(origin)
+                robots = parse_robots(robots_text)
+                pages = await self._fetch_sitemaps(origin, robots.site_maps() or [])
+                entry = {
+                    "fetched_at": time.time(),
+                    "robots": robots_text,
+                    "pages": [u for u in pages if site_domain(u) == domain],
+                }
+                self._entries[domain] = entry
+                self._robots[domain] = robots
+                self._delays.pop(domain, None)
+                self._dirty += 1
+                if self._dirty >= 25:
+                    self.save()
+
+        if domain not in self._robots:
+            self._robots[domain] = parse_robots(entry.get("robots", ""))
+        if domain not in self._delays:
+            self._delays[domain] = parse_crawl_delay(entry.get("robots", ""))
+        return DiscoveryResult(
+            domain=domain,
+            page_urls=entry.get("pages", []),
+            crawl_delay=self._delays[domain],
+            from_cache=from_cache,
+        )
+
+    def allowed(self, url: str) -> bool:
+        """robots.txt verdict for url (True if the domain was never discovered)."""
+        robots = self._robots.get(site_domain(url))
+        if robots is None:
+            return True
+        return robots.can_fetch(ROBOTS_AGENT, url)
+
+    async def throttle(self, url: str) -> None:
+        """Wait until the domain's Crawl-delay has passed since the last request."""
+        domain = site_domain(url)
+        delay = self._delays.get(domain)
+        if not delay:
+            return
+        async with self._locks[domain]:
+            wait = self._next_at.get(domain, 0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_at[domain] = time.monotonic() + delay
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")  # workers may save concurrently
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path)
+        self._dirty = 0
+
+    async def aclose(self) -> None:
+        if self._dirty:
+            self.save()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
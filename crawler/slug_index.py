@@ -0,0 +1,173 @@
+"""
+Persistent provider slug index, synced incrementally from the providers table.
+
+Step 4 used to page through every provider's slug on every run and run a
+regex over all of them to rebuild the -2, -3, ... suffix counters. SlugIndex
+keeps that state in data/slug_index.json instead:
+
+  slugs       – place_id → provider_slug as last seen in the DB (or written
+                by this script)
+  max_suffix  – base slug → highest numeric suffix in use ("acme-austin-tx-3"
+                → {"acme-austin-tx": 3}); updated as slugs come in
+  synced_at   – newest updated_at seen; sync() only fetches providers updated
+                since then (the first run, or a different SUPABASE_URL, does a
+                full fetch)
+
+assign() then costs O(rows in the CSV):
+
+  1. a provider keeps its current slug if that still matches its name/city
+     (the base, or the base plus a suffix), so re-runs never rename pages
+  2. otherwise it gets the base slug if no other provider holds it
+  3. otherwise base-(max_suffix + 1)
+
+Deleted providers are not seen by an incremental sync; their slugs just stay
+reserved until a full sync (--rebuild-slug-index).
+
+Usage:
+    index = SlugIndex(DATA_DIR / "slug_index.json", supabase_url)
+    await index.sync(engine, logger)
+    df["provider_slug"] = index.assign(df["place_id"], raw_slugs)
+    ... upsert ...
+    index.record(written_place_ids_and_slugs)
+    index.save()
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUFFIX_RE = re.compile(r'^(.+)-(\d+)$')
+
+
+def split_suffix(slug: str) -> Tuple[str, int]:
+    """("acme-austin-tx", 3) for "acme-austin-tx-3"; (slug, 1) when there is no suffix."""
+    m = SUFFIX_RE.match(slug)
+    return (m.group(1), int(m.group(2))) if m else (slug, 1)
+
+
+class SlugIndex:
+    """place_id → slug map plus per-base suffix counters."""
+
+    def __init__(self, path: Path, source: Optional[str] = None):
+        """source identifies the database (its URL); None loads the index whatever it was built for."""
+        self.path = Path(path)
+        self.source = source
+        self.synced_at: Optional[str] = None
+        self.slugs: Dict[str, str] = {}
+        self.max_suffix: Dict[str, int] = {}
+        self._owners: Dict[str, str] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                if source is None or data.get('source') == source:
+                    self.synced_at = data.get('synced_at')
+                    self.slugs = data.get('slugs', {})
+                    self.max_suffix = data.get('max_suffix', {})
+                else:
+                    logger.info(f"Slug index {self.path} was built for another database — rebuilding")
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable slug index {self.path}: {e}")
+        self._owners = {slug: pid for pid, slug in self.slugs.items()}
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def clear(self):
+        self.synced_at = None
+        self.slugs, self.max_suffix, self._owners = {}, {}, {}
+
+    def _set(self, place_id: str, slug: str):
+        old = self.slugs.get(place_id)
+        if old == slug:
+            return
+        if old is not None and self._owners.get(old) == place_id:
+            del self._owners[old]
+        self.slugs[place_id] = slug
+        self._owners[slug] = place_id
+        base, n = split_suffix(slug)
+        if n > 1:
+            self.max_suffix[base] = max(self.max_suffix.get(base, 1), n)
+
+    def record(self, pairs: Iterable[Tuple[str, str]]):
+        """Note (place_id, slug) pairs that were written to the DB."""
+        for place_id, slug in pairs:
+            if place_id and slug:
+                self._set(str(place_id), str(slug))
+
+    async def sync(self, engine, log=None, full: bool = False) -> int:
+        """Pull providers updated since the last sync through PostgREST. Returns rows fetched."""
+        if full:
+            self.clear()
+        filters = {'updated_at': f"gte.{self.synced_at}"} if self.synced_at else None
+        rows = await engine.fetch_all(
+            "providers", "place_id,provider_slug,updated_at", order="updated_at,place_id", filters=filters,
+        )
+        return self.apply(rows, incremental=filters is not None, log=log)
+
+    def apply(self, rows: List[Dict[str, str]], incremental: bool = True, log=None) -> int:
+        """Merge fetched {place_id, provider_slug, updated_at} rows and advance synced_at."""
+        log = log or logger
+        self.record((r.get('place_id'), r.get('provider_slug')) for r in rows)
+        stamps = [str(r['updated_at']) for r in rows if r.get('updated_at')]
+        if stamps:
+            self.synced_at = max(stamps + ([self.synced_at] if self.synced_at else []))
+        log.info(
+            f"  Slug index: {len(rows):,} providers {'changed since last sync' if incremental else 'fetched'}, "
+            f"{len(self):,} slugs known"
+        )
+        return len(rows)
+
+    # ── Assignment ───────────────────────────────────────────────────────────
+
+    def assign(self, place_ids: Iterable[str], raw_slugs: Iterable[str]) -> List[str]:
+        """Collision-free slug per row, in order (see module docstring)."""
+        claimed: Dict[str, str] = {}     # slug → place_id, this batch
+        result = []
+
+        def free(slug: str, place_id: str) -> bool:
+            owner = claimed.get(slug, self._owners.get(slug))
+            return owner is None or owner == place_id
+
+        for place_id, raw in zip(place_ids, raw_slugs):
+            place_id = str(place_id)
+            current = self.slugs.get(place_id)
+            if current and (current == raw or split_suffix(current)[0] == raw) and free(current, place_id):
+                slug = current
+            elif free(raw, place_id):
+                slug = raw
+            else:
+                n = self.max_suffix.get(raw, 1) + 1
+                while not free(f"{raw}-{n}", place_id):
+                    n += 1
+                slug = f"{raw}-{n}"
+                self.max_suffix[raw] = n
+            claimed[slug] = place_id
+            result.append(slug)
+        return result
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({
+                'source': self.source,
+                'synced_at': self.synced_at,
+                'slugs': self.slugs,
+                'max_suffix': self.max_suffix,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path)
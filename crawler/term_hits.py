@@ -0,0 +1,350 @@
+"""
+Stored per-page term hits, so scoring changes don't need a re-crawl.
+
+03_verify_and_enrich.py records, for every page it scans, how often each
+BACKFLOW_TERMS term occurred. TermHits keeps those counts as one sparse
+pages × terms matrix in CSR form (data/term_hits.npz):
+
+  place_ids, urls, kinds   – one entry per page row; kind is 'home',
+                             'internal' or 'maps' (the Google Maps fields)
+  terms                    – column vocabulary
+  indptr, indices, counts  – CSR arrays; only non-zero counts are stored
+
+Each batch's rows are appended to data/term_hits.journal (one JSON line per
+place) rather than rewriting the matrix; the journal is replayed on load and
+folded into the npz every COMPACT_SECONDS and at the end of a run.
+
+Pages without any hits are not stored. rescore() re-applies weights,
+thresholds and tier rules to the whole matrix with numpy, following the
+verifier's order of decisions (Maps data, then homepage, then best page).
+
+Usage:
+    hits = TermHits(DATA_DIR / "term_hits.npz")
+    hits.record(batch_results)     # replaces each place_id's rows
+    hits.save()                    # journals the batch
+    ...
+    hits.save(compact=True)        # end of run: rewrite the npz
+
+    scores = rescore(TermHits(path), weights=BACKFLOW_TERMS, threshold=2, ...)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PAGE_KINDS = ('home', 'internal', 'maps')
+
+# Key on a verifier result holding [(url, kind, {term: count}), ...]
+RESULT_KEY = 'page_term_hits'
+PageHits = Tuple[str, str, Dict[str, int]]
+
+# save() folds the journal into the npz at most this often (and at the end of a run)
+COMPACT_SECONDS = 300
+
+
+class TermHits:
+    """Sparse place/page × term hit counts, persisted as CSR arrays plus a batch journal."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix('.journal')
+        self.terms: List[str] = []
+        self.place_ids: List[str] = []
+        self.urls: List[str] = []
+        self.kinds: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        self._indptr: List[int] = [0]
+        self._indices: List[int] = []
+        self._counts: List[int] = []
+        # place_id -> first row of its latest record(); earlier rows are stale until compact()
+        self._latest: Dict[str, int] = {}
+        self._pending: List[Tuple[str, List[PageHits]]] = []
+        self._rewrite = False
+        self._compacted_at = time.monotonic()
+
+        if self.path.exists():
+            try:
+                self._load()
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable term hits file {self.path}: {e}")
+                self.clear()
+        if self.journal_path.exists():
+            self._replay()
+
+    def __len__(self) -> int:
+        return len(self.place_ids)
+
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as data:
+            self.terms = data['terms'].tolist()
+            self.place_ids = data['place_ids'].tolist()
+            self.urls = data['urls'].tolist()
+            self.kinds = data['kinds'].tolist()
+            self._indptr = data['indptr'].tolist()
+            self._indices = data['indices'].tolist()
+            self._counts = data['counts'].tolist()
+        self._term_ids = {t: i for i, t in enumerate(self.terms)}
+
+    def _replay(self):
+        """Apply batches journaled since the last compaction."""
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line from a killed run; rewrite so later appends start clean
+                    self._rewrite = True
+                    break
+                self._replace(entry['place_id'], entry['pages'])
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def clear(self):
+        self.place_ids, self.urls, self.kinds = [], [], []
+        self._indptr, self._indices, self._counts = [0], [], []
+        self._latest, self._pending = {}, []
+        self._rewrite = True
+
+    def add(self, place_id: str, url: str, kind: str, hits: Dict[str, int]):
+        """Append one page row."""
+        for term, count in hits.items():
+            if count <= 0:
+                continue
+            if term not in self._term_ids:
+                self._term_ids[term] = len(self.terms)
+                self.terms.append(term)
+            self._indices.append(self._term_ids[term])
+            self._counts.append(int(count))
+        self.place_ids.append(place_id)
+        self.urls.append(url or '')
+        self.kinds.append(kind)
+        self._indptr.append(len(self._indices))
+
+    def _replace(self, place_id: str, pages: List[PageHits]):
+        """Append place_id's new rows; its older rows are dropped at the next compact()."""
+        self._latest[place_id] = len(self.place_ids)
+        for url, kind, hits in pages:
+            if hits:
+                self.add(place_id, url, kind, hits)
+
+    def _select(self, rows: List[int]):
+        indptr, indices, counts = [0], [], []
+        for i in rows:
+            start, end = self._indptr[i], self._indptr[i + 1]
+            indices.extend(self._indices[start:end])
+            counts.extend(self._counts[start:end])
+            indptr.append(len(indices))
+        self.place_ids = [self.place_ids[i] for i in rows]
+        self.urls = [self.urls[i] for i in rows]
+        self.kinds = [self.kinds[i] for i in rows]
+        self._indptr, self._indices, self._counts = indptr, indices, counts
+
+    def compact(self):
+        """Drop rows superseded by a later record() of the same place_id."""
+        if self._latest:
+            latest = self._latest
+            self._select([i for i, p in enumerate(self.place_ids) if i >= latest.get(p, 0)])
+            self._latest = {}
+
+    def keep(self, place_ids: Set[str]):
+        """Drop every page row whose place_id is not in place_ids."""
+        self.compact()
+        rows = [i for i, p in enumerate(self.place_ids) if p in place_ids]
+        if len(rows) == len(self.place_ids):
+            return
+        self._select(rows)
+        self._rewrite = True
+
+    def record(self, results: Iterable[Dict[str, Any]]):
+        """Replace the rows of every place_id in a batch of verifier results.
+
+        Costs O(batch): new rows are appended and journaled by save(); the
+        rows they replace are only dropped when the matrix is compacted.
+        """
+        for r in results:
+            if not r.get('place_id'):
+                continue
+            place_id = str(r['place_id'])
+            pages = [(url, kind, hits) for url, kind, hits in r.get(RESULT_KEY) or [] if hits]
+            self._replace(place_id, pages)
+            self._pending.append((place_id, pages))
+
+    def update(self, other: 'TermHits'):
+        """Replace this matrix's rows for every place_id in other (e.g. a worker shard)."""
+        if not len(other):
+            return
+        other.compact()
+        pages: Dict[str, List[PageHits]] = {}
+        for place_id, url, kind, hits in other.rows():
+            pages.setdefault(place_id, []).append((url, kind, hits))
+        for place_id, place_pages in pages.items():
+            self._replace(place_id, place_pages)
+            self._pending.append((place_id, place_pages))
+
+    # ── Matrix access ────────────────────────────────────────────────────────
+
+    def rows(self) -> Iterator[Tuple[str, str, str, Dict[str, int]]]:
+        """(place_id, url, kind, {term: count}) per page row."""
+        self.compact()
+        for i, place_id in enumerate(self.place_ids):
+            start, end = self._indptr[i], self._indptr[i + 1]
+            hits = {self.terms[t]: c for t, c in zip(self._indices[start:end], self._counts[start:end])}
+            yield place_id, self.urls[i], self.kinds[i], hits
+
+    def csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(indptr, indices, counts) as numpy arrays."""
+        self.compact()
+        return (
+            np.asarray(self._indptr, dtype=np.int64),
+            np.asarray(self._indices, dtype=np.int32),
+            np.asarray(self._counts, dtype=np.int32),
+        )
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self, compact: bool = False):
+        """Journal the batches recorded since the last save (append + fsync).
+
+        The npz itself is rewritten only every COMPACT_SECONDS, when compact
+        is set (end of run), or after clear() / keep(); rewriting it for every
+        batch made a long run quadratic.
+        """
+        due = time.monotonic() - self._compacted_at >= COMPACT_SECONDS
+        if compact or due or self._rewrite or not self.path.exists():
+            self._write_matrix()
+            return
+        if not self._pending:
+            return
+        with open(self.journal_path, 'a') as f:
+            for place_id, pages in self._pending:
+                f.write(json.dumps({'place_id': place_id, 'pages': pages}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = []
+
+    def _write_matrix(self):
+        indptr, indices, counts = self.csr()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(
+                f,
+                terms=np.asarray(self.terms, dtype=str),
+                place_ids=np.asarray(self.place_ids, dtype=str),
+                urls=np.asarray(self.urls, dtype=str),
+                kinds=np.asarray(self.kinds, dtype=str),
+                indptr=indptr,
+                indices=indices,
+                counts=counts,
+            )
+        tmp.replace(self.path)
+        # Replaying a journal over the matrix it was folded into is harmless, so
+        # a crash between these two steps loses nothing
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._pending = []
+        self._rewrite = False
+        self._compacted_at = time.monotonic()
+
+    def summary(self) -> str:
+        self.compact()
+        return (
+            f"term hits: {len(set(self.place_ids)):,} places, {len(self):,} pages, "
+            f"{len(self._indices):,} non-zero counts over {len(self.terms)} terms"
+        )
+
+
+# ─── Rescoring ────────────────────────────────────────────────────────────────
+
+def _group_max(codes: np.ndarray, n: int, values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    out = np.zeros(n, dtype=float)
+    np.maximum.at(out, codes[mask], values[mask])
+    return out
+
+
+def _group_any(codes: np.ndarray, n: int, values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    out = np.zeros(n, dtype=bool)
+    np.logical_or.at(out, codes[mask], values[mask])
+    return out
+
+
+def rescore(
+    hits: TermHits,
+    weights: Dict[str, float],
+    threshold: float,
+    testing_threshold: float,
+    testing_terms: Set[str],
+    service_threshold: float,
+    maps_confidence: float,
+    max_score: float,
+) -> pd.DataFrame:
+    """Score every stored place under new weights and rules.
+
+    Returns one row per place_id: backflow_score, verified, matched_on, tier,
+    has_pages (False when only Maps data was stored).
+    """
+    columns = ['place_id', 'backflow_score', 'verified', 'matched_on', 'tier', 'has_pages']
+    if not len(hits):
+        return pd.DataFrame(columns=columns)
+
+    indptr, indices, _ = hits.csr()
+    n_rows = len(hits)
+    rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+
+    # Each distinct term counts once per page, as in TermMatcher.score_hits()
+    w = np.array([weights.get(t, 0) for t in hits.terms], dtype=float)
+    is_testing = np.array([t in testing_terms for t in hits.terms], dtype=float)
+    page_score = np.minimum(max_score, np.bincount(rows, weights=w[indices], minlength=n_rows))
+    page_testing = np.bincount(rows, weights=is_testing[indices], minlength=n_rows) > 0
+
+    codes, places = pd.factorize(np.asarray(hits.place_ids))
+    n = len(places)
+    kinds = np.asarray(hits.kinds)
+    home = kinds == 'home'
+    crawled = home | (kinds == 'internal')
+    maps = kinds == 'maps'
+    ones = np.ones(n_rows, dtype=bool)
+
+    maps_score = _group_max(codes, n, page_score, maps)
+    home_score = _group_max(codes, n, page_score, home)
+    site_score = _group_max(codes, n, page_score, crawled)
+
+    maps_ok = (maps_confidence > 0) & (maps_score >= max(maps_confidence, threshold))
+    home_ok = ~maps_ok & (home_score >= threshold)
+    site_ok = ~maps_ok & ~home_ok & (site_score >= threshold)
+    verified = maps_ok | home_ok | site_ok
+
+    score = np.select([maps_ok, home_ok], [maps_score, home_score], site_score)
+    testing = np.select(
+        [maps_ok, home_ok],
+        [_group_any(codes, n, page_testing, maps), _group_any(codes, n, page_testing, home)],
+        _group_any(codes, n, page_testing, crawled),
+    )
+    matched_on = np.select(
+        [maps_ok, home_ok, site_ok & (home_score > 0), site_ok],
+        ['MAPS_DATA', 'HOMEPAGE', 'BOTH', 'INTERNAL'],
+        '',
+    )
+    tier = np.where(
+        verified & (score >= testing_threshold) & testing, 'testing',
+        np.where(verified & (score >= service_threshold), 'service', 'none'),
+    )
+
+    return pd.DataFrame({
+        'place_id': places,
+        'backflow_score': np.round(score, 2),
+        'verified': verified,
+        'matched_on': matched_on,
+        'tier': tier,
+        'has_pages': _group_any(codes, n, ones, crawled),
+    })
@@ -0,0 +1,161 @@
+"""
+Compiled phrase matcher for backflow scoring and service tag extraction.
+
+The verifier used to lowercase each page and run one substring check per
+BACKFLOW_TERMS entry, then repeat the exercise for every SERVICE_TAG_TRIGGERS
+phrase over the joined text of all pages. TermMatcher compiles both tables into
+a single phrase index keyed by normalised token sequences and scans a page
+once: one regex pass finds the words that can start a phrase, and each hit is
+extended at most `max_phrase_len` tokens, so cost grows with text length only.
+
+Matching rules:
+  - Phrases start on a word boundary ("rpz" no longer matches inside "xrpz1").
+    The last word may carry an inflection (_SUFFIXES), so "backflow testing"
+    and "backflow testers" still count for "backflow test" as they did under
+    substring matching, and "backflow preventers" for "backflow preventer".
+  - Runs of whitespace between words match a single space, so phrases split
+    across markdown line breaks still count.
+  - Hyphen and slash are significant ("cross-connection", "24/7").
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Separators that are part of a phrase; anything else between two tokens
+# (punctuation, markup) breaks the phrase.
+_JOINERS = {"-", "/"}
+_NEXT_TOKEN_RE = re.compile(r"(\s+|[-/])([a-z0-9]+)")
+
+# Endings stripped from a phrase's last word before lookup ("test" + "ing")
+_SUFFIXES = ("s", "es", "ed", "er", "ers", "ing", "ings")
+_MIN_STEM = 3
+
+
+def _normalise_phrase(phrase: str) -> str:
+    return re.sub(r"\s+", " ", phrase.strip().lower())
+
+
+@dataclass
+class TermScan:
+    """Result of scanning one piece of text."""
+    hits: Counter = field(default_factory=Counter)   # term -> occurrences
+    tags: Set[str] = field(default_factory=set)      # canonical service tags
+    score: int = 0                                    # capped weighted score
+
+    @property
+    def matched_terms(self) -> List[str]:
+        return sorted(self.hits)
+
+
+class TermMatcher:
+    """Single-pass matcher over weighted terms and service tag triggers."""
+
+    def __init__(
+        self,
+        term_weights: Dict[str, int],
+        tag_triggers: Optional[Dict[str, Iterable[str]]] = None,
+        max_score: int = 10,
+    ):
+        self.term_weights = {_normalise_phrase(t): w for t, w in term_weights.items()}
+        self.max_score = max_score
+
+        # phrase -> (term or None, [tags])
+        self._index: Dict[str, Tuple[Optional[str], List[str]]] = {}
+        for term in self.term_weights:
+            self._index[term] = (term, [])
+        for tag, triggers in (tag_triggers or {}).items():
+            for trigger in triggers:
+                key = _normalise_phrase(trigger)
+                term, tags = self._index.get(key, (None, []))
+                if tag not in tags:
+                    tags = tags + [tag]
+                self._index[key] = (term, tags)
+
+        # Every proper prefix of a phrase, so extension can stop early
+        self._prefixes: Set[str] = set()
+        first_tokens: Set[str] = set()
+        self.max_phrase_len = 1
+        for key in self._index:
+            tokens, seps = self._split(key)
+            first_tokens.add(tokens[0])
+            self.max_phrase_len = max(self.max_phrase_len, len(tokens))
+            prefix = tokens[0]
+            for tok, sep in zip(tokens[1:], seps):
+                self._prefixes.add(prefix)
+                prefix = prefix + sep + tok
+
+        # Only positions where some phrase can start are visited; the regex
+        # engine skips everything else without returning to Python.
+        alternation = "|".join(re.escape(t) for t in sorted(first_tokens, key=len, reverse=True))
+        endings = "|".join(sorted(_SUFFIXES, key=len, reverse=True))
+        self._start_re = re.compile(rf"(?<![a-z0-9])(?:{alternation})(?:{endings})?(?![a-z0-9])")
+
+    @staticmethod
+    def _split(phrase: str) -> Tuple[List[str], List[str]]:
+        tokens: List[str] = []
+        seps: List[str] = []
+        last_end = None
+        for m in _TOKEN_RE.finditer(phrase):
+            if last_end is not None:
+                gap = phrase[last_end:m.start()]
+                seps.append(" " if gap.isspace() else gap)
+            tokens.append(m.group())
+            last_end = m.end()
+        return tokens, seps
+
+    def _lookup(self, key: str, token: str) -> List[Tuple[Optional[str], List[str]]]:
+        """Entries for key as written and with each inflection of its last token removed."""
+        entries = []
+        entry = self._index.get(key)
+        if entry is not None:
+            entries.append(entry)
+        for suffix in _SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+                entry = self._index.get(key[:-len(suffix)])
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    def scan(self, text: Optional[str]) -> TermScan:
+        """Scan text once and return term hits, score and service tags."""
+        result = TermScan()
+        if not text:
+            return result
+
+        text_lower = text.lower()
+        hits = result.hits
+        tags = result.tags
+        max_len = self.max_phrase_len
+        prefixes = self._prefixes
+
+        for m in self._start_re.finditer(text_lower):
+            key = token = m.group()
+            end = m.end()
+            length = 1
+            while True:
+                for term, entry_tags in self._lookup(key, token):
+                    if term is not None:
+                        hits[term] += 1
+                    tags.update(entry_tags)
+                if length >= max_len or key not in prefixes:
+                    break
+                nxt = _NEXT_TOKEN_RE.match(text_lower, end)
+                if nxt is None:
+                    break
+                gap, token = nxt.groups()
+                key = key + (gap if gap in _JOINERS else " ") + token
+                end = nxt.end()
+                length += 1
+
+        result.score = self.score_hits(hits)
+        return result
+
+    def score_hits(self, hits: Iterable[str]) -> int:
+        """Capped score for a set of matched terms (each term counts once)."""
+        return min(self.max_score, sum(self.term_weights.get(t, 0) for t in set(hits)))
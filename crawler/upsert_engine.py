@@ -0,0 +1,407 @@
+"""
+Pipelined PostgREST upserts over one pooled HTTP connection.
+
+The supabase client sends one batch, waits for the round trip, then sends the
+next. UpsertEngine talks to the same REST endpoint (/rest/v1/<table>) with an
+httpx.AsyncClient and keeps `concurrency` batches in flight at once:
+
+  pooling    – one keep-alive connection pool for the whole run; HTTP/2
+               (multiplexed on a single connection) when the h2 package is
+               installed, HTTP/1.1 with `concurrency` connections otherwise
+  retries    – 408/429/5xx responses and network errors are retried up to
+               max_retries times with exponential backoff and full jitter,
+               honouring Retry-After
+  bisection  – a batch rejected for its data (400/409/413/422 from Postgres,
+               e.g. a constraint violation) is split in half and each half
+               re-sent, recursively, so one bad row in n costs ~2·log2(n)
+               requests and every good row still lands. The bad rows come
+               back as failures with their own error message
+  sizing     – BatchSizer grows the batch while requests are fast and
+               shrinks it when they get slow, capped so a payload stays
+               under MAX_BATCH_BYTES
+  stats      – rows, batches, retries, bisections, failures, rows/sec and
+               batch latency per table
+
+upsert_rpc() sends the batches to a Postgres function instead
+(/rest/v1/rpc/<function>, rows as its p_rows argument), with the same
+pipelining, retries and bisection.
+
+Batches are serialized with orjson when it is installed (several times faster
+than json.dumps on large batches).
+
+Usage:
+    async with UpsertEngine(url, key, concurrency=4) as engine:
+        stats, failures = await engine.upsert("providers", rows, "place_id", BatchSizer(100))
+        logger.info(stats.summary())
+        rows = await engine.fetch_all("providers", "place_id,provider_slug", order="place_id")
+        rows = await engine.fetch_in("providers", "place_id,content_hash", "place_id", place_ids)
+        stats, failures = await engine.upsert_rpc("upsert_providers_batch", rows)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+CONCURRENCY_DEFAULT = 4
+BATCH_SIZE_DEFAULT = 100
+MAX_RETRIES_DEFAULT = 5
+MAX_BATCH_ROWS = 1000
+MAX_BATCH_BYTES = 2_000_000   # PostgREST/Kong reject very large bodies
+TARGET_LATENCY = 2.0          # seconds per batch; above this the batch shrinks
+REQUEST_TIMEOUT = 60.0        # seconds
+BACKOFF_BASE = 0.5            # seconds; doubles per retry
+BACKOFF_MAX = 30.0            # seconds
+PROGRESS_EVERY = 10           # log progress every N batches
+FETCH_PAGE_SIZE = 1000
+FETCH_IN_CHUNK = 150          # values per in.(...) filter; keeps the URL short
+
+# Statuses worth retrying: timeouts, rate limits, gateway/server hiccups
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Statuses that can be caused by individual rows, so bisecting can isolate them
+BISECT_STATUSES = {400, 409, 413, 422}
+
+
+class UpsertError(Exception):
+    """A batch the server rejected (or that kept failing after every retry)."""
+
+    def __init__(self, message: str, status: Optional[int] = None, code: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+    @property
+    def row_specific(self) -> bool:
+        """Could this error come from particular rows (rather than the request)?"""
+        # PGRSTxxx codes are PostgREST request/schema errors, e.g. an unknown column;
+        # SQLSTATE class 42 (undefined column/function, permission denied) likewise
+        return self.status in BISECT_STATUSES and not (self.code or '').startswith(('PGRST', '42'))
+
+
+@dataclass
+class UpsertStats:
+    table: str
+    rows: int = 0
+    failed: int = 0
+    batches: int = 0
+    retries: int = 0
+    bisections: int = 0
+    seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def latency_p95(self) -> float:
+        return float(np.percentile(self.latencies, 95)) if self.latencies else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.table}: {self.rows:,} rows in {self.batches:,} batches, {self.failed:,} failed, "
+            f"{self.retries:,} retries, {self.bisections:,} bisections, {self.seconds:.1f}s "
+            f"({self.rows_per_sec:,.0f} rows/sec, p95 batch {self.latency_p95() * 1000:.0f}ms)"
+        )
+
+
+def dumps(rows: Any) -> bytes:
+    """JSON request body (orjson if available)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(rows)
+    return json.dumps(rows, separators=(',', ':')).encode('utf-8')
+
+
+def _response_error(response: httpx.Response) -> UpsertError:
+    """UpsertError from a PostgREST error body ({message, details, hint, code})."""
+    status = response.status_code
+    try:
+        body = response.json()
+    except ValueError:
+        return UpsertError(f"HTTP {status}: {response.text[:300]}", status)
+    if isinstance(body, dict):
+        parts = [body.get('code'), body.get('message'), body.get('details'), body.get('hint')]
+        message = f"HTTP {status}: " + ' | '.join(str(p) for p in parts if p)
+        return UpsertError(message, status, body.get('code'))
+    return UpsertError(f"HTTP {status}: {str(body)[:300]}", status)
+
+
+def _retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+    if response is None:
+        return None
+    value = response.headers.get('retry-after')
+    try:
+        return min(BACKOFF_MAX, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class BatchSizer:
+    """Rows per batch, adapted to payload size and observed latency.
+
+    Grows 25% after a full batch that took under half of target_latency and
+    halves after one that took longer than target_latency. Never more than max_bytes of JSON (at the average row
+    size seen so far) or max_rows rows. adaptive=False keeps the initial size.
+    """
+
+    def __init__(
+        self,
+        initial: int = BATCH_SIZE_DEFAULT,
+        adaptive: bool = True,
+        max_rows: int = MAX_BATCH_ROWS,
+        max_bytes: int = MAX_BATCH_BYTES,
+        target_latency: float = TARGET_LATENCY,
+    ):
+        self.size = float(max(1, initial))
+        self.adaptive = adaptive
+        self.max_rows = max(1, max_rows)
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.bytes_per_row = 0.0
+
+    def next_size(self) -> int:
+        return max(1, int(self.size))
+
+    def observe(self, rows: int, nbytes: int, seconds: float):
+        """Feed back one successful batch."""
+        if not self.adaptive or rows <= 0:
+            return
+        row_bytes = nbytes / rows
+        self.bytes_per_row = row_bytes if not self.bytes_per_row else 0.8 * self.bytes_per_row + 0.2 * row_bytes
+        if seconds > self.target_latency:
+            self.size /= 2
+        elif seconds < self.target_latency / 2 and rows >= self.next_size():
+            self.size *= 1.25
+        self.size = max(1.0, min(self.size, self.max_rows, self.max_bytes / self.bytes_per_row))
+
+
+class UpsertEngine:
+    """Async PostgREST client that pipelines upsert batches."""
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        concurrency: int = CONCURRENCY_DEFAULT,
+        max_retries: int = MAX_RETRIES_DEFAULT,
+        timeout: float = REQUEST_TIMEOUT,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.base_url = url.rstrip('/') + '/rest/v1'
+        self.key = key
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> 'UpsertEngine':
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=HTTP2_AVAILABLE,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            headers={
+                'apikey': self.key,
+                'Authorization': f"Bearer {self.key}",
+                'Content-Type': 'application/json',
+            },
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    # ── Requests ─────────────────────────────────────────────────────────────
+
+    async def _request(self, method: str, path: str, stats: Optional[UpsertStats] = None,
+                       **kwargs) -> httpx.Response:
+        """Send one request, retrying transient failures with backoff."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = await self._client.request(method, path, **kwargs)
+                if response.status_code < 400:
+                    return response
+                error = _response_error(response)
+                retryable = response.status_code in RETRY_STATUSES
+            except httpx.TransportError as e:
+                error = UpsertError(f"{type(e).__name__}: {e}")
+                retryable = True
+
+            if not retryable or attempt >= self.max_retries:
+                raise error
+            delay = _retry_after(response) or random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            attempt += 1
+            if stats is not None:
+                stats.retries += 1
+            self.logger.warning(f"  {path}: {error} — retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def post_batch(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str],
+                         stats: Optional[UpsertStats] = None) -> int:
+        """Upsert one batch (merge-duplicates on on_conflict). Returns the payload size.
+
+        on_conflict=None calls the function rpc/<name> given as table with {"p_rows": rows}.
+        Raises UpsertError.
+        """
+        if on_conflict is None:
+            content = dumps({'p_rows': rows})
+            await self._request('POST', f"/{table}", stats=stats, content=content)
+            return len(content)
+        content = dumps(rows)
+        await self._request(
+            'POST', f"/{table}",
+            stats=stats,
+            params={'on_conflict': on_conflict},
+            content=content,
+            headers={'Prefer': 'resolution=merge-duplicates,return=minimal'},
+        )
+        return len(content)
+
+    async def _bisect(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str],
+                      error: UpsertError, stats: UpsertStats, failures: list):
+        """Split a rejected batch until the rows that cause error are isolated."""
+        if len(rows) == 1 or not error.row_specific:
+            stats.failed += len(rows)
+            failures.append((rows, str(error)))
+            return
+        stats.bisections += 1
+        mid = len(rows) // 2
+        for half in (rows[:mid], rows[mid:]):
+            try:
+                await self.post_batch(table, half, on_conflict, stats)
+                stats.rows += len(half)
+            except UpsertError as e:
+                await self._bisect(table, half, on_conflict, e, stats, failures)
+
+    async def upsert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: Optional[str],
+        sizer: Optional[BatchSizer] = None,
+        on_batch: Optional[Callable[[int, int, list], None]] = None,
+    ) -> Tuple[UpsertStats, List[Tuple[List[Dict[str, Any]], str]]]:
+        """Upsert rows in batches, `concurrency` at a time.
+
+        Returns (stats, failures) where failures is [(rows, error), ...]: the
+        rows bisection isolated (usually one at a time), or whole batches
+        that failed for a reason no split can fix (auth, retries exhausted).
+        on_batch(start, end, failures) is called as each rows[start:end] is
+        settled, in completion order (batches run concurrently).
+        """
+        sizer = sizer or BatchSizer()
+        stats = UpsertStats(table)
+        failures: List[Tuple[List[Dict[str, Any]], str]] = []
+        total = len(rows)
+        cursor = 0
+        started = time.perf_counter()
+
+        async def worker():
+            nonlocal cursor
+            # Workers take the next slice in turn, so batches go out in order
+            while cursor < total:
+                start, end = cursor, min(total, cursor + sizer.next_size())
+                cursor = end
+                batch = rows[start:end]
+                t0 = time.perf_counter()
+                batch_failures: List[Tuple[List[Dict[str, Any]], str]] = []
+                try:
+                    nbytes = await self.post_batch(table, batch, on_conflict, stats)
+                    stats.rows += len(batch)
+                    sizer.observe(len(batch), nbytes, time.perf_counter() - t0)
+                except UpsertError as e:
+                    if e.row_specific and len(batch) > 1:
+                        self.logger.warning(
+                            f"  {table} rows {start:,}-{end - 1:,} rejected ({e}); bisecting..."
+                        )
+                    await self._bisect(table, batch, on_conflict, e, stats, batch_failures)
+                    if not e.row_specific:
+                        self.logger.error(f"  {table} rows {start:,}-{end - 1:,} ERROR: {e}")
+                failures.extend(batch_failures)
+                if on_batch is not None:
+                    on_batch(start, end, batch_failures)
+                stats.latencies.append(time.perf_counter() - t0)
+                stats.batches += 1
+                if stats.batches % PROGRESS_EVERY == 0 or stats.rows + stats.failed == total:
+                    elapsed = time.perf_counter() - started
+                    self.logger.info(
+                        f"  {table} [{stats.rows + stats.failed:,}/{total:,}] "
+                        f"{stats.rows / elapsed if elapsed else 0:,.0f} rows/sec, batch {sizer.next_size()}"
+                    )
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        stats.seconds = time.perf_counter() - started
+        return stats, failures
+
+    async def upsert_rpc(
+        self,
+        function: str,
+        rows: List[Dict[str, Any]],
+        sizer: Optional[BatchSizer] = None,
+        on_batch: Optional[Callable[[int, int, list], None]] = None,
+    ) -> Tuple[UpsertStats, List[Tuple[List[Dict[str, Any]], str]]]:
+        """upsert(), but each batch is one call to the Postgres function (its p_rows argument)."""
+        return await self.upsert(f"rpc/{function}", rows, None, sizer, on_batch)
+
+    async def call(self, function: str, args: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a Postgres function once (POST /rpc/<function>) and return its result."""
+        response = await self._request('POST', f"/rpc/{function}", content=dumps(args or {}))
+        return response.json() if response.content else None
+
+    async def fetch_all(self, table: str, select: str, order: str, filters: Optional[Dict[str, str]] = None,
+                        page_size: int = FETCH_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """Every row of table (select columns, optional PostgREST filters), paged in a stable order."""
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            response = await self._request('GET', f"/{table}", params={
+                **(filters or {}), 'select': select, 'order': order, 'limit': page_size, 'offset': offset,
+            })
+            page = response.json()
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+
+    async def fetch_in(self, table: str, select: str, column: str, values: List[str],
+                       chunk_size: int = FETCH_IN_CHUNK) -> List[Dict[str, Any]]:
+        """Rows of table whose column is one of values (column=in.(...)), chunks in parallel."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+            quoted = ','.join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in chunk)
+            async with semaphore:
+                response = await self._request('GET', f"/{table}", params={
+                    'select': select, column: f"in.({quoted})",
+                })
+            return response.json()
+
+        chunks = [values[i: i + chunk_size] for i in range(0, len(values), chunk_size)]
+        pages = await asyncio.gather(*(fetch_chunk(c) for c in chunks))
+        return [row for page in pages for row in page]
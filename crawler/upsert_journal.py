@@ -0,0 +1,152 @@
+"""
+Resumable journal of the step 4 upsert batches that reached the database.
+
+04_upsert_supabase.py had no checkpoint: an interrupted run started over from
+the first row. UpsertJournal keeps data/upsert_journal.json instead:
+
+  input_sha1  – sha1 of the input CSV; the journal only applies to that exact
+                file (positions are rows of the cleaned, deduped frame, which
+                is deterministic for a given file)
+  tables      – per table, the merged [start, end) ranges of input positions
+                whose batch was settled: written, or bisected down to rejects.
+                A provider batch also carries its provider_services rows
+                (upsert_providers_batch), so "providers" covers both tables
+  rejects     – {place_id: error} for the rows the database refused, so a
+                resumed run still writes them to upsert_rejects.csv
+
+The journal is saved (atomically, at most every SAVE_EVERY seconds) as
+batches complete and always on exit, including Ctrl-C. --resume skips every
+position already covered; without --resume a new journal is started.
+
+Usage:
+    journal = UpsertJournal(DATA_DIR / "upsert_journal.json", file_sha1(csv_path))
+    if args.resume:
+        journal.resume()
+    todo = [i for i in positions if not journal.covers("providers", i)]
+    ... engine.upsert(..., on_batch=lambda s, e, f: journal.record("providers", s, e, rejects))
+    journal.finish()
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAVE_EVERY = 2.0     # seconds
+
+
+def file_sha1(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """Sorted, non-overlapping [start, end) ranges; adjacent ones are joined."""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class UpsertJournal:
+    """Settled input ranges per table for one input file."""
+
+    def __init__(self, path: Path, input_sha1: str, input_path: Optional[str] = None):
+        self.path = Path(path)
+        self.input_sha1 = input_sha1
+        self.input_path = input_path
+        self.started_at = _now()
+        self.runs = 1
+        self.finished = False
+        self.tables: Dict[str, List[List[int]]] = {}
+        self.rejects: Dict[str, str] = {}
+        self.resumed = False
+        self._starts: Dict[str, List[int]] = {}
+        self._saved_at = 0.0
+
+    def resume(self) -> bool:
+        """Load the saved journal if it was written for this input. Returns whether it was."""
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable upsert journal {self.path}: {e}")
+            return False
+        if data.get('input_sha1') != self.input_sha1:
+            return False
+        self.started_at = data.get('started_at', self.started_at)
+        self.runs = data.get('runs', 0) + 1
+        self.tables = {t: merge_ranges(r) for t, r in data.get('tables', {}).items()}
+        self.rejects = data.get('rejects', {})
+        self._starts = {t: [s for s, _ in r] for t, r in self.tables.items()}
+        self.resumed = True
+        return True
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def covers(self, table: str, position: int) -> bool:
+        ranges = self.tables.get(table, [])
+        i = bisect.bisect_right(self._starts.get(table, []), position) - 1
+        return i >= 0 and position < ranges[i][1]
+
+    def settled(self, table: str) -> int:
+        """Input positions covered for table."""
+        return sum(end - start for start, end in self.tables.get(table, []))
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def record(self, table: str, start: int, end: int, rejects: Optional[Dict[str, str]] = None):
+        """Mark input positions [start, end) of table as settled, with the rows rejected there."""
+        ranges = merge_ranges(self.tables.get(table, []) + [[start, end]])
+        self.tables[table] = ranges
+        self._starts[table] = [s for s, _ in ranges]
+        if rejects:
+            self.rejects.update(rejects)
+        if time.monotonic() - self._saved_at >= SAVE_EVERY:
+            self.save()
+
+    def finish(self):
+        self.finished = True
+        self.save()
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({
+                'input': self.input_path,
+                'input_sha1': self.input_sha1,
+                'started_at': self.started_at,
+                'updated_at': _now(),
+                'runs': self.runs,
+                'finished': self.finished,
+                'tables': self.tables,
+                'rejects': self.rejects,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path)
+        self._saved_at = time.monotonic()
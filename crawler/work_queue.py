@@ -0,0 +1,215 @@
+"""
+SQLite work queue with leases, shared by sharded verifier worker processes.
+
+One Python process (one event loop, one browser) tops out at a core or two.
+03_verify_and_enrich.py --workers N starts N worker processes that claim
+providers from this queue instead of walking the input in batches:
+
+  claim()      – leases up to n pending place_ids to a worker for
+                 LEASE_SECONDS; expired leases of other workers are put back
+                 to pending first, so a killed worker loses nothing
+  heartbeat()  – extends every lease the worker still holds
+  complete()   – marks place_ids done once their results are on disk, together
+                 with the worker's shard file sizes at that point; a restarted
+                 worker truncates its shards back to those offsets (offsets())
+
+A place_id leased MAX_ATTEMPTS times without completing (e.g. a site that
+crashes the browser every time) is marked failed instead of re-queued.
+
+Run settings are stored alongside the queue so workers start with exactly the
+launcher's arguments.
+
+Usage:
+    queue = WorkQueue(DATA_DIR / "verify_queue.sqlite")
+    queue.populate(place_ids)
+    ids = queue.claim("w1", 25)
+    queue.heartbeat("w1")
+    queue.complete("w1", ids, {"verified": 10_240, "rejected": 2_048})
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+LEASE_SECONDS = 120
+HEARTBEAT_SECONDS = 30
+MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    place_id    TEXT PRIMARY KEY,
+    position    INTEGER NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done | failed
+    worker      TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_status_position ON tasks (status, position);
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shard_offsets (
+    worker TEXT NOT NULL,
+    output TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    PRIMARY KEY (worker, output)
+);
+"""
+
+
+class WorkQueue:
+    """place_id work queue with time-limited leases (safe across processes)."""
+
+    def __init__(self, path: Path, lease_seconds: float = LEASE_SECONDS):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    # ── Setup ────────────────────────────────────────────────────────────────
+
+    def populate(self, place_ids: Iterable[str]) -> int:
+        """Queue place_ids in the given order; ids already queued keep their state."""
+        start = self._db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM tasks").fetchone()[0]
+        before = self._db.total_changes
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.executemany(
+            "INSERT OR IGNORE INTO tasks (place_id, position) VALUES (?, ?)",
+            ((pid, start + i) for i, pid in enumerate(place_ids)),
+        )
+        self._db.execute("COMMIT")
+        return self._db.total_changes - before
+
+    def save_settings(self, settings: Dict[str, Any]):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            ((k, json.dumps(v)) for k, v in settings.items()),
+        )
+
+    def settings(self) -> Dict[str, Any]:
+        return {k: json.loads(v) for k, v in self._db.execute("SELECT key, value FROM settings")}
+
+    # ── Leasing ──────────────────────────────────────────────────────────────
+
+    def requeue_expired(self) -> int:
+        """Return expired leases to pending (or failed after MAX_ATTEMPTS)."""
+        now = time.time()
+        cur = self._db.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_until = NULL "
+            "WHERE status = 'leased' AND lease_until < ?",
+            (MAX_ATTEMPTS, now),
+        )
+        return cur.rowcount
+
+    def claim(self, worker: str, n: int) -> List[str]:
+        """Lease up to n pending place_ids to worker, in queue order."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self.requeue_expired()
+            ids = [r[0] for r in self._db.execute(
+                "SELECT place_id FROM tasks WHERE status = 'pending' ORDER BY position LIMIT ?", (n,)
+            )]
+            self._db.executemany(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE place_id = ?",
+                ((worker, time.time() + self.lease_seconds, pid) for pid in ids),
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return ids
+
+    def heartbeat(self, worker: str) -> int:
+        """Extend worker's live leases. Returns how many it still holds."""
+        cur = self._db.execute(
+            "UPDATE tasks SET lease_until = ? WHERE status = 'leased' AND worker = ?",
+            (time.time() + self.lease_seconds, worker),
+        )
+        return cur.rowcount
+
+    def complete(self, worker: str, place_ids: Iterable[str], offsets: Optional[Dict[str, int]] = None):
+        """Mark place_ids done (even if the lease had expired; the results are on disk).
+
+        offsets are the worker's shard file sizes after those results were
+        appended; they commit in the same transaction.
+        """
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.executemany(
+            "UPDATE tasks SET status = 'done', worker = ?, lease_until = NULL WHERE place_id = ?",
+            ((worker, pid) for pid in place_ids),
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO shard_offsets (worker, output, offset) VALUES (?, ?, ?)",
+            ((worker, output, offset) for output, offset in (offsets or {}).items()),
+        )
+        self._db.execute("COMMIT")
+
+    def offsets(self, worker: str) -> Dict[str, int]:
+        """Shard file sizes recorded by worker's last complete()."""
+        return dict(self._db.execute(
+            "SELECT output, offset FROM shard_offsets WHERE worker = ?", (worker,)
+        ))
+
+    def release(self, worker: str, clean: bool = False):
+        """Hand worker's unfinished leases straight back (shutdown, or a restarted worker id).
+
+        clean=True is a graceful stop: the attempt is given back instead of
+        counting towards MAX_ATTEMPTS, since the place did not fail.
+        """
+        if clean:
+            self._db.execute(
+                "UPDATE tasks SET status = 'pending', attempts = MAX(attempts - 1, 0), "
+                "worker = NULL, lease_until = NULL WHERE status = 'leased' AND worker = ?",
+                (worker,),
+            )
+            return
+        self._db.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_until = NULL WHERE status = 'leased' AND worker = ?",
+            (MAX_ATTEMPTS, worker),
+        )
+
+    # ── Progress ─────────────────────────────────────────────────────────────
+
+    def counts(self) -> Dict[str, int]:
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(self._db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")))
+        return counts
+
+    def remaining(self) -> int:
+        """Tasks not yet done or failed (pending + leased)."""
+        return self._db.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def ids(self, status: str, worker: Optional[str] = None) -> List[str]:
+        if worker is None:
+            rows = self._db.execute(
+                "SELECT place_id FROM tasks WHERE status = ? ORDER BY position", (status,)
+            )
+        else:
+            rows = self._db.execute(
+                "SELECT place_id FROM tasks WHERE status = ? AND worker = ? ORDER BY position",
+                (status, worker),
+            )
+        return [r[0] for r in rows]
+
+    def summary(self) -> str:
+        c = self.counts()
+        return (
+            f"work queue: {c['done']:,} done, {c['leased']:,} leased, "
+            f"{c['pending']:,} pending, {c['failed']:,} failed"
+        )
+
+    def close(self):
+        self._db.close()
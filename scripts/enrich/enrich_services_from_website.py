@@ -4,7 +4,8 @@ Enrich provider_services table by crawling provider websites and classifying
 them with Claude into canonical service tags.
 
 For each provider with a website:
-  - Crawl homepage + likely service pages (/services, /backflow, /plumbing, etc.)
+  - Crawl homepage + service pages ranked from robots.txt / sitemap.xml
+    (falls back to guessing /services, /backflow, /plumbing, etc.)
   - Extract clean text
   - Ask Claude Haiku to classify into canonical service tags + evidence snippets
   - Upsert into provider_services
@@ -41,6 +42,12 @@ from crawl4ai import AsyncWebCrawler
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+# Shared crawl helpers live alongside the pipeline scripts in crawler/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "crawler"))
+from crawl_profiles import install_resource_blocking  # noqa: E402
+from page_cache import DEFAULT_TTL_HOURS, CrawledPage, PageCache, page_variant  # noqa: E402
+from site_discovery import SiteDiscovery  # noqa: E402
+
 load_dotenv()
 
 # ─── Config ───────────────────────────────────────────────────────────────────
@@ -48,6 +55,8 @@ load_dotenv()
 ROOT        = Path(__file__).parent.parent.parent
 LOG_DIR     = ROOT / "data" / "services_raw"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
+PAGE_CACHE_DB = ROOT / "crawler" / "data" / "page_cache.sqlite"
+DISCOVERY_JSON = ROOT / "crawler" / "data" / "site_discovery.json"
 
 ANTHROPIC_KEY   = os.environ.get("ANTHROPIC_API_KEY", "")
 SUPABASE_URL    = os.environ.get("SUPABASE_URL", "")
@@ -56,10 +65,12 @@ VISION_MODEL    = "claude-haiku-4-5-20251001"
 
 CONCURRENCY     = 4
 RATE_LIMIT_SLEEP = 1.0
+CRAWL_WORD_THRESHOLD = 50
+CACHE_VARIANT   = page_variant("text", CRAWL_WORD_THRESHOLD)
 MAX_PAGE_TEXT   = 6000   # chars fed to Claude per provider
 RETRY_DELAYS    = [5, 15, 30]
 
-# Subpaths to probe for service pages
+# Subpaths to probe for service pages when the site has no usable sitemap
 SERVICE_SUBPATHS = [
     "/services", "/backflow", "/plumbing", "/testing",
     "/cross-connection", "/rpz", "/backflow-testing",
@@ -124,32 +135,58 @@ def truncate(text: str, max_len: int) -> str:
     return text[:max_len].rsplit(" ", 1)[0] + "…"
 
 
-async def crawl_page(crawler: AsyncWebCrawler, url: str) -> str:
-    """Return cleaned markdown text from a URL, or ''."""
-    try:
-        result = await crawler.arun(
-            url=url,
-            bypass_cache=True,
-            word_count_threshold=50,
-            page_timeout=20000,
-        )
-        if result.success and result.markdown:
-            # Strip nav/footer noise: remove lines shorter than 20 chars (link-only lines)
-            lines = [l for l in result.markdown.splitlines() if len(l.strip()) > 20]
-            return "\n".join(lines)
-    except Exception as exc:
-        log.debug("  crawl error %s: %s", url, exc)
+async def crawl_page(crawler: AsyncWebCrawler, url: str, page_cache: PageCache | None = None) -> str:
+    """Return cleaned markdown text from a URL (via the page cache if given), or ''."""
+    async def _crawl() -> CrawledPage | None:
+        try:
+            result = await crawler.arun(
+                url=url,
+                bypass_cache=True,
+                word_count_threshold=CRAWL_WORD_THRESHOLD,
+                page_timeout=20000,
+            )
+            if result.success and result.markdown:
+                return CrawledPage(
+                    html=result.html or "",
+                    text=result.markdown,
+                    headers=getattr(result, "response_headers", None),
+                )
+        except Exception as exc:
+            log.debug("  crawl error %s: %s", url, exc)
+        return None
+
+    page = await (page_cache.fetch(url, _crawl, CACHE_VARIANT) if page_cache else _crawl())
+    if page and page.text:
+        # Strip nav/footer noise: remove lines shorter than 20 chars (link-only lines)
+        lines = [l for l in page.text.splitlines() if len(l.strip()) > 20]
+        return "\n".join(lines)
     return ""
 
 
-async def gather_page_text(crawler: AsyncWebCrawler, website: str) -> str:
+async def gather_page_text(
+    crawler: AsyncWebCrawler,
+    website: str,
+    page_cache: PageCache | None = None,
+    discovery: SiteDiscovery | None = None,
+) -> str:
     """Crawl homepage + plausible service pages; return combined text."""
     base = website.rstrip("/")
-    urls_to_try = [base] + [base + sp for sp in SERVICE_SUBPATHS]
+    candidates: list[str] = []
+    if discovery is not None:
+        found = await discovery.discover(website)
+        candidates = [
+            u for u in found.ranked(limit=8)
+            if u.rstrip("/") != base and discovery.allowed(u)
+        ]
+    if not candidates:
+        candidates = [base + sp for sp in SERVICE_SUBPATHS]
+    urls_to_try = [base] + candidates
 
     texts: list[str] = []
     for url in urls_to_try[:5]:  # cap at 5 pages
-        text = await crawl_page(crawler, url)
+        if discovery is not None:
+            await discovery.throttle(url)
+        text = await crawl_page(crawler, url, page_cache)
         if text:
             texts.append(f"[Page: {url}]\n{text[:2000]}")
         if sum(len(t) for t in texts) >= MAX_PAGE_TEXT:
@@ -234,6 +271,8 @@ async def process_provider(
     supabase: Client,
     provider: dict,
     sem: asyncio.Semaphore,
+    page_cache: PageCache | None = None,
+    discovery: SiteDiscovery | None = None,
 ) -> bool:
     place_id = provider["place_id"]
     name     = provider.get("name", "?")
@@ -246,7 +285,7 @@ async def process_provider(
     async with sem:
         log.info("Processing: %s → %s", name[:40], website[:50])
 
-        page_text = await gather_page_text(crawler, website)
+        page_text = await gather_page_text(crawler, website, page_cache, discovery)
         if not page_text.strip():
             log.info("  no page text extracted")
             return False
@@ -324,16 +363,26 @@ async def main(args: argparse.Namespace) -> None:
 
     sem     = asyncio.Semaphore(CONCURRENCY)
     success = 0
+    page_cache = None if args.no_page_cache else PageCache(PAGE_CACHE_DB, ttl_hours=args.cache_ttl_hours)
+    discovery = None if args.no_sitemap else SiteDiscovery(DISCOVERY_JSON)
 
     async with AsyncWebCrawler(verbose=False) as crawler:
+        if not args.no_block_resources:
+            install_resource_blocking(crawler, "text")
         for i in range(0, len(providers), CONCURRENCY):
             batch = providers[i : i + CONCURRENCY]
-            tasks = [process_provider(crawler, claude, supabase, p, sem) for p in batch]
+            tasks = [process_provider(crawler, claude, supabase, p, sem, page_cache, discovery) for p in batch]
             results = await asyncio.gather(*tasks)
             success += sum(1 for r in results if r)
             log.info("Progress: %d/%d ✓", i + len(batch), len(providers))
             await asyncio.sleep(RATE_LIMIT_SLEEP)
 
+    if page_cache is not None:
+        log.info(page_cache.summary())
+        await page_cache.aclose()
+    if discovery is not None:
+        await discovery.aclose()
+
     log.info("\n✓ Done. Enriched %d/%d providers with services.", success, len(providers))
 
 
@@ -342,4 +391,12 @@ if __name__ == "__main__":
     parser.add_argument("--limit",    type=int, help="Only process first N providers")
     parser.add_argument("--resume",   action="store_true", help="Skip providers already in DB")
     parser.add_argument("--place-id", type=str, help="Process a single provider by place_id")
+    parser.add_argument("--no-block-resources", action="store_true",
+                        help="Load images, fonts, media and trackers (blocked by default)")
+    parser.add_argument("--no-page-cache", action="store_true",
+                        help="Always crawl live instead of reusing crawler/data/page_cache.sqlite")
+    parser.add_argument("--no-sitemap", action="store_true",
+                        help="Guess service subpaths instead of reading robots.txt / sitemap.xml")
+    parser.add_argument("--cache-ttl-hours", type=float, default=DEFAULT_TTL_HOURS,
+                        help="Serve cached pages without revalidation for this long")
     asyncio.run(main(parser.parse_args()))
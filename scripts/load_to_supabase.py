@@ -11,13 +11,22 @@ Usage:
 
     # Retry only previously failed rows
     python scripts/load_to_supabase.py --retry
+
+    # Count inserts / updates / unchanged rows without writing
+    python scripts/load_to_supabase.py --dry-run
+
+Rows whose content hash matches providers.content_hash (migration 018) are
+skipped; --force re-sends them. City counts and centroids follow the
+providers writes (migration 020); --rebuild-cities recomputes every city.
+
+--bulk loads over a direct Postgres connection (SUPABASE_DB_URL, or --db-url)
+instead: COPY into staging tables, then one merge per table in a single
+transaction (crawler/bulk_loader.py). Nothing is written if any row fails.
 """
 
 from __future__ import annotations
 
 import argparse
-import json
-import math
 import os
 import sys
 from pathlib import Path
@@ -26,13 +35,21 @@ import pandas as pd
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "crawler"))
+from bulk_loader import BulkLoader, BulkLoadError, db_url_from_env  # noqa: E402
+from content_hash import HASH_COLUMN, add_hashes, diff_payloads  # noqa: E402
+from provider_payload import build_payloads  # noqa: E402
+
 load_dotenv()
 
 ROOT       = Path(__file__).parent.parent
-DATA_CSV   = ROOT / "data" / "providers_final.csv"
-FAILED_CSV = ROOT / "data" / "failed_rows.csv"
+# LOADER_DATA_DIR points a run elsewhere, e.g. the load benchmark
+DATA_DIR   = Path(os.environ.get("LOADER_DATA_DIR") or ROOT / "data")
+DATA_CSV   = DATA_DIR / "providers_final.csv"
+FAILED_CSV = DATA_DIR / "failed_rows.csv"
 
 BATCH_SIZE = 100
+HASH_FETCH_CHUNK = 150
 
 # Columns written to the providers table
 PROVIDER_COLS = [
@@ -62,84 +79,53 @@ def get_client() -> Client:
     return create_client(url, key)
 
 
-def _isnan(v: object) -> bool:
-    if v is None:
-        return True
+def fetch_remote_hashes(supabase: Client, place_ids: list[str]) -> dict[str, str | None] | None:
+    """{place_id: content_hash} for providers already in the DB, or None if unavailable."""
+    remote: dict[str, str | None] = {}
     try:
-        return math.isnan(float(v))  # type: ignore[arg-type]
-    except (TypeError, ValueError):
-        return False
-
-
-def clean_row(row: dict, cols: list[str]) -> dict:
-    """Normalise a pandas row for Supabase upsert."""
-    out: dict = {}
-    for col in cols:
-        val = row.get(col)
-        if _isnan(val):
-            out[col] = None
-        elif col == "postal_code":
-            # Normalize float ZIPs: "10019.0" → "10019", preserve leading zeros
-            s = str(val).strip().split(".")[0].strip()
-            if s and s.isdigit():
-                out[col] = s.zfill(5)
-            elif s and s not in ("nan", "none", ""):
-                out[col] = s
-            else:
-                out[col] = None
-        elif col in ("rating", "latitude", "longitude"):
-            out[col] = float(val) if val is not None else None
-        elif col in ("reviews", "backflow_score"):
-            try:
-                out[col] = int(float(val)) if val is not None else 0
-            except (ValueError, TypeError):
-                out[col] = 0
-        elif col == "website_missing":
-            out[col] = bool(val) if val is not None else None
-        elif col == "image_urls":
-            if isinstance(val, list):
-                out[col] = val
-            else:
-                try:
-                    out[col] = json.loads(val) if val else []
-                except (json.JSONDecodeError, TypeError):
-                    out[col] = []
-        elif col == "reviews_per_score":
-            # Scrapy exports as Python dict string: "{'1': 12, '5': 1500}"
-            # Convert to proper JSON dict with int values
-            if isinstance(val, dict):
-                out[col] = {str(k): int(v) for k, v in val.items()}
-            elif isinstance(val, str) and val.strip():
-                try:
-                    # Try standard JSON first
-                    out[col] = json.loads(val)
-                except (json.JSONDecodeError, TypeError):
-                    try:
-                        # Fall back to Python literal eval for single-quote dicts
-                        import ast
-                        parsed = ast.literal_eval(val)
-                        out[col] = {str(k): int(v) for k, v in parsed.items()}
-                    except Exception:
-                        out[col] = None
-            else:
-                out[col] = None
-        else:
-            out[col] = str(val) if val is not None else None
-    return out
+        for i in range(0, len(place_ids), HASH_FETCH_CHUNK):
+            resp = (
+                supabase.table("providers")
+                .select(f"place_id,{HASH_COLUMN}")
+                .in_("place_id", place_ids[i : i + HASH_FETCH_CHUNK])
+                .execute()
+            )
+            for r in resp.data or []:
+                remote[str(r["place_id"])] = r.get(HASH_COLUMN)
+    except Exception as exc:
+        print(f"  Could not fetch content hashes ({exc}) — is migration 018 applied? Sending every row")
+        return None
+    return remote
 
 
 # ─── Loaders ──────────────────────────────────────────────────────────────────
 
 
-def load_providers(supabase: Client, df: pd.DataFrame) -> list[dict]:
-    """Upsert providers in batches. Returns list of failed rows."""
-    rows = df.to_dict("records")
+def load_providers(supabase: Client, df: pd.DataFrame, dry_run: bool = False, force: bool = False) -> list[dict]:
+    """Upsert new or changed providers in batches. Returns list of failed rows."""
+    source = df.to_dict("records")
+    payloads = build_payloads(df, PROVIDER_COLS)
+    add_hashes(payloads)
+    remote = fetch_remote_hashes(supabase, [str(p["place_id"]) for p in payloads])
+    if remote is None:
+        for p in payloads:
+            del p[HASH_COLUMN]
+    diff = diff_payloads(payloads, remote)
+    print(f"  {diff.summary()}")
+
+    # Keep the source rows alongside their payloads so failures can be retried
+    send = {p["place_id"] for p in (payloads if force else diff.changed)}
+    pairs = [(r, p) for r, p in zip(source, payloads) if p["place_id"] in send]
+    if dry_run:
+        print(f"  [DRY RUN] Would upsert {len(pairs):,} providers")
+        return []
+
     failed: list[dict] = []
-    total = len(rows)
+    total = len(pairs)
 
     for i in range(0, total, BATCH_SIZE):
-        batch = rows[i : i + BATCH_SIZE]
-        clean = [clean_row(r, PROVIDER_COLS) for r in batch]
+        batch = [r for r, _ in pairs[i : i + BATCH_SIZE]]
+        clean = [p for _, p in pairs[i : i + BATCH_SIZE]]
         try:
             supabase.table("providers").upsert(clean, on_conflict="place_id").execute()
             print(f"  providers [{i + len(batch):,}/{total:,}] ✓")
@@ -150,39 +136,46 @@ def load_providers(supabase: Client, df: pd.DataFrame) -> list[dict]:
     return failed
 
 
-def load_cities(supabase: Client, df: pd.DataFrame) -> None:
-    """Recompute city counts and upsert cities table."""
-    agg = (
-        df.groupby(["city_slug", "state_code", "city"])
-        .agg(
-            provider_count=("place_id", "count"),
-            latitude=("latitude", "mean"),
-            longitude=("longitude", "mean"),
-        )
-        .reset_index()
-    )
+def rebuild_cities(supabase: Client, dry_run: bool = False) -> None:
+    """Recompute every city's provider count and centroid from the providers table."""
+    if dry_run:
+        print("  [DRY RUN] Would recompute every city from the providers table")
+        return
+    corrected = supabase.rpc("rebuild_city_rollup").execute().data
+    print(f"  {corrected:,} cities corrected")
 
-    city_rows = []
-    for _, row in agg.iterrows():
-        city_rows.append({
-            "city":           str(row["city"]),
-            "city_slug":      str(row["city_slug"]),
-            "state_code":     str(row["state_code"]),
-            "provider_count": int(row["provider_count"]),
-            "latitude":       float(row["latitude"]) if not _isnan(row["latitude"]) else None,
-            "longitude":      float(row["longitude"]) if not _isnan(row["longitude"]) else None,
-        })
-
-    total = len(city_rows)
-    for i in range(0, total, BATCH_SIZE):
-        batch = city_rows[i : i + BATCH_SIZE]
+
+def bulk_load(df: pd.DataFrame, db_url: str, dry_run: bool = False, force: bool = False,
+              rebuild: bool = False) -> None:
+    """--bulk: providers by COPY + merge in one transaction."""
+    try:
+        loader = BulkLoader(db_url)
+    except RuntimeError as exc:
+        print(f"ERROR: {exc}")
+        sys.exit(1)
+    with loader:
+        payloads = build_payloads(df, PROVIDER_COLS)
+        add_hashes(payloads)
+        remote = loader.remote_hashes([str(p["place_id"]) for p in payloads])
+        if remote is None:
+            for p in payloads:
+                del p[HASH_COLUMN]
+        diff = diff_payloads(payloads, remote)
+        print(f"  {diff.summary()}")
         try:
-            supabase.table("cities").upsert(
-                batch, on_conflict="city_slug,state_code"
-            ).execute()
-            print(f"  cities [{i + len(batch):,}/{total:,}] ✓")
-        except Exception as exc:
-            print(f"  cities batch {i // BATCH_SIZE + 1} ERROR: {exc}")
+            stats = loader.load(payloads if force else diff.changed, [], dry_run=dry_run, rebuild_cities=rebuild)
+        except BulkLoadError as exc:
+            print(f"ERROR: bulk load rolled back — nothing was written.\n  {exc}")
+            print("  Fix the row, or re-run without --bulk to collect failed batches in failed_rows.csv")
+            sys.exit(1)
+
+    print(f"  {stats.summary('providers')}")
+    if stats.cities_rebuilt is not None:
+        print(f"  cities: {stats.cities_rebuilt:,} corrected by the full rebuild")
+    print(
+        f"\n✓ Done{' (dry run — rolled back)' if dry_run else ''}."
+        f" {stats.timings['total']:.2f}s in one transaction."
+    )
 
 
 # ─── Main ─────────────────────────────────────────────────────────────────────
@@ -195,6 +188,31 @@ def main() -> None:
         action="store_true",
         help="Load from failed_rows.csv instead of providers_final.csv",
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report inserts / updates / unchanged rows without writing",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-send providers whose content hash is unchanged",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="COPY + merge in one transaction over a direct DB connection",
+    )
+    parser.add_argument(
+        "--db-url",
+        default=db_url_from_env(),
+        help="Postgres connection string for --bulk (default: SUPABASE_DB_URL or DATABASE_URL)",
+    )
+    parser.add_argument(
+        "--rebuild-cities",
+        action="store_true",
+        help="Also recompute every city from the providers table (repair job)",
+    )
     args = parser.parse_args()
 
     csv_path = FAILED_CSV if args.retry else DATA_CSV
@@ -208,13 +226,22 @@ def main() -> None:
     df = pd.read_csv(csv_path, low_memory=False)
     print(f"  {len(df):,} rows")
 
+    if args.bulk:
+        print("\n── Bulk loading providers ──────────────────────────")
+        bulk_load(df, args.db_url, args.dry_run, args.force or args.retry, args.rebuild_cities)
+        return
+
     supabase = get_client()
 
     print("\n── Upserting providers ─────────────────────────────")
-    failed = load_providers(supabase, df)
+    failed = load_providers(supabase, df, args.dry_run, args.force or args.retry)
+
+    if args.rebuild_cities:
+        print("\n── Rebuilding city rollup ──────────────────────────")
+        rebuild_cities(supabase, args.dry_run)
 
-    print("\n── Upserting cities ────────────────────────────────")
-    load_cities(supabase, df)
+    if args.dry_run:
+        return
 
     if failed:
         FAILED_CSV.parent.mkdir(parents=True, exist_ok=True)
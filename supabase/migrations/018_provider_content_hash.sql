@@ -0,0 +1,13 @@
+-- ============================================================
+-- Migration 018: Content hash of the last upserted provider payload
+--
+-- The loaders (crawler/04_upsert_supabase.py, scripts/load_to_supabase.py)
+-- hash each normalized provider row and compare against this column,
+-- so rows that did not change are not re-sent (and updated_at is not
+-- bumped for them).
+-- ============================================================
+
+ALTER TABLE providers
+  ADD COLUMN IF NOT EXISTS content_hash text DEFAULT NULL;
+
+COMMENT ON COLUMN providers.content_hash IS 'sha1 of the normalized payload last written by the loader (crawler/content_hash.py)';
@@ -0,0 +1,74 @@
+-- ============================================================
+-- Migration 019: Atomic batch upsert of providers + provider_services
+--
+-- crawler/04_upsert_supabase.py used to upsert every provider batch,
+-- then walk the CSV again and upsert provider_services for the
+-- providers that made it in. upsert_providers_batch() takes one JSONB
+-- array of provider payloads, each carrying its services_json, and
+-- writes both tables in the same transaction:
+--
+--   SELECT upsert_providers_batch('[{"place_id": "...", ..., "services_json": {...}}]');
+--   POST /rest/v1/rpc/upsert_providers_batch  {"p_rows": [...]}
+--
+-- Only the keys of the first element are written to providers, so
+-- columns the loader doesn't send (enrichment output, created_at) keep
+-- their values. A null services_json leaves the provider's
+-- provider_services row alone. If any row fails, the whole batch rolls
+-- back with the database's error, so a rejected provider never leaves
+-- an orphaned services row behind.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION upsert_providers_batch(p_rows jsonb)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  cols    text[];
+  unknown text[];
+  n       integer;
+BEGIN
+  IF p_rows IS NULL OR jsonb_array_length(p_rows) = 0 THEN
+    RETURN 0;
+  END IF;
+
+  SELECT array_agg(k ORDER BY k) INTO cols
+  FROM jsonb_object_keys(p_rows -> 0) AS k
+  WHERE k <> 'services_json';
+
+  SELECT array_agg(k) INTO unknown
+  FROM unnest(cols) AS k
+  WHERE NOT EXISTS (
+    SELECT 1 FROM pg_attribute
+    WHERE attrelid = 'public.providers'::regclass
+      AND attname = k AND attnum > 0 AND NOT attisdropped
+  );
+  IF unknown IS NOT NULL THEN
+    RAISE EXCEPTION 'providers has no column(s) %', array_to_string(unknown, ', ')
+      USING ERRCODE = 'undefined_column';
+  END IF;
+
+  EXECUTE format(
+    'INSERT INTO providers (%1$s) '
+    'SELECT %1$s FROM jsonb_populate_recordset(NULL::providers, $1) '
+    'ON CONFLICT (place_id) DO %2$s',
+    (SELECT string_agg(format('%I', c), ', ') FROM unnest(cols) AS c),
+    coalesce(
+      'UPDATE SET ' || (SELECT string_agg(format('%1$I = EXCLUDED.%1$I', c), ', ')
+                        FROM unnest(cols) AS c WHERE c <> 'place_id'),
+      'NOTHING'
+    )
+  ) USING p_rows;
+  GET DIAGNOSTICS n = ROW_COUNT;
+
+  INSERT INTO provider_services (place_id, services_json)
+  SELECT r ->> 'place_id', r -> 'services_json'
+  FROM jsonb_array_elements(p_rows) AS r
+  WHERE jsonb_typeof(r -> 'services_json') = 'object'
+  ON CONFLICT (place_id) DO UPDATE SET services_json = EXCLUDED.services_json;
+
+  RETURN n;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION upsert_providers_batch(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION upsert_providers_batch(jsonb) TO service_role;
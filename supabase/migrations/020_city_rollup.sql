@@ -0,0 +1,192 @@
+-- ============================================================
+-- Migration 020: Incremental city rollup
+--
+-- cities.provider_count and the city centroid used to be recomputed by
+-- the loaders from the rows of the CSV being loaded, so a city whose
+-- providers came from earlier runs was undercounted. Now they are
+-- maintained from providers itself:
+--
+--   located_count / latitude_sum / longitude_sum
+--       running totals over the city's providers that have coordinates;
+--       latitude / longitude are their mean
+--   providers_city_rollup_*  (statement-level triggers)
+--       every INSERT / UPDATE / DELETE on providers — PostgREST upserts,
+--       upsert_providers_batch, bulk merges — applies the count and
+--       coordinate-sum deltas of the rows it changed to their cities.
+--       Updates that leave a provider's city and coordinates alone
+--       cost nothing
+--   rebuild_city_rollup()
+--       recomputes every city from a full scan of providers. Only a
+--       repair job (python crawler/04_upsert_supabase.py --rebuild-cities);
+--       run once below to seed the totals
+-- ============================================================
+
+ALTER TABLE cities
+  ADD COLUMN IF NOT EXISTS located_count integer          NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS latitude_sum  double precision NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS longitude_sum double precision NOT NULL DEFAULT 0;
+
+-- ── Apply deltas ──────────────────────────────────────────────────────────────
+-- added rows count +1 towards their city, removed rows -1.
+
+CREATE OR REPLACE FUNCTION apply_city_rollup(added providers[], removed providers[])
+RETURNS void
+LANGUAGE sql
+AS $$
+  INSERT INTO cities AS c (
+    city, city_slug, state_code, provider_count,
+    located_count, latitude_sum, longitude_sum, latitude, longitude
+  )
+  SELECT
+    city, city_slug, state_code, provider_count,
+    located_count, latitude_sum, longitude_sum,
+    latitude_sum / nullif(located_count, 0),
+    longitude_sum / nullif(located_count, 0)
+  FROM (
+    SELECT
+      min(d.city) AS city, d.city_slug, d.state_code, sum(d.sign)::integer AS provider_count,
+      coalesce(sum(d.sign) FILTER (WHERE d.located), 0)::integer AS located_count,
+      coalesce(sum(d.sign * d.latitude) FILTER (WHERE d.located), 0) AS latitude_sum,
+      coalesce(sum(d.sign * d.longitude) FILTER (WHERE d.located), 0) AS longitude_sum
+    FROM (
+      SELECT city, city_slug, state_code, latitude, longitude,
+             latitude IS NOT NULL AND longitude IS NOT NULL AS located, 1 AS sign
+      FROM unnest(added)
+      UNION ALL
+      SELECT city, city_slug, state_code, latitude, longitude,
+             latitude IS NOT NULL AND longitude IS NOT NULL, -1
+      FROM unnest(removed)
+    ) AS d
+    WHERE d.city_slug IS NOT NULL AND d.state_code IS NOT NULL
+    GROUP BY d.city_slug, d.state_code
+  ) AS delta
+  -- Removals only ever apply to an existing city
+  WHERE delta.provider_count > 0
+     OR EXISTS (SELECT 1 FROM cities x WHERE x.city_slug = delta.city_slug AND x.state_code = delta.state_code)
+  ON CONFLICT (city_slug, state_code) DO UPDATE SET
+    provider_count = greatest(c.provider_count + EXCLUDED.provider_count, 0),
+    located_count  = greatest(c.located_count + EXCLUDED.located_count, 0),
+    latitude_sum   = c.latitude_sum + EXCLUDED.latitude_sum,
+    longitude_sum  = c.longitude_sum + EXCLUDED.longitude_sum,
+    -- A city with no located providers left keeps its last centroid
+    latitude  = coalesce((c.latitude_sum + EXCLUDED.latitude_sum)
+                         / nullif(c.located_count + EXCLUDED.located_count, 0), c.latitude),
+    longitude = coalesce((c.longitude_sum + EXCLUDED.longitude_sum)
+                         / nullif(c.located_count + EXCLUDED.located_count, 0), c.longitude);
+$$;
+
+-- ── Triggers ──────────────────────────────────────────────────────────────────
+-- Transition tables can't be shared between events, hence one trigger per
+-- event; SECURITY DEFINER so any role allowed to write providers keeps
+-- cities in step.
+
+CREATE OR REPLACE FUNCTION providers_city_rollup()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM apply_city_rollup(ARRAY(SELECT n::providers FROM new_rows n), '{}');
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM apply_city_rollup('{}', ARRAY(SELECT o::providers FROM old_rows o));
+  ELSE
+    -- Only rows whose city or coordinates changed
+    PERFORM apply_city_rollup(
+      ARRAY(
+        SELECT n::providers FROM new_rows n
+        WHERE NOT EXISTS (
+          SELECT 1 FROM old_rows o
+          WHERE o.place_id = n.place_id
+            AND (o.city_slug, o.state_code, o.latitude, o.longitude)
+                IS NOT DISTINCT FROM (n.city_slug, n.state_code, n.latitude, n.longitude)
+        )
+      ),
+      ARRAY(
+        SELECT o::providers FROM old_rows o
+        WHERE NOT EXISTS (
+          SELECT 1 FROM new_rows n
+          WHERE n.place_id = o.place_id
+            AND (n.city_slug, n.state_code, n.latitude, n.longitude)
+                IS NOT DISTINCT FROM (o.city_slug, o.state_code, o.latitude, o.longitude)
+        )
+      )
+    );
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS providers_city_rollup_insert ON providers;
+DROP TRIGGER IF EXISTS providers_city_rollup_update ON providers;
+DROP TRIGGER IF EXISTS providers_city_rollup_delete ON providers;
+
+CREATE TRIGGER providers_city_rollup_insert
+  AFTER INSERT ON providers
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION providers_city_rollup();
+
+CREATE TRIGGER providers_city_rollup_update
+  AFTER UPDATE ON providers
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION providers_city_rollup();
+
+CREATE TRIGGER providers_city_rollup_delete
+  AFTER DELETE ON providers
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION providers_city_rollup();
+
+-- ── Full rebuild (repair job) ─────────────────────────────────────────────────
+-- Returns the number of cities whose totals changed.
+
+CREATE OR REPLACE FUNCTION rebuild_city_rollup()
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH agg AS (
+    SELECT
+      city_slug, state_code, min(city) AS city, count(*)::integer AS provider_count,
+      count(*) FILTER (WHERE latitude IS NOT NULL AND longitude IS NOT NULL)::integer AS located_count,
+      coalesce(sum(latitude) FILTER (WHERE latitude IS NOT NULL AND longitude IS NOT NULL), 0) AS latitude_sum,
+      coalesce(sum(longitude) FILTER (WHERE latitude IS NOT NULL AND longitude IS NOT NULL), 0) AS longitude_sum
+    FROM providers
+    WHERE city_slug IS NOT NULL AND state_code IS NOT NULL
+    GROUP BY city_slug, state_code
+  ),
+  upserted AS (
+    INSERT INTO cities AS c (
+      city, city_slug, state_code, provider_count,
+      located_count, latitude_sum, longitude_sum, latitude, longitude
+    )
+    SELECT city, city_slug, state_code, provider_count,
+           located_count, latitude_sum, longitude_sum,
+           latitude_sum / nullif(located_count, 0), longitude_sum / nullif(located_count, 0)
+    FROM agg
+    ON CONFLICT (city_slug, state_code) DO UPDATE SET
+      provider_count = EXCLUDED.provider_count,
+      located_count  = EXCLUDED.located_count,
+      latitude_sum   = EXCLUDED.latitude_sum,
+      longitude_sum  = EXCLUDED.longitude_sum,
+      latitude  = coalesce(EXCLUDED.latitude, c.latitude),
+      longitude = coalesce(EXCLUDED.longitude, c.longitude)
+    WHERE (c.provider_count, c.located_count, c.latitude_sum, c.longitude_sum)
+          IS DISTINCT FROM
+          (EXCLUDED.provider_count, EXCLUDED.located_count, EXCLUDED.latitude_sum, EXCLUDED.longitude_sum)
+    RETURNING 1
+  ),
+  emptied AS (
+    UPDATE cities c
+    SET provider_count = 0, located_count = 0, latitude_sum = 0, longitude_sum = 0
+    WHERE (c.provider_count <> 0 OR c.located_count <> 0)
+      AND NOT EXISTS (SELECT 1 FROM agg a WHERE a.city_slug = c.city_slug AND a.state_code = c.state_code)
+    RETURNING 1
+  )
+  SELECT ((SELECT count(*) FROM upserted) + (SELECT count(*) FROM emptied))::integer;
+$$;
+
+REVOKE EXECUTE ON FUNCTION apply_city_rollup(providers[], providers[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_city_rollup() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION rebuild_city_rollup() TO service_role;
+
+SELECT rebuild_city_rollup();